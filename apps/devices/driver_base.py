@@ -2,14 +2,38 @@
 
 from __future__ import annotations
 
+import asyncio
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import Any, Mapping, Optional
+from enum import Flag, auto
+from typing import Any, AsyncIterator, Awaitable, Callable, Mapping, Optional
+
+#: 执行阻塞调用的协程工厂，签名与 ``DriverHandle.call`` / ``asyncio.to_thread`` 一致。
+BlockingRunner = Callable[..., Awaitable[Any]]
+
+
+class DriverCapability(Flag):
+    """驱动声明的可选能力；Actor 在构造时读取一次，而不是每条命令探测属性。"""
+
+    NONE = 0
+    #: 任务期间产出进度记录（``stream_progress``）
+    PROGRESS = auto()
+    #: 任务结束后可取回结果（``fetch_result``）
+    RESULT = auto()
+    #: 任务期间产出传感器数据块（``stream_sensors``）
+    SENSORS = auto()
 
 
 class InstrumentDriver(ABC):
     """高阶设备驱动需实现的核心接口。"""
 
+    #: 驱动方法是否可能阻塞（串口、VISA 等 I/O）。为 True 时 Actor 通过
+    #: ``DriverExecutor`` 在线程池中调用；纯内存实现可置为 False 以内联执行。
+    blocking_io: bool = True
+
+    #: 驱动支持的可选能力，子类按实际实现覆盖（也可按配置在实例上收窄）。
+    capabilities: DriverCapability = DriverCapability.PROGRESS | DriverCapability.RESULT
+
     @abstractmethod
     def identify(self) -> Mapping[str, Any]:
         """返回设备识别信息，例如型号、固件版本。"""
@@ -41,5 +65,76 @@ class InstrumentDriver(ABC):
         """可选：拉取最终诊断结果。默认无结果。"""
         return None
 
+    async def stream_progress(
+        self,
+        *,
+        run_blocking: BlockingRunner | None = None,
+        poll_interval: float = 0.1,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """在任务执行期间逐条产出进度记录，任务结束后迭代终止。
+
+        默认实现轮询 ``fetch_progress()``（视为累计列表）只产出新增记录，直到
+        ``is_busy()`` 返回 False；阻塞调用经 ``run_blocking`` 执行，缺省为
+        ``asyncio.to_thread``。能够主动推送进度的驱动应覆盖本方法。
+        """
+
+        call = run_blocking or asyncio.to_thread
+        seen = 0
+        while True:
+            records = await call(self.fetch_progress)
+            for record in records[seen:]:
+                yield record
+            seen = len(records)
+            if not await call(self.is_busy):
+                return
+            await asyncio.sleep(poll_interval)
+
+
+class AsyncInstrumentDriver(ABC):
+    """原生异步驱动接口：所有 I/O 方法均可 await，Actor 对各类设备只走这一条路径。
+
+    同步驱动经 ``driver_executor.SyncDriverAdapter`` 包装为本接口；``capabilities``
+    声明可用的可选方法，未声明的能力不会被调用。
+    """
+
+    capabilities: DriverCapability = DriverCapability.PROGRESS | DriverCapability.RESULT
+
+    @abstractmethod
+    async def identify(self) -> Mapping[str, Any]:
+        """返回设备识别信息，例如型号、固件版本。"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def start_task(self, name: str, params: Mapping[str, Any]) -> None:
+        """根据任务名称触发实际操作。"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def abort(self) -> None:
+        """请求驱动终止当前执行。"""
+        raise NotImplementedError
+
+    async def is_busy(self) -> bool:
+        return False
+
+    async def stream_progress(self) -> AsyncIterator[dict[str, Any]]:
+        """任务执行期间逐条产出进度记录；声明 ``PROGRESS`` 时需覆盖。"""
+
+        return
+        yield  # pragma: no cover - 使本方法成为异步生成器
+
+    async def fetch_result(self) -> Optional[dict[str, Any]]:
+        """任务结束后返回结果；声明 ``RESULT`` 时需覆盖。"""
+        return None
+
+    async def stream_sensors(self) -> AsyncIterator[Any]:
+        """任务执行期间产出传感器数据块；声明 ``SENSORS`` 时需覆盖。"""
+
+        return
+        yield  # pragma: no cover
+
+    async def close(self) -> None:
+        """释放驱动持有的资源。"""
+
 
-__all__ = ["InstrumentDriver"]
+__all__ = ["AsyncInstrumentDriver", "BlockingRunner", "DriverCapability", "InstrumentDriver"]
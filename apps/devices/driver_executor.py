@@ -0,0 +1,201 @@
+"""在线程池中执行同步驱动调用，避免阻塞 asyncio 事件循环。"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Mapping, Optional, TypeVar
+
+from .driver_base import AsyncInstrumentDriver, InstrumentDriver
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class DriverExecutor:
+    """Bounded thread pool shared by all drivers of a process.
+
+    线程数上限由 ``max_workers`` 控制；每台设备通过 ``bind()`` 获得一个
+    ``DriverHandle``，同一设备的调用在池中串行执行，不同设备之间并行。
+    """
+
+    def __init__(self, max_workers: int = 8, *, thread_name_prefix: str = "driver-io") -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be >= 1")
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+
+    def bind(self, driver: InstrumentDriver) -> "DriverHandle":
+        return DriverHandle(self, driver)
+
+    def submit(self, fn: Callable[..., T], *args: Any) -> "Future[T]":
+        return self._pool.submit(fn, *args)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+class DriverHandle:
+    """Per-device, serialized async view of a synchronous driver.
+
+    - ``call()`` 按调用顺序串行执行；调用方被取消时，尚未开始的调用会被撤销，
+      已在线程中运行的调用会执行完毕后才释放设备锁，保证串行语义不被破坏。
+    - ``abort()`` 绕过串行队列立即执行 ``driver.abort()``，并撤销排队中的调用。
+    - 驱动声明 ``blocking_io = False`` 时直接在事件循环中调用，省去线程切换。
+    """
+
+    def __init__(self, executor: DriverExecutor, driver: InstrumentDriver) -> None:
+        self._executor = executor
+        self._driver = driver
+        # 设备占用标志 + FIFO 等待队列：等待中的调用方登记在 _waiters，abort() 可直接撤销
+        self._busy = False
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        self._pending: set[Future[Any]] = set()
+        self._inline = not getattr(driver, "blocking_io", True)
+
+    @property
+    def driver(self) -> InstrumentDriver:
+        return self._driver
+
+    async def call(self, fn: Callable[..., T], *args: Any) -> T:
+        if self._inline:
+            return fn(*args)
+        await self._acquire()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._handoff()
+            raise
+        self._pending.add(future)
+        inner = asyncio.wrap_future(future)
+        inner.add_done_callback(lambda _: self._release(future))
+        try:
+            return await asyncio.shield(inner)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+
+    async def _acquire(self) -> None:
+        if not self._busy and not self._waiters:
+            self._busy = True
+            return
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # 已轮到本调用却被取消：把设备交给下一个等待者
+                self._handoff()
+            raise
+
+    def _handoff(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._busy = False
+
+    def _release(self, future: "Future[Any]") -> None:
+        self._pending.discard(future)
+        self._handoff()
+
+    def cancel_pending(self) -> int:
+        """Cancel calls that have not started yet; returns how many were cancelled."""
+
+        waiters, self._waiters = self._waiters, deque()
+        cancelled = sum(1 for waiter in waiters if waiter.cancel())
+        return cancelled + sum(1 for future in list(self._pending) if future.cancel())
+
+    async def abort(self) -> None:
+        self.cancel_pending()
+        if self._inline:
+            self._driver.abort()
+            return
+        await asyncio.wrap_future(self._executor.submit(self._driver.abort))
+
+
+class SyncDriverAdapter(AsyncInstrumentDriver):
+    """Expose a synchronous ``InstrumentDriver`` as an ``AsyncInstrumentDriver``.
+
+    所有同步方法经 ``DriverHandle`` 在线程池中串行执行（``blocking_io = False`` 时内联），
+    ``abort`` 绕过串行队列；能力沿用被包装驱动声明的 ``capabilities``。
+    """
+
+    def __init__(self, handle: DriverHandle) -> None:
+        self._handle = handle
+        self._sync = handle.driver
+        self.capabilities = getattr(self._sync, "capabilities", AsyncInstrumentDriver.capabilities)
+
+    @property
+    def wrapped(self) -> InstrumentDriver:
+        return self._sync
+
+    @property
+    def handle(self) -> DriverHandle:
+        return self._handle
+
+    async def identify(self) -> Mapping[str, Any]:
+        return await self._handle.call(self._sync.identify)
+
+    async def start_task(self, name: str, params: Mapping[str, Any]) -> None:
+        await self._handle.call(self._sync.start_task, name, params)
+
+    async def abort(self) -> None:
+        await self._handle.abort()
+
+    async def is_busy(self) -> bool:
+        return await self._handle.call(self._sync.is_busy)
+
+    def stream_progress(self) -> AsyncIterator[dict[str, Any]]:
+        return self._sync.stream_progress(run_blocking=self._handle.call)
+
+    async def fetch_result(self) -> Optional[dict[str, Any]]:
+        return await self._handle.call(self._sync.fetch_result)
+
+    def stream_sensors(self) -> AsyncIterator[Any]:
+        return self._sync.stream_sensors()  # type: ignore[attr-defined]
+
+    async def close(self) -> None:
+        close = getattr(self._sync, "close", None)
+        if close is not None:
+            await self._handle.call(close)
+
+
+def as_async_driver(
+    driver: InstrumentDriver | AsyncInstrumentDriver,
+    executor: DriverExecutor | None = None,
+) -> AsyncInstrumentDriver:
+    """Return ``driver`` itself if already async, else wrap it on ``executor``."""
+
+    if isinstance(driver, AsyncInstrumentDriver):
+        return driver
+    return SyncDriverAdapter((executor or get_default_executor()).bind(driver))
+
+
+_default_executor: Optional[DriverExecutor] = None
+_default_lock = threading.Lock()
+
+
+def get_default_executor() -> DriverExecutor:
+    """Return the lazily created process-wide executor."""
+
+    global _default_executor
+    with _default_lock:
+        if _default_executor is None:
+            _default_executor = DriverExecutor()
+        return _default_executor
+
+
+__all__ = [
+    "DriverExecutor",
+    "DriverHandle",
+    "SyncDriverAdapter",
+    "as_async_driver",
+    "get_default_executor",
+]
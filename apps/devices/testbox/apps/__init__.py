@@ -1,7 +1,8 @@
 """Device-centric package for the TestBox instrument workflow."""
 
 from .actor import DeviceTestBoxActor, DeviceTestBoxRuntime, create_actor
-from .main import run, run_async, run_mqtt, run_mqtt_async
+from .main import run, run_async, run_host, run_host_async, run_mqtt, run_mqtt_async
+from .simulator import run_fleet_sim, run_fleet_sim_async
 
 __all__ = [
     "DeviceTestBoxActor",
@@ -9,6 +10,10 @@ __all__ = [
     "create_actor",
     "run",
     "run_async",
+    "run_fleet_sim",
+    "run_fleet_sim_async",
+    "run_host",
+    "run_host_async",
     "run_mqtt",
     "run_mqtt_async",
 ]
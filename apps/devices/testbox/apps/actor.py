@@ -3,108 +3,201 @@
 from __future__ import annotations
 
 import asyncio
-from dataclasses import dataclass
-from typing import Any, Dict, Iterable
+import contextlib
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, AsyncIterator, Dict
 
 from ..domain.models import (
     DeviceTestBoxDoneEvent,
     DeviceTestBoxProgressEvent,
     DeviceTestBoxRunCommand,
     DeviceTestBoxRunParams,
+    DeviceTestBoxSensorReading,
+    DeviceTestBoxSensorSnapshot,
 )
 from core.domain.shared.models import ErrorEvent
+from core.clock import Clock, RealClock, ScaledClock, build_clock
+from core.metrics import Histogram
 
-from ...driver_base import InstrumentDriver
+from ...driver_base import AsyncInstrumentDriver, DriverCapability, InstrumentDriver
+from ...driver_executor import DriverExecutor, as_async_driver
 
 from ..drivers import DeviceTestBoxFakeDriver, DeviceTestBoxRealDriver
 from ..transport import SerialTransport
-from .queues import CommandQueue, TelemetryQueue
+from .queues import CommandQueue, TelemetryQueue, build_queue_kwargs
+
+
+# stop() 投递到命令队列中的哨兵，用于唤醒阻塞在 get() 上的 Actor 循环。
+_STOP = object()
+
+
+@dataclass(slots=True)
+class ActorMetrics:
+    """Counters exposed by the actor loop."""
+
+    commands: int = 0
+    #: 从命令队列取到元素的次数（命令或 stop 哨兵）；``wakeups - commands`` 即未带来工作的唤醒
+    wakeups: int = 0
+    sensor_snapshots: int = 0
+    pickup_latency_s: Histogram = field(default_factory=Histogram)
 
 
 class DeviceTestBoxActor:
-    """Consume commands and emit telemetry events through the driver."""
+    """Consume commands and emit telemetry events through the driver.
+
+    循环只在有命令或收到 stop 请求时被唤醒：``stop()`` 会向命令队列投递哨兵，
+    排在已入队命令之后，因此仍保持"处理完积压命令再退出"的语义。
+    """
 
     def __init__(
         self,
         *,
         device_id: str,
-        driver: InstrumentDriver,
+        driver: InstrumentDriver | AsyncInstrumentDriver,
         command_queue: CommandQueue,
         telemetry_queue: TelemetryQueue,
+        executor: DriverExecutor | None = None,
+        clock: Clock | None = None,
     ) -> None:
         self._device_id = device_id
-        self._driver = driver
+        # 命令超时与传感器时间戳按该时钟计，应与驱动共用同一实例
+        self._clock = clock or RealClock()
+        # 同步驱动包装为异步接口，调用统一经由线程池执行，避免串口读超时阻塞事件循环；
+        # 能力标志只在此读取一次，命令处理路径不再做属性探测
+        self._driver = as_async_driver(driver, executor)
+        self._capabilities = self._driver.capabilities
         self._command_queue = command_queue
         self._telemetry_queue = telemetry_queue
         self._stop_event = asyncio.Event()
+        self._metrics = ActorMetrics()
 
     def stop(self) -> None:
         """Request the actor loop to exit."""
 
+        if self._stop_event.is_set():
+            return
         self._stop_event.set()
+        try:
+            self._command_queue.put_nowait(_STOP)  # type: ignore[arg-type]
+        except asyncio.QueueFull:
+            # 队列已满说明 Actor 正在处理命令，会在队列排空后检查 _stop_event 退出
+            pass
 
     @property
     def device_id(self) -> str:
         return self._device_id
 
+    @property
+    def metrics(self) -> ActorMetrics:
+        return self._metrics
+
     async def run(self) -> None:
         """Continuously consume commands and publish telemetry."""
 
+        metrics = self._metrics
+        queue = self._command_queue
         while True:
-            if self._stop_event.is_set() and self._command_queue.empty():
+            if self._stop_event.is_set() and queue.empty():
                 break
+            command = await queue.get_command()
+            metrics.wakeups += 1
             try:
-                command = await asyncio.wait_for(self._command_queue.get_command(), 0.1)
-            except asyncio.TimeoutError:
-                continue
-            try:
+                if command is _STOP:
+                    continue
+                metrics.commands += 1
+                metrics.pickup_latency_s.observe(queue.last_wait_s)
                 await self._handle_command(command)
             finally:
-                self._command_queue.task_done()
+                queue.task_done()
 
     async def _handle_command(self, command: DeviceTestBoxRunCommand) -> None:
         payload = command.params.model_dump(exclude_none=True)
+        sensors: asyncio.Task[None] | None = None
         try:
-            self._driver.start_task("run_diagnostic", payload)
-            await self._publish_progress(command)
-            await self._publish_done(command)
+            await self._driver.start_task("run_diagnostic", payload)
+            async with self._clock.timeout(command.timeout_s):
+                if self._capabilities & DriverCapability.SENSORS:
+                    sensors = asyncio.create_task(self._publish_sensors(command))
+                if self._capabilities & DriverCapability.PROGRESS:
+                    await self._publish_progress(command)
+                if sensors is not None:
+                    await sensors
+            if self._capabilities & DriverCapability.RESULT:
+                await self._publish_done(command)
+        except TimeoutError:
+            await self._driver.abort()
+            await self._publish_error(
+                command,
+                code="testbox.actor.timeout",
+                message=f"diagnostic exceeded timeout_s={command.timeout_s}",
+            )
         except Exception as exc:  # noqa: BLE001
-            await self._telemetry_queue.put_telemetry(
-                ErrorEvent(
-                    device_id=command.device_id,
-                    corr_id=command.corr_id,
-                    code="testbox.actor.error",
-                    message=str(exc),
-                    severity="ERROR",
-                    details={"command": command.model_dump(exclude_none=True)},
-                )
+            await self._publish_error(command, code="testbox.actor.error", message=str(exc))
+        finally:
+            if sensors is not None and not sensors.done():
+                sensors.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await sensors
+
+    async def _publish_error(self, command: DeviceTestBoxRunCommand, *, code: str, message: str) -> None:
+        await self._telemetry_queue.put_telemetry(
+            ErrorEvent(
+                device_id=command.device_id,
+                corr_id=command.corr_id,
+                code=code,
+                message=message,
+                severity="ERROR",
+                details={"command": command.model_dump(exclude_none=True)},
             )
+        )
 
     async def _publish_progress(self, command: DeviceTestBoxRunCommand) -> None:
-        progress_items = getattr(self._driver, "fetch_progress", None)
-        if progress_items is None or not callable(progress_items):
-            return
-        records: Iterable[Dict[str, Any]] = progress_items()
-        for record in records:
-            await self._telemetry_queue.put_telemetry(
-                DeviceTestBoxProgressEvent(
-                    corr_id=command.corr_id,
-                    device_id=command.device_id,
-                    progress=float(record.get("progress", 0.0)),
-                    stage=str(record.get("stage", "unknown")),
-                    message=record.get("message"),
-                    metadata={
-                        "elapsed_s": record.get("elapsed_s"),
-                        "device_id": command.device_id,
-                    },
+        """Publish progress records while the driver run is in flight."""
+
+        stream: AsyncIterator[Dict[str, Any]] = self._driver.stream_progress()
+        async with contextlib.aclosing(stream):
+            async for record in stream:
+                await self._telemetry_queue.put_telemetry(
+                    DeviceTestBoxProgressEvent(
+                        corr_id=command.corr_id,
+                        device_id=command.device_id,
+                        progress=float(record.get("progress", 0.0)),
+                        stage=str(record.get("stage", "unknown")),
+                        message=record.get("message"),
+                        metadata={
+                            "elapsed_s": record.get("elapsed_s"),
+                            "device_id": command.device_id,
+                        },
+                    )
                 )
-            )
+
+    async def _publish_sensors(self, command: DeviceTestBoxRunCommand) -> None:
+        """Turn sensor sample blocks into ``DeviceTestBoxSensorSnapshot`` telemetry."""
+
+        stream: AsyncIterator[Any] = self._driver.stream_sensors()
+        queue = self._telemetry_queue
+        metrics = self._metrics
+        started = self._clock.now()
+        async with contextlib.aclosing(stream):
+            async for block in stream:
+                names, unit, period = block.names, block.unit, block.period_s
+                for index, row in enumerate(block.values.tolist()):
+                    await queue.put_telemetry(
+                        DeviceTestBoxSensorSnapshot(
+                            corr_id=command.corr_id,
+                            device_id=command.device_id,
+                            timestamp=started + timedelta(seconds=block.t0_s + index * period),
+                            sensors=[
+                                DeviceTestBoxSensorReading(name=name, value=value, unit=unit)
+                                for name, value in zip(names, row)
+                            ],
+                        )
+                    )
+                    metrics.sensor_snapshots += 1
 
     async def _publish_done(self, command: DeviceTestBoxRunCommand) -> None:
-        fetch_result = getattr(self._driver, "fetch_result", None)
-        if fetch_result is None or not callable(fetch_result):
-            return
-        result = fetch_result()
+        result = await self._driver.fetch_result()
         if result is None:
             return
         passed = bool(result.get("passed", False))
@@ -129,9 +222,10 @@ class DeviceTestBoxRuntime:
     command_queue: CommandQueue
     telemetry_queue: TelemetryQueue
     default_command: DeviceTestBoxRunCommand | None = None
+    clock: Clock | None = None
 
 
-def _build_driver(config: Dict[str, Any]):
+def _build_driver(config: Dict[str, Any], clock: Clock | None = None):
     driver_cfg = config.get("driver", {})
     driver_type = driver_cfg.get("type", "fake").lower()
     if driver_type == "fake":
@@ -139,6 +233,10 @@ def _build_driver(config: Dict[str, Any]):
             default_duration_s=float(driver_cfg.get("default_duration_s", 60.0)),
             stages=list(driver_cfg.get("stages", [])) or None,
             seed=int(driver_cfg.get("seed", 7)),
+            time_scale=float(driver_cfg.get("time_scale", 0.0)),
+            sensors=driver_cfg.get("sensors"),
+            clock=clock,
+            failure_rate=float(driver_cfg.get("failure_rate", 0.0)),
         )
     if driver_type == "real":
         transport_cfg = (
@@ -158,7 +256,11 @@ def _build_driver(config: Dict[str, Any]):
             rtscts=_as_bool(transport_cfg.get("rtscts", False)),
             dsrdtr=_as_bool(transport_cfg.get("dsrdtr", False)),
         )
-        return DeviceTestBoxRealDriver(transport=transport)
+        return DeviceTestBoxRealDriver(
+            transport=transport,
+            reader_thread=_as_bool(driver_cfg.get("reader_thread", False)),
+            buffer_size=int(driver_cfg.get("buffer_size", 1024)),
+        )
     raise ValueError(f"Unsupported driver type: {driver_type}")
 
 
@@ -174,6 +276,14 @@ def _as_bool(value: Any) -> bool:
     return bool(value)
 
 
+def _resolve_clock(config: Dict[str, Any]) -> Clock | None:
+    if config.get("clock"):
+        return build_clock(config["clock"])
+    # 兼容 driver.time_scale：等价于按 1/time_scale 倍速运行的 ScaledClock
+    time_scale = float((config.get("driver") or {}).get("time_scale", 0.0))
+    return ScaledClock(1.0 / time_scale) if time_scale > 0 else None
+
+
 def _resolve_params(config: Dict[str, Any]) -> DeviceTestBoxRunParams:
     params_cfg = config.get("default_params", {})
     if isinstance(params_cfg, DeviceTestBoxRunParams):
@@ -181,19 +291,36 @@ def _resolve_params(config: Dict[str, Any]) -> DeviceTestBoxRunParams:
     return DeviceTestBoxRunParams(**params_cfg)
 
 
-def create_actor(config: Dict[str, Any] | None = None) -> DeviceTestBoxRuntime:
-    """Construct the actor and its queues for the device."""
+def create_actor(
+    config: Dict[str, Any] | None = None,
+    *,
+    telemetry_queue: TelemetryQueue | None = None,
+    executor: DriverExecutor | None = None,
+    clock: Clock | None = None,
+) -> DeviceTestBoxRuntime:
+    """Construct the actor and its queues for the device.
+
+    ``telemetry_queue`` 可由调用方注入，便于多台设备共享同一条遥测通道（fleet host 模式）；
+    ``executor`` 为驱动 I/O 线程池，缺省使用进程级共享实例；
+    ``queues.command`` / ``queues.telemetry`` 配置队列容量与溢出策略；
+    ``clock`` 可注入或由 ``clock.mode`` 配置（real/scaled/virtual），驱动与 Actor 共用。
+    """
 
     cfg = config.copy() if config else {}
     device_id = cfg.get("device_id", "TESTBOX-001")
-    command_queue = CommandQueue()
-    telemetry_queue = TelemetryQueue()
-    driver = _build_driver(cfg)
+    queues_cfg = cfg.get("queues") or {}
+    clock = clock or _resolve_clock(cfg)
+    command_queue = CommandQueue(**build_queue_kwargs(queues_cfg.get("command")), clock=clock)
+    if telemetry_queue is None:
+        telemetry_queue = TelemetryQueue(**build_queue_kwargs(queues_cfg.get("telemetry")), clock=clock)
+    driver = _build_driver(cfg, clock)
     actor = DeviceTestBoxActor(
         device_id=device_id,
         driver=driver,
         command_queue=command_queue,
         telemetry_queue=telemetry_queue,
+        executor=executor,
+        clock=clock,
     )
 
     default_params = _resolve_params(cfg)
@@ -210,11 +337,13 @@ def create_actor(config: Dict[str, Any] | None = None) -> DeviceTestBoxRuntime:
         command_queue=command_queue,
         telemetry_queue=telemetry_queue,
         default_command=cfg.get("default_command"),
+        clock=clock,
     )
     return runtime
 
 
 __all__ = [
+    "ActorMetrics",
     "DeviceTestBoxActor",
     "DeviceTestBoxRuntime",
     "create_actor",
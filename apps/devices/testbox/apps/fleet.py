@@ -0,0 +1,264 @@
+"""Fleet host: run many TestBox actors in one process over a shared MQTT client."""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Mapping
+
+from ...driver_executor import DriverExecutor
+from ..drivers.command_adapter import CommandTopicLayout, MQTTCommandAdapter
+from ..drivers.state_adapter import ShadowPublishPolicy, StateShadowPublisher, StateTopicLayout
+from ..drivers.telemetry_adapter import (
+    MQTTTelemetryAdapter,
+    TelemetryBatchConfig,
+    TelemetryRoute,
+    TelemetryTopicLayout,
+)
+from .actor import DeviceTestBoxRuntime, create_actor
+from .queues import TelemetryQueue, build_queue_kwargs
+from core.codecs import CodecRegistry, build_registry
+from core.spool import SpoolConfig
+from core.topics import TopicRouter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_TOPIC_TEMPLATE = "lab/local/line/device_testbox/{device_id}"
+
+MQTTClient = Any
+
+
+def load_fleet_devices(config: Mapping[str, Any]) -> list[Dict[str, Any]]:
+    """Expand a fleet config into one config dict per device.
+
+    支持以下写法：
+    - ``fleet: {defaults: {...}, devices: [...]}``（或省略 ``fleet`` 顶层键）；
+    - ``devices`` 可为列表或 ``{device_id: {...}}`` 映射；
+    - 条目带 ``count`` 时按 ``device_id`` 模板批量展开，例如 ``"TB-{index:03d}"``；
+    - 兼容 ``configs/devices.yaml`` 中的单设备 ``device_testbox: {...}`` 写法。
+    每台设备的配置都是 ``defaults`` 与条目的深度合并，可直接交给 ``create_actor``。
+    """
+
+    fleet_cfg: Mapping[str, Any] = config.get("fleet") or config
+    defaults = fleet_cfg.get("defaults") or {}
+    template = fleet_cfg.get("base_topic_template", DEFAULT_BASE_TOPIC_TEMPLATE)
+
+    entries = fleet_cfg.get("devices")
+    if entries is None and "device_testbox" in config:
+        entries = [config["device_testbox"]]
+    if isinstance(entries, Mapping):
+        entries = [{"device_id": key, **(value or {})} for key, value in entries.items()]
+    if not entries:
+        raise ValueError("fleet config must declare at least one device")
+
+    devices: list[Dict[str, Any]] = []
+    seen: set[str] = set()
+    for entry in entries:
+        for device_cfg in _expand_entry(entry):
+            merged = _deep_merge(defaults, device_cfg)
+            device_id = str(merged["device_id"])
+            if device_id in seen:
+                raise ValueError(f"duplicate device_id in fleet config: {device_id}")
+            seen.add(device_id)
+            merged["device_id"] = device_id
+            mqtt_cfg = merged.setdefault("mqtt", {})
+            mqtt_cfg.setdefault("base_topic", template.format(device_id=device_id))
+            devices.append(merged)
+    return devices
+
+
+def _expand_entry(entry: Mapping[str, Any]) -> Iterator[Dict[str, Any]]:
+    if "device_id" not in entry:
+        raise ValueError(f"fleet device entry missing device_id: {entry!r}")
+    count = entry.get("count")
+    if count is None:
+        yield {key: value for key, value in entry.items() if key != "count"}
+        return
+    start = int(entry.get("start_index", 1))
+    for index in range(start, start + int(count)):
+        item = {key: value for key, value in entry.items() if key not in {"count", "start_index"}}
+        item["device_id"] = str(entry["device_id"]).format(index=index)
+        yield item
+
+
+def _deep_merge(base: Mapping[str, Any], override: Mapping[str, Any]) -> Dict[str, Any]:
+    merged: Dict[str, Any] = copy.deepcopy(dict(base))
+    for key, value in override.items():
+        if isinstance(value, Mapping) and isinstance(merged.get(key), Mapping):
+            merged[key] = _deep_merge(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+@dataclass(slots=True)
+class FleetDevice:
+    device_id: str
+    base_topic: str
+    runtime: DeviceTestBoxRuntime
+
+
+class DeviceTestBoxFleet:
+    """A set of TestBox actors sharing one telemetry queue."""
+
+    def __init__(
+        self,
+        devices: list[FleetDevice],
+        telemetry_queue: TelemetryQueue,
+        executor: DriverExecutor | None = None,
+    ) -> None:
+        self._devices = {device.device_id: device for device in devices}
+        self._telemetry_queue = telemetry_queue
+        self._executor = executor
+        self._tasks: list[asyncio.Task[None]] = []
+
+    @property
+    def telemetry_queue(self) -> TelemetryQueue:
+        return self._telemetry_queue
+
+    @property
+    def devices(self) -> list[FleetDevice]:
+        return list(self._devices.values())
+
+    def __len__(self) -> int:
+        return len(self._devices)
+
+    def __getitem__(self, device_id: str) -> FleetDevice:
+        return self._devices[device_id]
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        loop = asyncio.get_running_loop()
+        self._tasks = [
+            loop.create_task(device.runtime.actor.run(), name=f"testbox-actor-{device.device_id}")
+            for device in self._devices.values()
+        ]
+
+    async def stop(self) -> None:
+        for device in self._devices.values():
+            device.runtime.actor.stop()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+
+def create_fleet(config: Mapping[str, Any]) -> DeviceTestBoxFleet:
+    """Build one actor + command queue per device around a shared telemetry queue.
+
+    阻塞型驱动共享一个有界线程池，大小由 ``fleet.driver_threads`` 配置（默认 8）；
+    共享遥测队列的容量与溢出策略取自 ``fleet.queues.telemetry``。
+    """
+
+    fleet_cfg: Mapping[str, Any] = config.get("fleet") or config
+    telemetry_queue = TelemetryQueue(**build_queue_kwargs((fleet_cfg.get("queues") or {}).get("telemetry")))
+    executor = DriverExecutor(max_workers=int(fleet_cfg.get("driver_threads", 8)))
+    devices = [
+        FleetDevice(
+            device_id=device_cfg["device_id"],
+            base_topic=device_cfg["mqtt"]["base_topic"].rstrip("/"),
+            runtime=create_actor(device_cfg, telemetry_queue=telemetry_queue, executor=executor),
+        )
+        for device_cfg in load_fleet_devices(config)
+    ]
+    return DeviceTestBoxFleet(devices, telemetry_queue, executor)
+
+
+class FleetMQTTHost:
+    """Wire a fleet to a single MQTT client.
+
+    每台设备仅保留一个命令处理器与状态影子；命令处理器登记在共享的 ``TopicRouter``
+    上，整个机群只向 broker 订阅 ``.../+/cmd/run_diagnostic`` 一次；遥测由一个共享的
+    ``MQTTTelemetryAdapter`` 按 ``device_id`` 路由发布。
+    """
+
+    def __init__(
+        self,
+        *,
+        client: MQTTClient,
+        loop: asyncio.AbstractEventLoop,
+        fleet: DeviceTestBoxFleet,
+        batching: TelemetryBatchConfig | None = None,
+        codecs: CodecRegistry | None = None,
+        shadow_policy: ShadowPublishPolicy | None = None,
+        spool: SpoolConfig | None = None,
+    ) -> None:
+        self._fleet = fleet
+        self._client = client
+        self._router = TopicRouter()
+        codecs = codecs or build_registry()
+        self._command_adapters = [
+            MQTTCommandAdapter(
+                client=client,
+                loop=loop,
+                command_queue=device.runtime.command_queue,
+                topic_layout=CommandTopicLayout(base_topic=device.base_topic),
+                codecs=codecs,
+                router=self._router,
+            )
+            for device in fleet.devices
+        ]
+        routes = {
+            device.device_id: TelemetryRoute(
+                topic_layout=TelemetryTopicLayout(base_topic=device.base_topic),
+                state_publisher=StateShadowPublisher(
+                    client=client,
+                    device_id=device.device_id,
+                    topic_layout=StateTopicLayout(base_topic=device.base_topic),
+                    codecs=codecs,
+                    policy=shadow_policy,
+                    clock=device.runtime.clock,
+                ),
+            )
+            for device in fleet.devices
+        }
+        self._telemetry_adapter = MQTTTelemetryAdapter(
+            client=client,
+            telemetry_queue=fleet.telemetry_queue,
+            routes=routes,
+            batching=batching,
+            codecs=codecs,
+            spool=spool,
+        )
+
+    @property
+    def fleet(self) -> DeviceTestBoxFleet:
+        return self._fleet
+
+    @property
+    def telemetry_adapter(self) -> MQTTTelemetryAdapter:
+        return self._telemetry_adapter
+
+    @property
+    def router(self) -> TopicRouter:
+        return self._router
+
+    def start(self) -> None:
+        for adapter in self._command_adapters:
+            adapter.start()
+        self._router.attach(self._client, qos=1)
+        self._telemetry_adapter.start()
+        self._fleet.start()
+        logger.info("Fleet host started with %d devices", len(self._fleet))
+
+    async def stop(self) -> None:
+        self._router.detach()
+        for adapter in self._command_adapters:
+            await adapter.stop()
+        await self._fleet.stop()
+        await self._telemetry_adapter.stop()
+
+
+__all__ = [
+    "DEFAULT_BASE_TOPIC_TEMPLATE",
+    "DeviceTestBoxFleet",
+    "FleetDevice",
+    "FleetMQTTHost",
+    "create_fleet",
+    "load_fleet_devices",
+]
@@ -8,6 +8,9 @@ import logging
 from dataclasses import dataclass
 from typing import Any, Callable, Optional
 
+from core.bus import publisher_for
+from core.clock import Clock, RealClock
+
 logger = logging.getLogger(__name__)
 
 
@@ -38,7 +41,10 @@ class HeartbeatConfig:
 
 
 class HeartbeatPublisher:
-    """Periodic heartbeat publisher using asyncio."""
+    """Periodic heartbeat publisher using asyncio.
+
+    发布间隔按注入的 ``clock`` 计时，测试中配合 ``VirtualClock`` 可瞬间推进多个周期。
+    """
 
     def __init__(
         self,
@@ -47,11 +53,14 @@ class HeartbeatPublisher:
         loop: asyncio.AbstractEventLoop,
         config: HeartbeatConfig,
         payload_factory: Optional[Callable[[], dict[str, Any]]] = None,
+        clock: Clock | None = None,
     ) -> None:
-        self._client = client
+        # paho 客户端或 core.bus.MessageBus（后者返回确认 Future，不阻塞）
+        self._send = publisher_for(client)
         self._loop = loop
         self._config = config
         self._payload_factory = payload_factory
+        self._clock = clock or RealClock()
         self._task: asyncio.Task[None] | None = None
         self._stopped = asyncio.Event()
 
@@ -73,12 +82,27 @@ class HeartbeatPublisher:
         finally:
             self._task = None
 
+    def rearm(self) -> None:
+        """Publish immediately and restart the interval; safe to call from paho's network thread.
+
+        重连后 broker 上保留的可能仍是遗嘱的 offline 状态，立即补发一次心跳将其覆盖，
+        而不是等到下一个周期。
+        """
+
+        self._loop.call_soon_threadsafe(self._restart)
+
+    def _restart(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        self._task = self._loop.create_task(self._run())
+
     async def _run(self) -> None:
         interval = max(0.1, float(self._config.interval))
         while not self._stopped.is_set():
             payload = self._build_payload()
             try:
-                self._client.publish(
+                self._send(
                     self._config.topic,
                     json.dumps(payload),
                     qos=self._config.qos,
@@ -86,7 +110,7 @@ class HeartbeatPublisher:
                 )
             except Exception as exc:  # noqa: BLE001
                 logger.warning("Heartbeat publish failed: %s", exc)
-            await asyncio.sleep(interval)
+            await self._clock.sleep(interval)
 
     def _build_payload(self) -> dict[str, Any]:
         if self._payload_factory is not None:
@@ -106,15 +106,24 @@ async def run_mqtt_async(config: Dict[str, Any] | None = None) -> None:
     """MQTT service mode that keeps the actor alive for command handling."""
 
     try:
-        import paho.mqtt.client as mqtt  # type: ignore
+        import paho.mqtt.client  # type: ignore  # noqa: F401
     except ImportError as exc:  # noqa: F401
         raise RuntimeError(
             "paho-mqtt 未安装，无法启动 MQTT 模式。请运行 'uv pip install paho-mqtt' 或启用项目依赖。"
         ) from exc
 
+    from core.bus import build_bus
+    from core.clock import RealClock
+    from core.codecs import build_registry
+    from core.spool import SpoolConfig
+
     from ..drivers.command_adapter import CommandTopicLayout, MQTTCommandAdapter
-    from ..drivers.state_adapter import StateShadowPublisher, StateTopicLayout
-    from ..drivers.telemetry_adapter import MQTTTelemetryAdapter, TelemetryTopicLayout
+    from ..drivers.state_adapter import ShadowPublishPolicy, StateShadowPublisher, StateTopicLayout
+    from ..drivers.telemetry_adapter import (
+        MQTTTelemetryAdapter,
+        TelemetryBatchConfig,
+        TelemetryTopicLayout,
+    )
 
     cfg = config.copy() if config else {}
     runtime = create_actor(cfg)
@@ -123,37 +132,38 @@ async def run_mqtt_async(config: Dict[str, Any] | None = None) -> None:
     mqtt_cfg = cfg.get("mqtt", {})
     host = mqtt_cfg.get("host", "localhost")
     port = int(mqtt_cfg.get("port", 1883))
-    keepalive = int(mqtt_cfg.get("keepalive", 60))
-    username = mqtt_cfg.get("username")
-    password = mqtt_cfg.get("password")
     base_topic = mqtt_cfg.get("base_topic", _default_base_topic(device_id)).rstrip("/")
     client_id = mqtt_cfg.get("client_id") or f"ylabcore-testbox-{device_id}"
 
-    client = mqtt.Client(client_id=client_id, clean_session=True)
-    if username:
-        client.username_pw_set(username, password)
-
-    LOGGER.info("Connecting MQTT broker %s:%s", host, port)
-    client.connect(host, port, keepalive)
-    client.loop_start()
+    # 全部适配器共用一条 PahoMessageBus：网络线程的消息与确认经总线的 LoopBridge 回到事件循环；
+    # protocol: "5" 时总线为高频遥测分配主题别名，断线后按 mqtt.reconnect 退避重连并批量恢复订阅
+    bus = build_bus({**mqtt_cfg, "type": "mqtt", "client_id": client_id})
 
     loop = asyncio.get_running_loop()
+    codecs = build_registry(mqtt_cfg.get("codecs"))
     command_adapter = MQTTCommandAdapter(
-        client=client,
+        client=bus,
         loop=loop,
         command_queue=runtime.command_queue,
         topic_layout=CommandTopicLayout(base_topic=base_topic),
+        codecs=codecs,
     )
     state_publisher = StateShadowPublisher(
-        client=client,
+        client=bus,
         device_id=device_id,
         topic_layout=StateTopicLayout(base_topic=base_topic),
+        codecs=codecs,
+        policy=ShadowPublishPolicy.from_mapping(mqtt_cfg.get("state")),
+        clock=runtime.clock,
     )
     telemetry_adapter = MQTTTelemetryAdapter(
-        client=client,
+        client=bus,
         telemetry_queue=runtime.telemetry_queue,
         topic_layout=TelemetryTopicLayout(base_topic=base_topic),
         state_publisher=state_publisher,
+        batching=TelemetryBatchConfig.from_mapping(mqtt_cfg.get("telemetry")),
+        codecs=codecs,
+        spool=SpoolConfig.from_mapping(mqtt_cfg.get("spool")),
     )
 
     heartbeat_config, heartbeat_will = _build_heartbeat_config(
@@ -165,19 +175,29 @@ async def run_mqtt_async(config: Dict[str, Any] | None = None) -> None:
 
     if heartbeat_config is not None:
         configure_last_will(
-            client,
+            bus.client,
             topic=heartbeat_config.topic,
             payload=heartbeat_will,
             qos=heartbeat_config.qos,
             retain=heartbeat_config.retain,
         )
+
+    LOGGER.info("Connecting MQTT broker %s:%s (MQTT %s)", host, port, bus.settings.protocol)
+    # 不等待 CONNACK：broker 暂不可用时服务照常启动，订阅在连上后统一发出
+    await bus.connect(wait=False)
+
+    if heartbeat_config is not None:
         heartbeat_publisher = HeartbeatPublisher(
-            client=client,
+            client=bus,
             loop=loop,
             config=heartbeat_config,
             payload_factory=lambda: _heartbeat_payload(device_id, heartbeat_config.payload),
+            # 心跳与 broker 的 keepalive/遗嘱判定同属墙钟语义：driver.clock 为 scaled/virtual 时
+            # 仍按真实秒发布，否则 virtual 时钟下心跳永不触发、scaled 时钟下刷屏
+            clock=RealClock(),
         )
         heartbeat_publisher.start()
+        bus.connection.add_connect_hook(heartbeat_publisher.rearm)
 
     command_adapter.start()
     telemetry_adapter.start()
@@ -188,7 +208,7 @@ async def run_mqtt_async(config: Dict[str, Any] | None = None) -> None:
         await asyncio.Future()
     finally:
         LOGGER.info("Shutting down TestBox MQTT service")
-        command_adapter.stop()
+        await command_adapter.stop()
         await telemetry_adapter.stop()
         if heartbeat_publisher is not None:
             await heartbeat_publisher.stop()
@@ -198,8 +218,7 @@ async def run_mqtt_async(config: Dict[str, Any] | None = None) -> None:
             await actor_task
         except asyncio.CancelledError:
             pass
-        client.loop_stop()
-        client.disconnect()
+        await bus.close()
 
 
 def run_mqtt(config: Dict[str, Any] | None = None) -> None:
@@ -209,22 +228,129 @@ def run_mqtt(config: Dict[str, Any] | None = None) -> None:
         LOGGER.info("TestBox MQTT service interrupted")
 
 
+async def run_host_async(config: Dict[str, Any] | None = None) -> None:
+    """Fleet host mode: many TestBox actors behind one shared MQTT connection."""
+
+    try:
+        import paho.mqtt.client  # type: ignore  # noqa: F401
+    except ImportError as exc:  # noqa: F401
+        raise RuntimeError(
+            "paho-mqtt 未安装，无法启动 MQTT 模式。请运行 'uv pip install paho-mqtt' 或启用项目依赖。"
+        ) from exc
+
+    from core.bus import build_bus
+    from core.codecs import build_registry
+    from core.spool import SpoolConfig
+
+    from ..drivers.state_adapter import ShadowPublishPolicy
+    from ..drivers.telemetry_adapter import TelemetryBatchConfig
+    from .fleet import FleetMQTTHost, create_fleet
+
+    cfg = config.copy() if config else {}
+    fleet = create_fleet(cfg)
+    fleet_cfg = cfg.get("fleet") or cfg
+    host_id = str(fleet_cfg.get("host_id") or f"host-{os.getpid()}")
+
+    mqtt_cfg = fleet_cfg.get("mqtt") or (fleet_cfg.get("defaults") or {}).get("mqtt") or {}
+    host = mqtt_cfg.get("host", "localhost")
+    port = int(mqtt_cfg.get("port", 1883))
+    client_id = mqtt_cfg.get("client_id") or f"ylabcore-testbox-host-{host_id}"
+
+    # 与 run_mqtt_async 相同：一条 PahoMessageBus 承载全部设备，断线后退避重连并批量恢复订阅
+    bus = build_bus({**mqtt_cfg, "type": "mqtt", "client_id": client_id})
+
+    # 共享连接只能挂一条遗嘱，因此心跳/LWT 以 host 为粒度发布，payload 中列出托管设备。
+    host_topic = mqtt_cfg.get("host_topic", f"lab/local/line/device_testbox/_hosts/{host_id}")
+    heartbeat_config, heartbeat_will = _build_heartbeat_config(
+        device_id=host_id,
+        base_topic=host_topic.rstrip("/"),
+        mqtt_cfg=mqtt_cfg,
+    )
+    device_ids = [device.device_id for device in fleet.devices]
+    if heartbeat_config is not None:
+        heartbeat_will["devices"] = device_ids
+        configure_last_will(
+            bus.client,
+            topic=heartbeat_config.topic,
+            payload=heartbeat_will,
+            qos=heartbeat_config.qos,
+            retain=heartbeat_config.retain,
+        )
+
+    LOGGER.info(
+        "Connecting MQTT broker %s:%s for %d devices (MQTT %s)", host, port, len(fleet), bus.settings.protocol
+    )
+    await bus.connect(wait=False)
+
+    loop = asyncio.get_running_loop()
+    fleet_host = FleetMQTTHost(
+        client=bus,
+        loop=loop,
+        fleet=fleet,
+        batching=TelemetryBatchConfig.from_mapping(mqtt_cfg.get("telemetry")),
+        codecs=build_registry(mqtt_cfg.get("codecs")),
+        shadow_policy=ShadowPublishPolicy.from_mapping(mqtt_cfg.get("state")),
+        spool=SpoolConfig.from_mapping(mqtt_cfg.get("spool")),
+    )
+    heartbeat_publisher: HeartbeatPublisher | None = None
+    if heartbeat_config is not None:
+        heartbeat_publisher = HeartbeatPublisher(
+            client=bus,
+            loop=loop,
+            config=heartbeat_config,
+            payload_factory=lambda: {
+                **_heartbeat_payload(host_id, heartbeat_config.payload),
+                "devices": device_ids,
+            },
+        )
+        heartbeat_publisher.start()
+        bus.connection.add_connect_hook(heartbeat_publisher.rearm)
+
+    fleet_host.start()
+    try:
+        await asyncio.Future()
+    finally:
+        LOGGER.info("Shutting down TestBox fleet host")
+        await fleet_host.stop()
+        if heartbeat_publisher is not None:
+            await heartbeat_publisher.stop()
+        await bus.close()
+
+
+def run_host(config: Dict[str, Any] | None = None) -> None:
+    try:
+        asyncio.run(run_host_async(config))
+    except KeyboardInterrupt:
+        LOGGER.info("TestBox fleet host interrupted")
+
+
 def _build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Device TestBox service")
     parser.add_argument(
         "--mode",
-        choices=["demo", "mqtt"],
+        choices=["demo", "mqtt", "host", "fleet"],
         default="demo",
-        help="运行模式：demo 输出一次诊断，mqtt 挂载到 broker",
+        help="运行模式：demo 输出一次诊断，mqtt 挂载到 broker，host 在单进程内托管设备清单，fleet 运行容量模拟",
     )
     parser.add_argument(
         "--config",
         default=os.path.join(os.path.dirname(__file__), "../configs/device_testbox.yaml"),
         help="配置文件路径，默认为模块内 device_testbox.yaml",
     )
+    sim = parser.add_argument_group("fleet 模拟（覆盖配置中的 simulator 段）")
+    sim.add_argument("--devices", type=int, help="模拟设备数量")
+    sim.add_argument("--rate", type=float, dest="rate_hz", help="目标命令速率（条/秒）")
+    sim.add_argument("--duration", type=float, dest="duration_s", help="施压时长（秒）")
+    sim.add_argument("--transport", choices=["memory", "mqtt"], help="memory 为进程内回环，mqtt 连接 broker")
+    sim.add_argument("--clock-speed", type=float, dest="clock_speed", help="模拟秒/真实秒")
     return parser
 
 
+def _sim_overrides(args: argparse.Namespace) -> Dict[str, Any]:
+    keys = ("devices", "rate_hz", "duration_s", "transport", "clock_speed")
+    return {key: getattr(args, key) for key in keys if getattr(args, key) is not None}
+
+
 def _load_config(path: str | None) -> Dict[str, Any] | None:
     if not path:
         return None
@@ -254,10 +380,16 @@ if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
     args = _build_parser().parse_args()
     cfg = _load_config(args.config)
-    # 自动提取 device_testbox 子项
-    if cfg and "device_testbox" in cfg:
+    # 自动提取 device_testbox 子项（host/fleet 模式需要完整的设备清单）
+    if cfg and "device_testbox" in cfg and args.mode not in {"host", "fleet"}:
         cfg = cfg["device_testbox"]
-    if args.mode == "mqtt":
+    if args.mode == "host":
+        run_host(cfg)
+    elif args.mode == "fleet":
+        from .simulator import run_fleet_sim
+
+        run_fleet_sim(cfg, overrides=_sim_overrides(args))
+    elif args.mode == "mqtt":
         run_mqtt(cfg)
     else:
         run(cfg)
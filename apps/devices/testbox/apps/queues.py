@@ -3,7 +3,9 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Union
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Generic, Hashable, Mapping, TypeVar, Union
 
 from ..domain.models import (
     DeviceTestBoxDoneEvent,
@@ -11,6 +13,7 @@ from ..domain.models import (
     DeviceTestBoxRunCommand,
     DeviceTestBoxSensorSnapshot,
 )
+from core.clock import Clock, RealClock
 from core.domain.shared.models import ErrorEvent
 
 TelemetryMessage = Union[
@@ -20,31 +23,205 @@ TelemetryMessage = Union[
     ErrorEvent,
 ]
 
+T = TypeVar("T")
 
-class CommandQueue(asyncio.Queue[DeviceTestBoxRunCommand]):
+
+class OverflowPolicy(str, Enum):
+    """What to do with a message when the queue is full."""
+
+    BLOCK = "block"
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    COALESCE_LATEST = "coalesce_latest"
+
+
+@dataclass(slots=True)
+class QueueStats:
+    enqueued: int = 0
+    blocked: int = 0
+    dropped_oldest: int = 0
+    dropped_newest: int = 0
+    coalesced: int = 0
+    high_watermark: int = 0
+
+
+class _Slot:
+    __slots__ = ("item", "key", "policy", "enqueued_at")
+
+    def __init__(self, item: Any, key: Hashable | None, policy: OverflowPolicy, enqueued_at: float) -> None:
+        self.item = item
+        self.key = key
+        self.policy = policy
+        self.enqueued_at = enqueued_at
+
+
+class _PolicyQueue(asyncio.Queue, Generic[T]):  # type: ignore[type-arg]
+    """Asyncio queue with a max size and per-kind overflow policies.
+
+    - ``block``：队列满时等待消费者腾出空间（asyncio.Queue 默认行为）；
+    - ``drop_oldest``：丢弃队列中最早的一条可丢弃消息（策略非 ``block``）后入队；
+    - ``drop_newest``：直接丢弃新消息；
+    - ``coalesce_latest``：队列满时，若同一合并键（如 ``corr_id``）已有消息在排队则原位
+      替换为最新值，不占额外容量；否则按 ``drop_oldest`` 处理。未满时照常入队，不合并。
+    每个元素入队时按 ``clock``（缺省 ``RealClock``）记录单调时间戳，出队后 ``last_wait_s``
+    给出等待时长，与 Actor 共用时钟时以模拟秒计。
+    ``maxsize=0`` 且全部为 ``block`` 时与原先的无界队列行为一致。
+    """
+
+    last_wait_s: float = 0.0
+
+    def __init__(
+        self,
+        maxsize: int = 0,
+        *,
+        policy: OverflowPolicy | str = OverflowPolicy.BLOCK,
+        policies: Mapping[str, OverflowPolicy | str] | None = None,
+        clock: Clock | None = None,
+    ) -> None:
+        self.stats = QueueStats()
+        self._monotonic = (clock or RealClock()).monotonic
+        self._default_policy = OverflowPolicy(policy)
+        self._policies = {kind: OverflowPolicy(value) for kind, value in (policies or {}).items()}
+        self._pending: dict[Hashable, _Slot] = {}
+        super().__init__(maxsize)
+
+    def _kind(self, item: Any) -> str | None:
+        return None
+
+    def _coalesce_key(self, item: Any) -> Hashable | None:
+        return None
+
+    def policy_for(self, item: Any) -> OverflowPolicy:
+        if self._policies:
+            kind = self._kind(item)
+            if kind is not None:
+                return self._policies.get(kind, self._default_policy)
+        return self._default_policy
+
+    def _put(self, item: Any) -> None:
+        policy = self.policy_for(item)
+        key = self._coalesce_key(item) if policy is OverflowPolicy.COALESCE_LATEST else None
+        slot = _Slot(item, key, policy, self._monotonic())
+        self._queue.append(slot)
+        if key is not None:
+            self._pending[key] = slot
+        stats = self.stats
+        stats.enqueued += 1
+        if len(self._queue) > stats.high_watermark:
+            stats.high_watermark = len(self._queue)
+
+    def _get(self) -> Any:
+        slot: _Slot = self._queue.popleft()
+        if slot.key is not None and self._pending.get(slot.key) is slot:
+            del self._pending[slot.key]
+        self.last_wait_s = self._monotonic() - slot.enqueued_at
+        return slot.item
+
+    def offer_nowait(self, item: T) -> bool:
+        """Apply the overflow policy without waiting.
+
+        返回值同 :meth:`offer`；若该消息按 ``block`` 策略必须等待空位，则抛出
+        ``asyncio.QueueFull``，由调用方决定如何排队等待。
+        """
+
+        policy = self.policy_for(item)
+        if self.full():
+            if policy is OverflowPolicy.COALESCE_LATEST:
+                slot = self._pending.get(self._coalesce_key(item))
+                if slot is not None:
+                    slot.item = item
+                    self.stats.coalesced += 1
+                    return True
+            if policy is OverflowPolicy.DROP_NEWEST:
+                self.stats.dropped_newest += 1
+                return False
+            if policy is OverflowPolicy.BLOCK or not self._evict_oldest():
+                raise asyncio.QueueFull
+        self.put_nowait(item)
+        return True
+
+    async def offer(self, item: T) -> bool:
+        """Enqueue ``item`` according to its overflow policy.
+
+        返回 False 表示消息被丢弃（``drop_newest``）；合并视为成功入队。
+        """
+
+        try:
+            return self.offer_nowait(item)
+        except asyncio.QueueFull:
+            self.stats.blocked += 1
+            await self.put(item)
+            return True
+
+    def _evict_oldest(self) -> bool:
+        for slot in self._queue:
+            if slot.policy is OverflowPolicy.BLOCK:
+                continue
+            self._queue.remove(slot)
+            if slot.key is not None and self._pending.get(slot.key) is slot:
+                del self._pending[slot.key]
+            self.stats.dropped_oldest += 1
+            self.task_done()
+            return True
+        return False
+
+
+class CommandQueue(_PolicyQueue[DeviceTestBoxRunCommand]):
     """Asyncio queue tailored for device commands."""
 
     async def put_command(self, command: DeviceTestBoxRunCommand) -> None:
-        await self.put(command)
+        await self.offer(command)
 
     async def get_command(self) -> DeviceTestBoxRunCommand:
         command = await self.get()
         return command
 
 
-class TelemetryQueue(asyncio.Queue[TelemetryMessage]):
-    """Asyncio queue buffering telemetry, progress, and error events."""
+_TELEMETRY_KINDS: dict[type, str] = {
+    DeviceTestBoxProgressEvent: "progress",
+    DeviceTestBoxDoneEvent: "done",
+    DeviceTestBoxSensorSnapshot: "sensor_snapshot",
+    ErrorEvent: "error",
+}
+
+
+class TelemetryQueue(_PolicyQueue[TelemetryMessage]):
+    """Asyncio queue buffering telemetry, progress, and error events.
+
+    ``policies`` 的键为消息类别：``progress``、``done``、``sensor_snapshot``、``error``；
+    合并键为 ``(类别, device_id, corr_id)``。
+    """
+
+    def _kind(self, item: Any) -> str | None:
+        return _TELEMETRY_KINDS.get(type(item))
+
+    def _coalesce_key(self, item: Any) -> Hashable | None:
+        return (type(item), getattr(item, "device_id", None), getattr(item, "corr_id", None))
 
     async def put_telemetry(self, message: TelemetryMessage) -> None:
-        await self.put(message)
+        await self.offer(message)
 
     async def get_telemetry(self) -> TelemetryMessage:
         message = await self.get()
         return message
 
 
+def build_queue_kwargs(cfg: Mapping[str, Any] | None) -> dict[str, Any]:
+    """Translate a ``queues.command``/``queues.telemetry`` config section into kwargs."""
+
+    cfg = cfg or {}
+    return {
+        "maxsize": int(cfg.get("maxsize", 0)),
+        "policy": cfg.get("policy", OverflowPolicy.BLOCK),
+        "policies": dict(cfg.get("policies") or {}),
+    }
+
+
 __all__ = [
     "CommandQueue",
+    "OverflowPolicy",
+    "QueueStats",
     "TelemetryMessage",
     "TelemetryQueue",
+    "build_queue_kwargs",
 ]
@@ -0,0 +1,444 @@
+"""Fleet simulator: N fake TestBoxes plus a load generator in one process."""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import json
+import logging
+import math
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Mapping, Sequence
+
+from ..drivers.command_adapter import CommandTopicLayout
+from ..drivers.state_adapter import ShadowPublishPolicy
+from ..drivers.telemetry_adapter import TelemetryBatchConfig, TelemetryTopicLayout
+from .fleet import DeviceTestBoxFleet, FleetMQTTHost, create_fleet
+from core.bus import InMemoryBroker, InMemoryBus, MessageBus, build_bus
+from core.codecs import build_registry
+from core.mqtt_v5 import MQTTv5Settings, command_expiry_interval
+from core.topics import TopicAddress, TopicRouter
+
+logger = logging.getLogger(__name__)
+
+
+def _as_range(value: Any, default: tuple[float, float]) -> tuple[float, float]:
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return float(value), float(value)
+    low, high = (float(item) for item in value)
+    return min(low, high), max(low, high)
+
+
+@dataclass(slots=True)
+class FleetSimConfig:
+    """Simulator knobs (``simulator`` section, CLI flags override).
+
+    每台模拟设备的 ``default_duration_s`` 与 ``failure_rate`` 在给定区间内均匀抽样，
+    ``sensor_rate_hz``（模拟秒下的采样率）从候选列表中抽取；``clock_speed`` 为模拟秒/真实秒，默认 1000
+    使 45–300 s 的诊断在 45–300 ms 内完成。``transport`` 为 ``memory``（进程内
+    ``InMemoryBroker``）或 ``mqtt``（经 ``PahoMessageBus`` 连接 ``mqtt`` 段配置的 broker）。
+    """
+
+    devices: int = 20
+    rate_hz: float = 50.0
+    duration_s: float = 10.0
+    transport: str = "memory"
+    seed: int = 1
+    clock_speed: float = 1000.0
+    duration_range_s: tuple[float, float] = (45.0, 300.0)
+    failure_rate_range: tuple[float, float] = (0.0, 0.05)
+    sensor_rates_hz: tuple[float, ...] = (0.0,)
+    report_interval_s: float = 1.0
+    drain_timeout_s: float = 10.0
+
+    @classmethod
+    def from_mapping(cls, cfg: Mapping[str, Any] | None) -> "FleetSimConfig":
+        cfg = cfg or {}
+        defaults = cls()
+        drivers = cfg.get("drivers") or {}
+        transport = str(cfg.get("transport", defaults.transport)).lower()
+        if transport not in {"memory", "mqtt"}:
+            raise ValueError(f"Unsupported simulator transport: {transport}")
+        return cls(
+            devices=max(1, int(cfg.get("devices", defaults.devices))),
+            rate_hz=max(0.0, float(cfg.get("rate_hz", defaults.rate_hz))),
+            duration_s=max(0.0, float(cfg.get("duration_s", defaults.duration_s))),
+            transport=transport,
+            seed=int(cfg.get("seed", defaults.seed)),
+            clock_speed=max(1e-3, float(cfg.get("clock_speed", defaults.clock_speed))),
+            duration_range_s=_as_range(drivers.get("duration_s"), defaults.duration_range_s),
+            failure_rate_range=_as_range(drivers.get("failure_rate"), defaults.failure_rate_range),
+            sensor_rates_hz=tuple(float(rate) for rate in (drivers.get("sensor_rate_hz") or defaults.sensor_rates_hz)),
+            report_interval_s=max(0.05, float(cfg.get("report_interval_s", defaults.report_interval_s))),
+            drain_timeout_s=max(0.0, float(cfg.get("drain_timeout_s", defaults.drain_timeout_s))),
+        )
+
+
+def build_sim_fleet_config(config: Mapping[str, Any], sim: FleetSimConfig) -> Dict[str, Any]:
+    """Generate a ``create_fleet`` config with ``sim.devices`` varied fake drivers.
+
+    ``fleet`` 段中的 ``defaults``/``queues``/``base_topic_template`` 等保持生效，
+    设备清单则替换为 ``SIM-0001`` 起的模拟设备。
+    """
+
+    fleet_cfg: Dict[str, Any] = copy.deepcopy(dict(config.get("fleet") or config))
+    rng = random.Random(sim.seed)
+    devices = []
+    for index in range(1, sim.devices + 1):
+        sensor_rate = rng.choice(sim.sensor_rates_hz)
+        devices.append(
+            {
+                "device_id": f"SIM-{index:04d}",
+                "driver": {
+                    "type": "fake",
+                    "seed": sim.seed + index,
+                    "default_duration_s": round(rng.uniform(*sim.duration_range_s), 3),
+                    "failure_rate": rng.uniform(*sim.failure_rate_range),
+                    "sensors": {"rate_hz": sensor_rate},
+                },
+                "clock": {"mode": "scaled", "speed": sim.clock_speed},
+            }
+        )
+    fleet_cfg["devices"] = devices
+    fleet_cfg.pop("simulator", None)
+    return {"fleet": fleet_cfg}
+
+
+def read_rss_bytes() -> int:
+    """Current resident set size; falls back to peak RSS where /proc is unavailable."""
+
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as fp:
+            return int(fp.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - Windows
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 返回字节，Linux 返回 KiB
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+def _percentile(samples: Sequence[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+@dataclass(slots=True)
+class FleetSimReport:
+    devices: int
+    elapsed_s: float
+    sent: int = 0
+    completed: int = 0
+    passed: int = 0
+    failed: int = 0
+    errors: int = 0
+    #: 命令发布到 ``tele/done``/``evt/error`` 到达的端到端延迟（秒）
+    latencies_s: list[float] = field(default_factory=list)
+    max_command_depth: int = 0
+    max_telemetry_depth: int = 0
+    rss_bytes: int = 0
+    published: int = 0
+
+    @property
+    def commands_per_s(self) -> float:
+        return self.completed / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+    def latency(self, q: float) -> float:
+        return _percentile(self.latencies_s, q)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "devices": self.devices,
+            "elapsed_s": round(self.elapsed_s, 3),
+            "sent": self.sent,
+            "completed": self.completed,
+            "passed": self.passed,
+            "failed": self.failed,
+            "errors": self.errors,
+            "commands_per_s": round(self.commands_per_s, 1),
+            "latency_ms": {
+                "p50": round(self.latency(0.5) * 1000, 2),
+                "p95": round(self.latency(0.95) * 1000, 2),
+                "p99": round(self.latency(0.99) * 1000, 2),
+                "max": round(max(self.latencies_s, default=0.0) * 1000, 2),
+            },
+            "max_command_queue_depth": self.max_command_depth,
+            "max_telemetry_queue_depth": self.max_telemetry_depth,
+            "rss_mb": round(self.rss_bytes / 2**20, 1),
+            "published": self.published,
+        }
+
+
+class FleetLoadGenerator:
+    """Publish ``run_diagnostic`` commands at ``rate_hz`` and time them end to end.
+
+    目标设备按 seed 随机抽取，忙碌设备上的命令会在其命令队列中排队，因而队列深度
+    反映了该速率下的积压；完成与错误主题登记在一个 ``TopicRouter`` 上，只向总线
+    订阅两个通配符过滤器，回调已在事件循环中执行，直接记账。``command_expiry_s``
+    给定时命令携带 v5 消息过期，积压到过期仍未投递的命令由 broker 丢弃。
+    """
+
+    def __init__(
+        self,
+        *,
+        client: MessageBus,
+        loop: asyncio.AbstractEventLoop,
+        fleet: DeviceTestBoxFleet,
+        rate_hz: float,
+        seed: int = 1,
+        command_expiry_s: float | None = None,
+    ) -> None:
+        self._client = client
+        self._loop = loop
+        self._fleet = fleet
+        self.rate_hz = rate_hz
+        self._rng = random.Random(seed)
+        self._sent_at: Dict[str, float] = {}
+        self._sequence = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.report = FleetSimReport(devices=len(fleet), elapsed_s=0.0)
+        expiry = command_expiry_interval(None, command_expiry_s)
+        self._command_properties = {"message_expiry_interval": expiry} if expiry is not None else None
+        self._cmd_topics = {
+            device.device_id: CommandTopicLayout(base_topic=device.base_topic).run_diagnostic
+            for device in fleet.devices
+        }
+        self.router = TopicRouter()
+        for device in fleet.devices:
+            layout = TelemetryTopicLayout(base_topic=device.base_topic)
+            self.router.add(layout.for_done(), self._on_message)
+            self.router.add(layout.for_error(), self._on_message)
+
+    @property
+    def outstanding(self) -> int:
+        return len(self._sent_at)
+
+    def start(self) -> None:
+        self.router.attach(self._client, qos=1)
+
+    def stop(self) -> None:
+        self.router.detach()
+
+    def _on_message(self, address: TopicAddress, message: Any) -> None:
+        received_at = time.perf_counter()
+        try:
+            body = json.loads(message.payload)
+        except ValueError:
+            return
+        sent_at = self._sent_at.pop(str(body.get("corr_id")), None)
+        if sent_at is None:
+            return
+        report = self.report
+        report.completed += 1
+        report.latencies_s.append(received_at - sent_at)
+        if address.channel == "tele":
+            if body.get("result") == "PASS":
+                report.passed += 1
+            else:
+                report.failed += 1
+        else:
+            report.errors += 1
+        if not self._sent_at:
+            self._idle.set()
+
+    def send_one(self) -> None:
+        device = self._rng.choice(self._fleet.devices)
+        self._sequence += 1
+        corr_id = f"sim-{self._sequence:07d}"
+        payload = json.dumps({"corr_id": corr_id, "device_id": device.device_id, "params": None})
+        self._sent_at[corr_id] = time.perf_counter()
+        self._idle.clear()
+        self._client.publish_nowait(
+            self._cmd_topics[device.device_id], payload, qos=1, properties=self._command_properties
+        )
+        self.report.sent += 1
+
+    async def run(self, duration_s: float) -> None:
+        """Issue commands on a fixed schedule (no coordinated omission) for ``duration_s``."""
+
+        if self.rate_hz <= 0 or duration_s <= 0:
+            return
+        interval = 1.0 / self.rate_hz
+        started = time.perf_counter()
+        total = int(duration_s * self.rate_hz)
+        for index in range(total):
+            delay = started + index * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.send_one()
+
+    async def wait_drained(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
+def _sample_depths(fleet: DeviceTestBoxFleet, report: FleetSimReport) -> tuple[int, int]:
+    command_depth = max((device.runtime.command_queue.qsize() for device in fleet.devices), default=0)
+    telemetry_depth = fleet.telemetry_queue.qsize()
+    report.max_command_depth = max(
+        report.max_command_depth,
+        max((device.runtime.command_queue.stats.high_watermark for device in fleet.devices), default=0),
+    )
+    report.max_telemetry_depth = max(report.max_telemetry_depth, fleet.telemetry_queue.stats.high_watermark)
+    return command_depth, telemetry_depth
+
+
+async def _report_progress(
+    generator: FleetLoadGenerator,
+    fleet: DeviceTestBoxFleet,
+    interval: float,
+    started: float,
+) -> None:
+    last_completed = 0
+    while True:
+        await asyncio.sleep(interval)
+        report = generator.report
+        command_depth, telemetry_depth = _sample_depths(fleet, report)
+        completed = report.completed
+        logger.info(
+            "t=%.1fs sent=%d done=%d (%.0f cmd/s) outstanding=%d cmd_q_max=%d tele_q=%d rss=%.1f MiB",
+            time.perf_counter() - started,
+            report.sent,
+            completed,
+            (completed - last_completed) / interval,
+            generator.outstanding,
+            command_depth,
+            telemetry_depth,
+            read_rss_bytes() / 2**20,
+        )
+        last_completed = completed
+
+
+async def _connect_mqtt(mqtt_cfg: Mapping[str, Any], client_id: str) -> MessageBus:
+    try:
+        import paho.mqtt.client  # type: ignore  # noqa: F401
+    except ImportError as exc:
+        raise RuntimeError(
+            "paho-mqtt 未安装，无法以 mqtt 传输运行 fleet 模拟。请运行 'uv pip install paho-mqtt' 或改用 transport=memory。"
+        ) from exc
+
+    bus = build_bus({**mqtt_cfg, "type": "mqtt", "client_id": client_id})
+    logger.info(
+        "Connecting MQTT broker %s:%s for fleet simulation (MQTT %s)",
+        mqtt_cfg.get("host", "localhost"),
+        mqtt_cfg.get("port", 1883),
+        MQTTv5Settings.from_mapping(mqtt_cfg).protocol,
+    )
+    await bus.connect()
+    return bus
+
+
+async def run_fleet_sim_async(
+    config: Mapping[str, Any] | None = None,
+    *,
+    overrides: Mapping[str, Any] | None = None,
+    broker: InMemoryBroker | None = None,
+) -> FleetSimReport:
+    """Run the simulator and return its report.
+
+    ``overrides`` 覆盖 ``simulator`` 段中的同名键（CLI 参数）。设备侧与负载生成器各用一条
+    ``MessageBus``：``memory`` 传输下二者连到同一个 ``InMemoryBroker``（可由 ``broker`` 注入，
+    便于测试读取其计数），``mqtt`` 传输下各自连接 broker。
+    """
+
+    cfg: Mapping[str, Any] = config or {}
+    fleet_section: Mapping[str, Any] = cfg.get("fleet") or cfg
+    sim_cfg = {**(fleet_section.get("simulator") or cfg.get("simulator") or {}), **(overrides or {})}
+    sim = FleetSimConfig.from_mapping(sim_cfg)
+    mqtt_cfg = fleet_section.get("mqtt") or (fleet_section.get("defaults") or {}).get("mqtt") or {}
+    settings = MQTTv5Settings.from_mapping(mqtt_cfg)
+
+    fleet = create_fleet(build_sim_fleet_config(cfg, sim))
+    if sim.transport == "memory":
+        broker = broker or InMemoryBroker()
+        host_bus: MessageBus = InMemoryBus(broker, client_id="sim-host")
+        load_bus: MessageBus = InMemoryBus(broker, client_id="sim-load")
+    else:
+        client_id = mqtt_cfg.get("client_id") or f"ylabcore-testbox-sim-{os.getpid()}"
+        host_bus = await _connect_mqtt(mqtt_cfg, f"{client_id}-host")
+        load_bus = await _connect_mqtt(mqtt_cfg, f"{client_id}-load")
+    loop = asyncio.get_running_loop()
+    host = FleetMQTTHost(
+        client=host_bus,
+        loop=loop,
+        fleet=fleet,
+        batching=TelemetryBatchConfig.from_mapping(mqtt_cfg.get("telemetry")),
+        codecs=build_registry(mqtt_cfg.get("codecs")),
+        shadow_policy=ShadowPublishPolicy.from_mapping(mqtt_cfg.get("state")),
+    )
+    generator = FleetLoadGenerator(
+        client=load_bus,
+        loop=loop,
+        fleet=fleet,
+        rate_hz=sim.rate_hz,
+        seed=sim.seed,
+        command_expiry_s=settings.command_expiry_s if settings.enabled else None,
+    )
+    generator.start()
+    host.start()
+    logger.info(
+        "Fleet simulation: %d devices, %.1f cmd/s for %.1f s over %s transport",
+        sim.devices,
+        sim.rate_hz,
+        sim.duration_s,
+        sim.transport,
+    )
+
+    started = time.perf_counter()
+    reporter = loop.create_task(_report_progress(generator, fleet, sim.report_interval_s, started))
+    try:
+        await generator.run(sim.duration_s)
+        if not await generator.wait_drained(sim.drain_timeout_s):
+            logger.warning("%d commands still outstanding after drain timeout", generator.outstanding)
+    finally:
+        reporter.cancel()
+        await asyncio.gather(reporter, return_exceptions=True)
+        report = generator.report
+        report.elapsed_s = time.perf_counter() - started
+        _sample_depths(fleet, report)
+        report.rss_bytes = read_rss_bytes()
+        generator.stop()
+        await host.stop()
+        await load_bus.close()
+        await host_bus.close()
+    report.published = broker.published if broker is not None else 0
+    return report
+
+
+def run_fleet_sim(
+    config: Mapping[str, Any] | None = None,
+    *,
+    overrides: Mapping[str, Any] | None = None,
+) -> FleetSimReport:
+    try:
+        report = asyncio.run(run_fleet_sim_async(config, overrides=overrides))
+    except KeyboardInterrupt:
+        logger.info("Fleet simulation interrupted")
+        raise
+    print(json.dumps(report.as_dict(), ensure_ascii=False, indent=2))
+    return report
+
+
+__all__ = [
+    "FleetLoadGenerator",
+    "FleetSimConfig",
+    "FleetSimReport",
+    "build_sim_fleet_config",
+    "read_rss_bytes",
+    "run_fleet_sim",
+    "run_fleet_sim_async",
+]
@@ -6,7 +6,7 @@ from datetime import datetime, timezone
 from enum import Enum
 from typing import Any, Dict, Literal
 
-from pydantic import BaseModel, Field, model_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 
 def _default_params() -> "DeviceTestBoxRunParams":
@@ -36,6 +36,12 @@ class DeviceTestBoxRunCommand(BaseModel):
     params: DeviceTestBoxRunParams = Field(default_factory=_default_params)
     metadata: Dict[str, Any] | None = None
 
+    @field_validator("params", mode="before")
+    @classmethod
+    def _default_null_params(cls, value: Any) -> Any:
+        # 上游常发送 "params": null，与缺省等价，单次校验内直接补默认值
+        return _default_params() if value is None else value
+
 
 class DeviceTestBoxProgressEvent(BaseModel):
     event: Literal["testbox.diagnostic_progress"] = "testbox.diagnostic_progress"
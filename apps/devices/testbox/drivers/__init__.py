@@ -2,20 +2,40 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from random import Random
-from typing import Any, Callable, Dict, List, Mapping, MutableMapping, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Mapping, MutableMapping, Optional
 
-from ...driver_base import InstrumentDriver
-from ..parsers.scpi import build_command, parse_response
+from ...driver_base import BlockingRunner, DriverCapability, InstrumentDriver
+from ..parsers.scpi import ResponseParser, build_command
 from ..transport import SerialTransport
+from .sensors import SensorBlock, SensorSignalModel, SensorStreamConfig
+from core.clock import Clock, RealClock, ScaledClock
 
 logger = logging.getLogger(__name__)
 
 
 class DeviceTestBoxFakeDriver(InstrumentDriver):
-    """Virtual diagnostic driver that simulates staged execution."""
+    """Virtual diagnostic driver that simulates staged execution.
+
+    ``clock`` 为 ``core.clock.Clock``：给定时各阶段按该时钟的 ``elapsed_s`` 依次"完成"，
+    ``stream_progress`` 实时推送——``RealClock`` 按真实时长推进，``ScaledClock`` 按倍速，
+    ``VirtualClock`` 在毫秒内跑完且事件顺序不变。未给定时钟时沿用 ``time_scale``
+    （每个模拟秒对应的真实秒数）：默认 0 表示瞬时完成，0.01 等价于 ``ScaledClock(100)``。
+    ``sensors.rate_hz`` 大于 0 时，任务运行期间 ``stream_sensors`` 以该速率产出
+    向量化生成的多通道传感器数据块（按 ``clock`` 计时，与阶段进度同一时间轴）。
+    ``failure_rate`` 为单次诊断判定 FAIL 的概率，供容量测试模拟不良品。
+    """
+
+    blocking_io = False
+    capabilities = DriverCapability.PROGRESS | DriverCapability.RESULT | DriverCapability.SENSORS
 
     def __init__(
         self,
@@ -23,8 +43,23 @@ class DeviceTestBoxFakeDriver(InstrumentDriver):
         default_duration_s: float = 60.0,
         stages: List[str] | None = None,
         seed: int = 7,
+        time_scale: float = 0.0,
+        sensors: SensorStreamConfig | Mapping[str, Any] | None = None,
+        clock: Clock | None = None,
+        failure_rate: float = 0.0,
     ) -> None:
         self.default_duration_s = max(1.0, float(default_duration_s))
+        self.failure_rate = min(1.0, max(0.0, float(failure_rate)))
+        self.time_scale = max(0.0, float(time_scale))
+        if clock is None and self.time_scale > 0:
+            clock = ScaledClock(1.0 / self.time_scale)
+        self.clock = clock
+        self.sensor_config = (
+            sensors if isinstance(sensors, SensorStreamConfig) else SensorStreamConfig.from_mapping(sensors)
+        )
+        self._seed = seed
+        if self.sensor_config.rate_hz <= 0:
+            self.capabilities = DriverCapability.PROGRESS | DriverCapability.RESULT
         self._stages = stages or [
             "power_on_self_test",
             "sensor_calibration",
@@ -35,7 +70,11 @@ class DeviceTestBoxFakeDriver(InstrumentDriver):
         self._rng = Random(seed)
         self._busy = False
         self._last_started: datetime | None = None
+        self._started_monotonic = 0.0
+        self._run_id = 0
+        self._completes_after_s = 0.0
         self._last_progress: list[dict[str, Any]] = []
+        self._pending_result: dict[str, Any] | None = None
         self._last_result: dict[str, Any] | None = None
 
     def identify(self) -> Mapping[str, Any]:
@@ -51,10 +90,14 @@ class DeviceTestBoxFakeDriver(InstrumentDriver):
         self._run_diagnostic(dict(params))
 
     def _run_diagnostic(self, params: Dict[str, Any]) -> None:
+        self._advance()
         if self._busy:
             raise RuntimeError("diagnostic already in progress")
         self._busy = True
-        self._last_started = datetime.now(timezone.utc)
+        self._run_id += 1
+        clock = self.clock
+        self._last_started = clock.now() if clock is not None else datetime.now(timezone.utc)
+        self._started_monotonic = clock.monotonic() if clock is not None else time.monotonic()
         duration = float(params.get("duration_s") or self.default_duration_s)
         profile = params.get("profile") or "default"
         self._last_progress = []
@@ -70,18 +113,40 @@ class DeviceTestBoxFakeDriver(InstrumentDriver):
                     "message": f"{stage} completed",
                 }
             )
-        self._last_result = {
+        self._completes_after_s = max(duration, self._last_progress[-1]["elapsed_s"])
+        # 仅在配置了失败率时才额外抽样，保持既有 seed 下的阶段抖动序列不变
+        failed_stage = (
+            self._rng.choice(self._stages) if self.failure_rate > 0 and self._rng.random() < self.failure_rate else None
+        )
+        self._pending_result = {
             "duration_s": round(duration, 3),
             "profile": profile,
-            "passed": True,
-            "summary": "All diagnostics completed without anomalies.",
+            "passed": failed_stage is None,
+            "summary": (
+                "All diagnostics completed without anomalies."
+                if failed_stage is None
+                else f"Anomaly detected during {failed_stage}."
+            ),
         }
-        self._busy = False
+        self._last_result = None
+        self._advance()
+
+    def _simulated_elapsed(self) -> float:
+        if self.clock is None:
+            return float("inf")
+        return self.clock.monotonic() - self._started_monotonic
+
+    def _advance(self) -> None:
+        if self._busy and self._simulated_elapsed() >= self._completes_after_s:
+            self._busy = False
+            self._last_result = self._pending_result
 
     def abort(self) -> None:
         if self._busy:
             self._busy = False
+            self._run_id += 1
             self._last_progress = []
+            self._pending_result = None
             self._last_result = {
                 "duration_s": 0.0,
                 "profile": None,
@@ -90,17 +155,79 @@ class DeviceTestBoxFakeDriver(InstrumentDriver):
             }
 
     def is_busy(self) -> bool:
+        self._advance()
         return self._busy
 
     def last_started_at(self) -> datetime | None:
         return self._last_started
 
     def fetch_progress(self) -> List[dict[str, Any]]:
-        return list(self._last_progress)
+        self._advance()
+        elapsed = self._simulated_elapsed()
+        return [dict(record) for record in self._last_progress if record["elapsed_s"] <= elapsed]
 
     def fetch_result(self) -> dict[str, Any] | None:
+        self._advance()
         return dict(self._last_result) if self._last_result is not None else None
 
+    async def stream_progress(
+        self,
+        *,
+        run_blocking: BlockingRunner | None = None,
+        poll_interval: float = 0.1,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield each stage when its simulated ``elapsed_s`` is reached."""
+
+        clock = self.clock
+        run_id = self._run_id
+        started = self._started_monotonic
+        for record in list(self._last_progress):
+            if clock is not None:
+                delay = started + record["elapsed_s"] - clock.monotonic()
+                if delay > 0:
+                    await clock.sleep(delay)
+            if self._run_id != run_id:
+                return  # aborted mid-run
+            yield dict(record)
+        if clock is not None and self._busy:
+            remaining = started + self._completes_after_s - clock.monotonic()
+            if remaining > 0:
+                await clock.sleep(remaining)
+        self._advance()
+
+    async def stream_sensors(self, *, min_interval: float = 0.01) -> AsyncIterator[SensorBlock]:
+        """Yield blocks of sensor samples that fell due since the previous block.
+
+        时间取自注入的 ``clock``（未注入时为 ``RealClock``）：每个周期（``1/rate_hz`` 与
+        ``min_interval`` 取大者）按时钟上已流逝的时间补齐应产出的样本数，一次性向量化生成，
+        因此 scaled/virtual 时钟下样本数与模拟时长一致。``min_interval`` 按真实秒计，
+        对 ``ScaledClock`` 换算为模拟秒，避免高倍速下频繁唤醒。任务结束或被中止时迭代终止，
+        ``rate_hz`` 为 0 时立即结束。
+        """
+
+        config = self.sensor_config
+        if config.rate_hz <= 0:
+            return
+        clock = self.clock or RealClock()
+        run_id = self._run_id
+        model = SensorSignalModel(config, seed=self._seed + run_id)
+        speed = clock.speed if math.isfinite(clock.speed) else 1.0
+        interval = max(1.0 / config.rate_hz, min_interval * speed)
+        started = clock.monotonic()
+        while self._run_id == run_id and self.is_busy():
+            await clock.sleep(interval)
+            due = int((clock.monotonic() - started) * config.rate_hz) - model.emitted
+            if due > 0 and self._run_id == run_id:
+                yield model.sample(due)
+
+
+@dataclass(slots=True)
+class ReaderStats:
+    lines: int = 0
+    records: int = 0
+    #: 有界缓冲已满时被挤出的最早进度记录数
+    overflowed: int = 0
+
 
 class DeviceTestBoxRealDriver(InstrumentDriver):
     """Serial-backed driver that speaks a SCPI-like protocol.
@@ -108,7 +235,13 @@ class DeviceTestBoxRealDriver(InstrumentDriver):
     该实现聚焦基础读写：
     - 使用 `SerialTransport` 打开串口并发送 `TESTBOX:RUN` 指令；
     - 调用 `_poll()` 解析串口响应，记录进度与结果；
-    - 响应格式采用 ``TYPE:key=value`` 键值对约定，利用 `parse_response` 解析。
+    - 响应格式采用 ``TYPE:key=value`` 键值对约定，利用 `ResponseParser`（与 `parse_response` 输出一致）解析。
+
+    ``reader_thread=True`` 时改为后台读线程模式：任务启动后由专用线程持续读取、
+    解析并写入容量为 ``buffer_size`` 的有界 deque，每条记录在到达时打上单调时钟
+    时间戳（仪器未给出 ``elapsed_s`` 时据此计算）；``fetch_progress``/``fetch_result``
+    只读取缓冲区，不再占用调用方线程读串口。读线程在收到完成/错误记录、
+    ``abort()``、``close()`` 或串口关闭时退出。
     """
 
     def __init__(
@@ -116,15 +249,28 @@ class DeviceTestBoxRealDriver(InstrumentDriver):
         transport: Optional[SerialTransport] = None,
         *,
         command_builder: Callable[..., str] = build_command,
-        response_parser: Callable[[str], Mapping[str, Any]] = parse_response,
+        response_parser: Callable[[str], Mapping[str, Any]] | None = None,
+        reader_thread: bool = False,
+        buffer_size: int = 1024,
     ) -> None:
         self._transport = transport or SerialTransport()
         self._command_builder = command_builder
-        self._response_parser = response_parser
+        # 默认使用带转换缓存的增量解析器，输出与 parse_response 一致
+        self._response_parser = response_parser or ResponseParser().parse_line
         self._busy = False
         self._last_started: datetime | None = None
-        self._progress: list[dict[str, Any]] = []
+        self._started_monotonic = 0.0
+        self._reader_mode = reader_thread
+        self._progress: list[dict[str, Any]] | deque[dict[str, Any]] = (
+            deque(maxlen=max(1, buffer_size)) if reader_thread else []
+        )
+        self._ingested = 0
         self._result: dict[str, Any] | None = None
+        self._lock = threading.Lock()
+        self._reader: threading.Thread | None = None
+        self._reader_stop = threading.Event()
+        self._waker: tuple[asyncio.AbstractEventLoop, asyncio.Event] | None = None
+        self.reader_stats = ReaderStats()
 
     def identify(self) -> Mapping[str, Any]:
         return {
@@ -151,14 +297,20 @@ class DeviceTestBoxRealDriver(InstrumentDriver):
             self._render_duration(payload.get("duration_s")),
             payload.get("profile"),
         )
+        self._stop_reader()
         logger.info("Issuing diagnostic command: %s", command.strip())
         self._transport.write(command.encode("utf-8"))
         self._transport.flush()
 
-        self._busy = True
-        self._last_started = datetime.now(timezone.utc)
-        self._progress.clear()
-        self._result = None
+        with self._lock:
+            self._busy = True
+            self._last_started = datetime.now(timezone.utc)
+            self._started_monotonic = time.monotonic()
+            self._progress.clear()
+            self._ingested = 0
+            self._result = None
+        if self._reader_mode:
+            self._start_reader()
 
     def abort(self) -> None:
         if not self._busy:
@@ -171,6 +323,14 @@ class DeviceTestBoxRealDriver(InstrumentDriver):
             logger.warning("Failed to send abort command: %s", exc)
         finally:
             self._busy = False
+            self._stop_reader()
+
+    def close(self) -> None:
+        """Stop the reader thread (if any) and close the transport."""
+
+        self._reader_stop.set()
+        self._transport.close()
+        self._stop_reader()
 
     def is_busy(self) -> bool:
         return self._busy
@@ -179,12 +339,112 @@ class DeviceTestBoxRealDriver(InstrumentDriver):
         return self._last_started
 
     def fetch_progress(self) -> List[dict[str, Any]]:
-        self._poll()
-        return list(self._progress)
+        if not self._reader_mode:
+            self._poll()
+        with self._lock:
+            return list(self._progress)
 
     def fetch_result(self) -> dict[str, Any] | None:
-        self._poll()
-        return dict(self._result) if self._result is not None else None
+        if not self._reader_mode:
+            self._poll()
+        with self._lock:
+            return dict(self._result) if self._result is not None else None
+
+    async def stream_progress(
+        self,
+        *,
+        run_blocking: BlockingRunner | None = None,
+        poll_interval: float = 0.1,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield each record as soon as its line is parsed; ends on done/error/abort.
+
+        每次只读取一条有效记录（``_poll(limit=1)``），空闲时由串口 ``timeout`` 自然节流。
+        """
+
+        if self._reader_mode:
+            async for record in self._stream_buffered(poll_interval):
+                yield record
+            return
+
+        call = run_blocking or asyncio.to_thread
+        seen = 0
+        while self._busy and self._transport.is_open:
+            await call(self._poll, 1)
+            progress = self._progress
+            for record in progress[seen:]:
+                yield dict(record)
+            seen = len(progress)
+
+    async def _stream_buffered(self, poll_interval: float) -> AsyncIterator[dict[str, Any]]:
+        # 读线程每入账一条记录就 call_soon_threadsafe 唤醒；poll_interval 仅作兜底
+        wakeup = asyncio.Event()
+        self._waker = (asyncio.get_running_loop(), wakeup)
+        seen = 0
+        try:
+            while True:
+                wakeup.clear()
+                with self._lock:
+                    fresh = self._ingested - seen
+                    records = list(self._progress)[-fresh:] if fresh else []
+                    seen = self._ingested
+                    running = self._busy and self._reader is not None and self._reader.is_alive()
+                for record in records:
+                    yield dict(record)
+                if not running:
+                    return
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._waker = None
+
+    def _start_reader(self) -> None:
+        self._reader_stop.clear()
+        self._reader = threading.Thread(
+            target=self._read_loop,
+            name=f"testbox-reader-{self._transport.url}",
+            daemon=True,
+        )
+        self._reader.start()
+
+    def _stop_reader(self) -> None:
+        reader = self._reader
+        self._reader_stop.set()
+        if reader is not None and reader is not threading.current_thread():
+            reader.join(timeout=max(self._transport.timeout or 0.0, 0.1) + 1.0)
+            if reader.is_alive():
+                logger.warning("Serial reader thread for %s did not stop", self._transport.url)
+        self._reader = None
+
+    def _read_loop(self) -> None:
+        stop = self._reader_stop
+        while not stop.is_set() and self._busy:
+            try:
+                line = self._transport.readline()
+            except Exception as exc:  # noqa: BLE001 - 串口被关闭/拔出
+                if not stop.is_set():
+                    logger.warning("Serial reader for %s stopped: %s", self._transport.url, exc)
+                break
+            if not line or stop.is_set():
+                continue
+            arrived = time.monotonic()
+            self.reader_stats.lines += 1
+            payload = line.decode("utf-8", "ignore").strip()
+            if not payload:
+                continue
+            try:
+                record = dict(self._response_parser(payload))
+            except Exception as exc:  # noqa: BLE001
+                logger.debug("Ignoring unparsable response %s: %s", payload, exc)
+                continue
+            self._ingest_record(record, arrived)
+            waker = self._waker
+            if waker is not None:
+                waker[0].call_soon_threadsafe(waker[1].set)
+        waker = self._waker
+        if waker is not None:
+            waker[0].call_soon_threadsafe(waker[1].set)
 
     def _poll(self, limit: int | None = None) -> None:
         if not self._transport.is_open:
@@ -202,28 +462,45 @@ class DeviceTestBoxRealDriver(InstrumentDriver):
             except Exception as exc:  # noqa: BLE001
                 logger.debug("Ignoring unparsable response %s: %s", payload, exc)
                 continue
-            self._ingest_record(record)
+            self._ingest_record(record, time.monotonic())
             if limit is not None:
                 count += 1
                 if count >= limit:
                     break
 
-    def _ingest_record(self, record: MutableMapping[str, Any]) -> None:
+    def _ingest_record(self, record: MutableMapping[str, Any], arrived: float) -> None:
+        with self._lock:
+            self._ingest_locked(record, arrived)
+
+    def _append_progress(self, entry: dict[str, Any]) -> None:
+        progress = self._progress
+        if isinstance(progress, deque) and len(progress) == progress.maxlen:
+            self.reader_stats.overflowed += 1
+        progress.append(entry)
+        self._ingested += 1
+
+    def _ingest_locked(self, record: MutableMapping[str, Any], arrived: float) -> None:
+        self.reader_stats.records += 1
         kind = str(record.pop("kind", record.pop("type", ""))).lower()
         if not kind:
             # 无分类数据，按照原始 payload 记录
-            self._progress.append({"raw": dict(record)})
+            self._append_progress({"raw": dict(record), "received_at": arrived})
             return
 
         if kind in {"progress", "prog"}:
+            elapsed = _try_float(record.get("elapsed_s"))
+            if elapsed is None and self._reader_mode:
+                # 仪器未上报时按到达时刻计算，而非调用方轮询的时刻
+                elapsed = round(arrived - self._started_monotonic, 3)
             entry = {
                 "progress": float(record.get("progress", record.get("pct", 0.0))),
                 "stage": str(record.get("stage", record.get("phase", "unknown"))),
-                "elapsed_s": _try_float(record.get("elapsed_s")),
+                "elapsed_s": elapsed,
                 "message": record.get("message"),
+                "received_at": arrived,
                 "raw": dict(record),
             }
-            self._progress.append(entry)
+            self._append_progress(entry)
             return
 
         if kind in {"done", "result", "complete"}:
@@ -248,7 +525,7 @@ class DeviceTestBoxRealDriver(InstrumentDriver):
             return
 
         # 未知类型，记录原始信息以便调试
-        self._progress.append({"kind": kind, "raw": dict(record)})
+        self._append_progress({"kind": kind, "raw": dict(record), "received_at": arrived})
 
     @staticmethod
     def _render_duration(value: Any) -> Any:
@@ -285,4 +562,6 @@ def _try_float(value: Any) -> float | None:
 __all__ = [
     "DeviceTestBoxFakeDriver",
     "DeviceTestBoxRealDriver",
+    "ReaderStats",
+    "SensorStreamConfig",
 ]
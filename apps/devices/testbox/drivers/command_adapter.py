@@ -2,14 +2,20 @@
 
 from __future__ import annotations
 
-import json
+import asyncio
+import contextlib
 import logging
-from asyncio import AbstractEventLoop, create_task
+from asyncio import AbstractEventLoop
+from collections import deque
 from dataclasses import dataclass
 from typing import Any, Optional
 
 from ..apps.queues import CommandQueue
-from ..domain.models import DeviceTestBoxRunCommand, DeviceTestBoxRunParams
+from ..domain.models import DeviceTestBoxRunCommand
+from core.bridge import BridgeStats, LoopBridge
+from core.bus import BusMessage, MessageBus, Subscription
+from core.codecs import CodecRegistry, build_registry
+from core.topics import TopicAddress, TopicRouter
 
 logger = logging.getLogger(__name__)
 
@@ -29,7 +35,13 @@ class CommandTopicLayout:
 
 
 class MQTTCommandAdapter:
-    """Subscribe to MQTT command topics and enqueue validated commands."""
+    """Subscribe to MQTT command topics and enqueue validated commands.
+
+    ``client`` 可以是 paho 客户端（回调在网络线程，经 ``LoopBridge`` 攒批回到事件循环），
+    也可以是 ``core.bus.MessageBus``：总线已在事件循环中回调，命令直接入队，无需再切换线程。
+    给定 ``router`` 时只在共享的 ``TopicRouter`` 上登记处理器，由其持有的通配符订阅统一
+    分发（fleet 场景下 N 台设备只需一个命令订阅）。
+    """
 
     def __init__(
         self,
@@ -38,65 +50,130 @@ class MQTTCommandAdapter:
         loop: AbstractEventLoop,
         command_queue: CommandQueue,
         topic_layout: CommandTopicLayout,
+        codecs: CodecRegistry | None = None,
+        router: TopicRouter | None = None,
     ) -> None:
         self._client = client
+        self._router = router
+        self._codecs = codecs or build_registry()
         self._loop = loop
         self._command_queue = command_queue
         self._topic_layout = topic_layout
         self._started = False
+        self._subscription: Subscription | None = None
+        # 网络线程只向桥追加命令，事件循环按批排空进 CommandQueue
+        self._bridge: LoopBridge[DeviceTestBoxRunCommand] = LoopBridge(loop, self._drain_commands)
+        # 队列满且为 block 策略时，剩余命令按序交给唯一的后台任务等待空位
+        self._backlog: deque[DeviceTestBoxRunCommand] = deque()
+        self._backlog_task: asyncio.Task[None] | None = None
+
+    @property
+    def ingest_stats(self) -> BridgeStats:
+        return self._bridge.stats
 
     def start(self) -> None:
         if self._started:
             return
         subscribe_topic = self._topic_layout.run_diagnostic
         logger.info("MQTT command adapter subscribing %s", subscribe_topic)
-        self._client.subscribe(subscribe_topic, qos=1)
-        self._client.message_callback_add(subscribe_topic, self._on_message)
+        if self._router is not None:
+            self._router.add(subscribe_topic, self._on_routed)
+        elif isinstance(self._client, MessageBus):
+            self._subscription = self._client.subscribe_nowait(subscribe_topic, qos=1, callback=self._on_bus_message)
+        else:
+            self._client.subscribe(subscribe_topic, qos=1)
+            self._client.message_callback_add(subscribe_topic, self._on_message)
         self._started = True
 
-    def stop(self) -> None:
+    async def stop(self) -> None:
+        """Unsubscribe, then cancel and await the backlog task.
+
+        停止后仍在积压队列中的命令被丢弃并记录；桥中尚未排空的命令同样不再入队，
+        避免 ``stop`` 返回后后台任务继续向 ``CommandQueue`` 写入。
+        """
+
         if not self._started:
             return
+        self._started = False
         subscribe_topic = self._topic_layout.run_diagnostic
         try:
-            self._client.message_callback_remove(subscribe_topic)
-            self._client.unsubscribe(subscribe_topic)
+            if self._router is not None:
+                self._router.remove(subscribe_topic, self._on_routed)
+            elif self._subscription is not None:
+                self._subscription.unsubscribe()
+                self._subscription = None
+            else:
+                self._client.message_callback_remove(subscribe_topic)
+                self._client.unsubscribe(subscribe_topic)
         finally:
-            self._started = False
+            task, self._backlog_task = self._backlog_task, None
+            if task is not None:
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+            if self._backlog:
+                logger.warning("Command adapter stopped, dropped %d queued commands", len(self._backlog))
+                self._backlog.clear()
 
     def _on_message(self, client: MQTTClient, userdata: object, message: MQTTMessage) -> None:
-        try:
-            data = json.loads(message.payload.decode("utf-8"))
-        except Exception as exc:  # noqa: BLE001
-            logger.warning("Invalid JSON on %s: %s", message.topic, exc)
-            return
-
-        command = self._parse_command(data)
+        command = self._decode_command(message.topic, message.payload)
         if command is None:
             return
 
         logger.debug("Enqueue command %s", command.corr_id)
         self._enqueue_command(command)
 
-    def _parse_command(self, payload: dict) -> Optional[DeviceTestBoxRunCommand]:
+    def _on_bus_message(self, message: BusMessage) -> None:
+        command = self._decode_command(message.topic, message.payload)
+        if command is not None:
+            self._drain_commands([command])
+
+    def _on_routed(self, address: TopicAddress, message: Any) -> None:
+        if isinstance(self._client, MessageBus):
+            self._on_bus_message(message)
+        else:
+            self._on_message(self._client, None, message)
+
+    def _decode_command(self, topic: str, payload: bytes) -> Optional[DeviceTestBoxRunCommand]:
+        """Validate the raw payload bytes into a command in a single pass.
+
+        直接把 bytes 交给编解码器的 ``decode``（JSON 走 ``model_validate_json``），
+        不再经过 str → dict → 模型的多次遍历；缺省或为 null 的 ``params`` 由模型自身补默认值。
+        """
+
         try:
-            return DeviceTestBoxRunCommand.model_validate(payload)
-        except Exception as exc:  # noqa: BLE001
-            if "params" not in payload:
-                payload["params"] = DeviceTestBoxRunParams().model_dump(exclude_none=True)
-                try:
-                    return DeviceTestBoxRunCommand.model_validate(payload)
-                except Exception:
-                    logger.warning("Invalid command payload after fallback: %s", exc)
-                    return None
-            logger.warning("Invalid command payload: %s", exc)
+            return self._codecs.decode("cmd", payload, DeviceTestBoxRunCommand)
+        except Exception as exc:  # noqa: BLE001 - 在网络线程回调中，任何解码错误都只记录并丢弃
+            logger.warning("Invalid command payload on %s: %s", topic, exc)
             return None
 
     def _enqueue_command(self, command: DeviceTestBoxRunCommand) -> None:
-        async def _put() -> None:
-            await self._command_queue.put_command(command)
+        self._bridge.submit(command)
 
-        self._loop.call_soon_threadsafe(lambda: create_task(_put()))
+    def _drain_commands(self, commands: list[DeviceTestBoxRunCommand]) -> None:
+        if not self._started:
+            logger.warning("Command adapter stopped, dropped %d commands", len(commands))
+            return
+        if self._backlog:
+            self._backlog.extend(commands)
+            return
+        for index, command in enumerate(commands):
+            try:
+                accepted = self._command_queue.offer_nowait(command)
+            except asyncio.QueueFull:
+                self._backlog.extend(commands[index:])
+                self._backlog_task = asyncio.create_task(self._flush_backlog())
+                return
+            if not accepted:
+                logger.warning("Command queue full, dropped command %s", command.corr_id)
+
+    async def _flush_backlog(self) -> None:
+        while self._backlog:
+            command = self._backlog[0]
+            if not await self._command_queue.offer(command):
+                logger.warning("Command queue full, dropped command %s", command.corr_id)
+            self._backlog.popleft()
+        self._backlog_task = None
 
 
 __all__ = [
@@ -0,0 +1,106 @@
+"""Vectorized sensor signal models for the fake TestBox driver."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Mapping
+
+
+@dataclass(slots=True)
+class SensorStreamConfig:
+    """Sensor stream knobs (``driver.sensors``).
+
+    ``rate_hz`` 为每秒快照数（0 表示关闭，最高可到 kHz 级）；每个快照包含 ``channels``
+    路读数。信号 = 通道基线 + 线性漂移 + 随机阶跃 + 高斯噪声，全部按块向量化生成。
+    """
+
+    rate_hz: float = 0.0
+    channels: int = 8
+    unit: str = "V"
+    baseline: float = 1.0
+    noise: float = 0.01
+    drift_per_s: float = 0.002
+    step_probability: float = 0.001
+    step_scale: float = 0.1
+
+    @classmethod
+    def from_mapping(cls, cfg: Mapping[str, Any] | None) -> "SensorStreamConfig":
+        cfg = cfg or {}
+        defaults = cls()
+        return cls(
+            rate_hz=max(0.0, float(cfg.get("rate_hz", defaults.rate_hz))),
+            channels=max(1, int(cfg.get("channels", defaults.channels))),
+            unit=str(cfg.get("unit", defaults.unit)),
+            baseline=float(cfg.get("baseline", defaults.baseline)),
+            noise=max(0.0, float(cfg.get("noise", defaults.noise))),
+            drift_per_s=float(cfg.get("drift_per_s", defaults.drift_per_s)),
+            step_probability=min(1.0, max(0.0, float(cfg.get("step_probability", defaults.step_probability)))),
+            step_scale=max(0.0, float(cfg.get("step_scale", defaults.step_scale))),
+        )
+
+
+@dataclass(slots=True)
+class SensorBlock:
+    """``values[i, j]`` is channel ``names[j]`` of sample ``i`` taken at ``t0_s + i * period_s``."""
+
+    names: list[str]
+    unit: str
+    t0_s: float
+    period_s: float
+    values: Any
+
+
+class SensorSignalModel:
+    """Generate ``(n, channels)`` sample blocks with NumPy.
+
+    随机数由 ``seed`` 初始化的 ``numpy.random.Generator`` 产生，同一 seed 与相同的
+    取块序列下结果可复现；阶跃电平、漂移时间轴与采样计数跨块延续。
+    """
+
+    def __init__(self, config: SensorStreamConfig, *, seed: int = 7) -> None:
+        try:
+            import numpy as np  # type: ignore
+        except ImportError as exc:
+            raise RuntimeError("numpy 未安装，无法启用传感器数据流。请运行 'uv sync --extra numpy'。") from exc
+        if config.rate_hz <= 0:
+            raise ValueError("sensor rate_hz must be > 0")
+        self._np = np
+        self.config = config
+        self.names = [f"ch{idx}" for idx in range(config.channels)]
+        self._rng = np.random.default_rng(seed)
+        # 各通道基线在 ±10% 内错开，便于在看板上区分
+        self._baseline = config.baseline * (1.0 + self._rng.uniform(-0.1, 0.1, config.channels))
+        self._step_level = np.zeros(config.channels)
+        self._emitted = 0
+
+    @property
+    def emitted(self) -> int:
+        return self._emitted
+
+    def sample(self, count: int) -> SensorBlock:
+        np = self._np
+        cfg = self.config
+        period = 1.0 / cfg.rate_hz
+        t = (self._emitted + np.arange(count)) * period
+        shape = (count, cfg.channels)
+
+        steps = np.where(
+            self._rng.random(shape) < cfg.step_probability,
+            self._rng.normal(0.0, cfg.step_scale, shape),
+            0.0,
+        )
+        levels = self._step_level + np.cumsum(steps, axis=0)
+        if count:
+            self._step_level = levels[-1]
+        values = (
+            self._baseline
+            + cfg.drift_per_s * t[:, None]
+            + levels
+            + self._rng.normal(0.0, cfg.noise, shape)
+        )
+        block = SensorBlock(self.names, cfg.unit, float(self._emitted * period), period, values)
+        self._emitted += count
+        return block
+
+
+__all__ = ["SensorBlock", "SensorSignalModel", "SensorStreamConfig"]
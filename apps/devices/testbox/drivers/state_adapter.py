@@ -4,8 +4,7 @@ from __future__ import annotations
 
 import logging
 from dataclasses import dataclass
-from datetime import datetime, timezone
-from typing import Any, Optional
+from typing import Any, Mapping, Optional
 
 from ..apps.queues import TelemetryMessage
 from ..domain.models import (
@@ -14,6 +13,9 @@ from ..domain.models import (
     DeviceTestBoxShadow,
     DeviceTestBoxState,
 )
+from core.bus import publisher_for
+from core.clock import Clock, RealClock
+from core.codecs import CodecRegistry, build_registry
 from core.domain.shared.models import ErrorEvent
 
 logger = logging.getLogger(__name__)
@@ -29,8 +31,43 @@ class StateTopicLayout:
         return f"{self.base_topic}/state/shadow"
 
 
+@dataclass(slots=True)
+class ShadowPublishPolicy:
+    """When ``StateShadowPublisher`` writes the retained shadow.
+
+    默认（``on_change=False``、``min_interval_ms=0``）与原行为一致：每条事件发布一次。
+    ``on_change=True`` 时仅在 state/health/corr_id/阶段变化，或进度相对上次发布变化
+    达到 ``progress_delta`` 时发布；``min_interval_ms`` 把突发合并为每个间隔最多一次，
+    间隔结束时补发最新影子。完成/错误事件总是立即发布。
+    """
+
+    on_change: bool = False
+    progress_delta: float = 0.0
+    min_interval_ms: float = 0.0
+
+    @classmethod
+    def from_mapping(cls, cfg: Mapping[str, Any] | None) -> "ShadowPublishPolicy":
+        cfg = cfg or {}
+        return cls(
+            on_change=bool(cfg.get("on_change", False)),
+            progress_delta=max(0.0, float(cfg.get("progress_delta", 0.0))),
+            min_interval_ms=max(0.0, float(cfg.get("min_interval_ms", 0.0))),
+        )
+
+
+@dataclass(slots=True)
+class ShadowPublishStats:
+    published: int = 0
+    #: 未发布的更新数：无实质变化被跳过，或在间隔内被合并
+    suppressed: int = 0
+
+
 class StateShadowPublisher:
-    """Build and publish the device shadow based on telemetry events."""
+    """Build and publish the device shadow based on telemetry events.
+
+    影子时间戳与 ``min_interval_ms`` 的合并计时都取自注入的 ``clock``（缺省 ``RealClock``），
+    与 Actor 共用同一时钟时，scaled/virtual 模式下的节流按模拟时间进行。
+    """
 
     def __init__(
         self,
@@ -38,18 +75,35 @@ class StateShadowPublisher:
         client: MQTTClient,
         device_id: str,
         topic_layout: StateTopicLayout,
+        codecs: CodecRegistry | None = None,
+        policy: ShadowPublishPolicy | None = None,
+        clock: Clock | None = None,
     ) -> None:
         self._client = client
+        self._clock = clock or RealClock()
+        # paho 客户端或 core.bus.MessageBus（后者返回确认 Future，不阻塞）
+        self._send = publisher_for(client)
+        self._codecs = codecs or build_registry()
         self._device_id = device_id
         self._topic_layout = topic_layout
+        self._policy = policy or ShadowPublishPolicy()
         self._shadow = DeviceTestBoxShadow(
             device_id=device_id,
             state=DeviceTestBoxState.IDLE,
         )
+        self.stats = ShadowPublishStats()
+        self._published: Optional[DeviceTestBoxShadow] = None
+        self._last_publish_at = float("-inf")
+        self._dirty = False
+        self._flush_handle: Optional[Any] = None
+
+    @property
+    def shadow(self) -> DeviceTestBoxShadow:
+        return self._shadow
 
     def handle(self, message: TelemetryMessage) -> None:
         updated_shadow: Optional[DeviceTestBoxShadow] = None
-        now = datetime.now(timezone.utc)
+        now = self._clock.now()
 
         if isinstance(message, DeviceTestBoxProgressEvent):
             updated_shadow = self._shadow.model_copy(
@@ -97,13 +151,59 @@ class StateShadowPublisher:
             return
 
         self._shadow = updated_shadow
+        final = not isinstance(message, DeviceTestBoxProgressEvent)
+        if not final and not self._is_meaningful(updated_shadow):
+            self.stats.suppressed += 1
+            return
+
+        wait_s = self._last_publish_at + self._policy.min_interval_ms / 1000.0 - self._clock.monotonic()
+        if final or wait_s <= 0:
+            self._publish()
+            return
+
+        self.stats.suppressed += 1
+        self._dirty = True
+        if self._flush_handle is None:
+            self._flush_handle = self._clock.call_later(wait_s, self.flush)
+
+    def flush(self) -> None:
+        """Publish a coalesced update that is still waiting for its interval."""
+
+        if self._dirty:
+            self._publish()
+
+    def _is_meaningful(self, shadow: DeviceTestBoxShadow) -> bool:
+        previous = self._published
+        if not self._policy.on_change or previous is None:
+            return True
+        if (shadow.state, shadow.health, shadow.corr_id) != (previous.state, previous.health, previous.corr_id):
+            return True
+        metadata, last_metadata = shadow.metadata or {}, previous.metadata or {}
+        if metadata.get("stage") != last_metadata.get("stage"):
+            return True
+        progress, last_progress = metadata.get("progress"), last_metadata.get("progress")
+        if progress is None or last_progress is None:
+            return progress != last_progress
+        delta = abs(progress - last_progress)
+        return delta >= self._policy.progress_delta if self._policy.progress_delta > 0 else delta > 0
+
+    def _publish(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._dirty = False
+        self._published = self._shadow
+        self._last_publish_at = self._clock.monotonic()
+        self.stats.published += 1
         topic = self._topic_layout.for_shadow()
-        payload = self._shadow.model_dump_json()
+        payload = self._codecs.encode("state", self._shadow)
         logger.debug("Publish state shadow to %s", topic)
-        self._client.publish(topic, payload, qos=1, retain=True)
+        self._send(topic, payload, qos=1, retain=True)
 
 
 __all__ = [
+    "ShadowPublishPolicy",
+    "ShadowPublishStats",
     "StateShadowPublisher",
     "StateTopicLayout",
 ]
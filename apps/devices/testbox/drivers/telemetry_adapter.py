@@ -3,9 +3,10 @@
 from __future__ import annotations
 
 import asyncio
+import json
 import logging
-from dataclasses import dataclass
-from typing import Any, Optional
+from dataclasses import dataclass, field
+from typing import Any, Mapping, Optional
 
 from ..apps.queues import TelemetryMessage, TelemetryQueue
 from ..domain.models import (
@@ -13,7 +14,11 @@ from ..domain.models import (
     DeviceTestBoxProgressEvent,
     DeviceTestBoxSensorSnapshot,
 )
+from core.bus import publisher_for
+from core.codecs import CodecRegistry, build_registry
 from core.domain.shared.models import ErrorEvent
+from core.metrics import SIZE_BUCKETS, Histogram
+from core.spool import OutboundSpool, SpoolConfig
 
 logger = logging.getLogger(__name__)
 
@@ -37,29 +42,115 @@ class TelemetryTopicLayout:
         return f"{self.base_topic}/evt/error"
 
 
+@dataclass(slots=True)
+class TelemetryRoute:
+    """Per-device topic layout and shadow publisher used by shared adapters."""
+
+    topic_layout: TelemetryTopicLayout
+    state_publisher: Optional["StateShadowPublisher"] = None
+
+
+@dataclass(slots=True)
+class TelemetryBatchConfig:
+    """Batching knobs for ``MQTTTelemetryAdapter``.
+
+    ``size=1`` 时逐条发布（默认行为）；``size>1`` 时每次最多取 ``size`` 条，
+    或在首条消息出队后等待 ``interval_ms`` 毫秒后一起发布。设置 ``topic`` 时整批
+    合并为一个 JSON 数组 ``[{"topic": ..., "payload": {...}}, ...]`` 发往该主题。
+    ``max_inflight`` 会透传给 paho 的 ``max_inflight_messages_set``，保证 QoS1 窗口足够大。
+    """
+
+    size: int = 1
+    interval_ms: float = 0.0
+    topic: str | None = None
+    max_inflight: int | None = None
+
+    @classmethod
+    def from_mapping(cls, cfg: Mapping[str, Any] | None) -> "TelemetryBatchConfig":
+        cfg = cfg or {}
+        max_inflight = cfg.get("max_inflight")
+        return cls(
+            size=max(1, int(cfg.get("batch_size", 1))),
+            interval_ms=max(0.0, float(cfg.get("batch_interval_ms", 0.0))),
+            topic=cfg.get("batch_topic"),
+            max_inflight=int(max_inflight) if max_inflight is not None else None,
+        )
+
+
+@dataclass(slots=True)
+class TelemetryPublishStats:
+    messages: int = 0
+    flushes: int = 0
+    flush_size: Histogram = field(default_factory=lambda: Histogram(SIZE_BUCKETS))
+    flush_latency_s: Histogram = field(default_factory=Histogram)
+
+
 class MQTTTelemetryAdapter:
-    """Publish telemetry events to MQTT topics."""
+    """Publish telemetry events to MQTT topics.
+
+    单设备模式使用 ``topic_layout``/``state_publisher``；fleet host 模式下多台设备共享
+    同一条遥测队列，通过 ``routes`` 按 ``device_id`` 选择主题与状态影子。
+    配置 ``spool`` 后遥测经 ``core.spool.OutboundSpool`` 发布：断线或在途窗口已满时落盘，
+    重连后限速重放（状态影子仍直接发布，只保留最新值）。
+    """
 
     def __init__(
         self,
         *,
         client: MQTTClient,
         telemetry_queue: TelemetryQueue,
-        topic_layout: TelemetryTopicLayout,
+        topic_layout: TelemetryTopicLayout | None = None,
         state_publisher: Optional["StateShadowPublisher"] = None,
+        routes: Mapping[str, TelemetryRoute] | None = None,
+        batching: TelemetryBatchConfig | None = None,
+        codecs: CodecRegistry | None = None,
+        spool: SpoolConfig | None = None,
     ) -> None:
+        if topic_layout is None and not routes:
+            raise ValueError("topic_layout or routes must be provided")
+        self._codecs = codecs or build_registry()
+        if batching is not None and batching.topic and self._codecs.for_family("tele").binary:
+            raise ValueError("batch_topic framing requires a JSON codec for tele/*")
         self._client = client
+        # paho 客户端或 core.bus.MessageBus（后者返回确认 Future，不阻塞）
+        self._send = publisher_for(client)
+        self._spool = OutboundSpool(client, spool) if spool is not None and spool.enabled else None
+        if self._spool is not None:
+            self._send = self._spool.publish
         self._queue = telemetry_queue
         self._topic_layout = topic_layout
         self._state_publisher = state_publisher
+        self._routes = dict(routes or {})
+        self._default_route = (
+            TelemetryRoute(topic_layout=topic_layout, state_publisher=state_publisher)
+            if topic_layout is not None
+            else None
+        )
+        self._batching = batching or TelemetryBatchConfig()
+        self.stats = TelemetryPublishStats()
         self._task: asyncio.Task[None] | None = None
 
     def start(self) -> None:
         if self._task is not None:
             return
+        if self._batching.max_inflight is not None:
+            set_inflight = getattr(self._client, "max_inflight_messages_set", None)
+            if callable(set_inflight):
+                set_inflight(self._batching.max_inflight)
+            else:
+                logger.warning(
+                    "MQTT client %s does not support max_inflight; keeping its default window",
+                    type(self._client).__name__,
+                )
+        if self._spool is not None:
+            self._spool.start()
         loop = asyncio.get_running_loop()
         self._task = loop.create_task(self._run())
 
+    @property
+    def spool(self) -> OutboundSpool | None:
+        return self._spool
+
     async def stop(self) -> None:
         if self._task is None:
             return
@@ -69,29 +160,85 @@ class MQTTTelemetryAdapter:
         except asyncio.CancelledError:
             pass
         self._task = None
+        # 限速模式下可能仍有合并中的影子，停止前补发最终状态
+        routes = list(self._routes.values()) + ([self._default_route] if self._default_route else [])
+        for route in routes:
+            flush = getattr(route.state_publisher, "flush", None)
+            if callable(flush):
+                flush()
+        if self._spool is not None:
+            await self._spool.stop()
 
     async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        batch_size = self._batching.size
+        interval_s = self._batching.interval_ms / 1000.0
+        queue = self._queue
         while True:
-            message = await self._queue.get_telemetry()
+            batch = [await queue.get_telemetry()]
+            started = loop.time()
             try:
-                topic = self._resolve_topic(message)
-                payload = message.model_dump_json()
-                logger.debug("Publish telemetry to %s", topic)
-                self._client.publish(topic, payload, qos=1)
-                if self._state_publisher is not None:
-                    self._state_publisher.handle(message)
+                while len(batch) < batch_size:
+                    if not queue.empty():
+                        batch.append(queue.get_nowait())
+                        continue
+                    remaining = started + interval_s - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        async with asyncio.timeout(remaining):
+                            batch.append(await queue.get_telemetry())
+                    except TimeoutError:
+                        break
+                self._flush(batch)
             finally:
-                self._queue.task_done()
-
-    def _resolve_topic(self, message: TelemetryMessage) -> str:
+                for _ in batch:
+                    queue.task_done()
+            self.stats.flush_latency_s.observe(loop.time() - started)
+
+    def _flush(self, batch: list[TelemetryMessage]) -> None:
+        framed: list[bytes] = []
+        batch_topic = self._batching.topic
+        codecs = self._codecs
+        for message in batch:
+            route = self._resolve_route(message)
+            if route is None:
+                logger.warning("No telemetry route for device %s", message.device_id)
+                continue
+            topic = self._resolve_topic(message, route.topic_layout)
+            payload = codecs.encode("tele", message)
+            if batch_topic is None:
+                logger.debug("Publish telemetry to %s", topic)
+                self._send(topic, payload, qos=1)
+            else:
+                framed.append(b'{"topic":' + json.dumps(topic).encode("utf-8") + b',"payload":' + payload + b"}")
+            if route.state_publisher is not None:
+                route.state_publisher.handle(message)
+        if framed:
+            logger.debug("Publish %d telemetry messages to %s", len(framed), batch_topic)
+            self._send(batch_topic, b"[" + b",".join(framed) + b"]", qos=1)
+        stats = self.stats
+        stats.messages += len(batch)
+        stats.flushes += 1
+        stats.flush_size.observe(len(batch))
+
+    def _resolve_route(self, message: TelemetryMessage) -> TelemetryRoute | None:
+        if self._routes:
+            route = self._routes.get(message.device_id)
+            if route is not None:
+                return route
+        return self._default_route
+
+    @staticmethod
+    def _resolve_topic(message: TelemetryMessage, layout: TelemetryTopicLayout) -> str:
         if isinstance(message, DeviceTestBoxProgressEvent):
-            return self._topic_layout.for_progress()
+            return layout.for_progress()
         if isinstance(message, DeviceTestBoxDoneEvent):
-            return self._topic_layout.for_done()
+            return layout.for_done()
         if isinstance(message, DeviceTestBoxSensorSnapshot):
-            return self._topic_layout.for_snapshot()
+            return layout.for_snapshot()
         if isinstance(message, ErrorEvent):
-            return self._topic_layout.for_error()
+            return layout.for_error()
         raise TypeError(f"Unsupported telemetry message: {type(message)!r}")
 
 
@@ -100,5 +247,8 @@ from .state_adapter import StateShadowPublisher  # noqa: E402
 
 __all__ = [
     "MQTTTelemetryAdapter",
+    "TelemetryBatchConfig",
+    "TelemetryPublishStats",
+    "TelemetryRoute",
     "TelemetryTopicLayout",
 ]
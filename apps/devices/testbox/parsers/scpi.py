@@ -6,6 +6,8 @@ import re
 from typing import Any, Iterable, Mapping
 
 _SEPARATOR_PATTERN = re.compile(r"[;,]\s*")
+# str.splitlines() 识别的全部行边界字符
+_LINE_BREAKS = re.compile("[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
 
 
 def build_command(cmd: str, *args: object) -> str:
@@ -62,6 +64,132 @@ def parse_response(raw: str) -> dict[str, Any]:
     return result
 
 
+class ResponseParser:
+    """Stateful, incremental equivalent of :func:`parse_response`.
+
+    ``feed(bytes)`` 缓存不完整的行，返回本次凑齐的全部记录（空行跳过）；
+    ``parse_line(str)`` 与 ``parse_response`` 输出完全一致（由差分测试保证），
+    但热路径上：
+    - 不含换行类字符的常见单行只做一次 strip + 一次预编译正则切分，不再 ``splitlines``；
+    - ``key.strip()`` 与字面值转换结果按原始片段缓存，重复出现的阶段名、布尔值等
+      不再反复走 int/float 异常分支。缓存超过 ``cache_size`` 条时整体清空。
+    """
+
+    __slots__ = ("newline", "cache_size", "_pending", "_keys", "_values")
+
+    def __init__(self, *, newline: bytes = b"\n", cache_size: int = 4096) -> None:
+        self.newline = newline
+        self.cache_size = cache_size
+        self._pending = b""
+        self._keys: dict[str, str] = {}
+        self._values: dict[str, Any] = {}
+
+    def feed(self, data: bytes) -> list[dict[str, Any]]:
+        chunk = self._pending + data if self._pending else data
+        lines = chunk.split(self.newline)
+        self._pending = lines.pop()
+        records: list[dict[str, Any]] = []
+        for raw in lines:
+            text = raw.decode("utf-8", "ignore")
+            if text.strip():
+                records.append(self.parse_line(text))
+        return records
+
+    def reset(self) -> None:
+        self._pending = b""
+
+    def parse_line(self, raw: str) -> dict[str, Any]:
+        text = raw.strip()
+        if not text:
+            raise ValueError("Empty SCPI response")
+
+        result: dict[str, Any] = {}
+        remaining = text
+        prefix, sep, candidate = text.partition(":")
+        if sep and prefix and "=" not in prefix:
+            result["type"] = prefix.strip()
+            remaining = candidate
+
+        if _LINE_BREAKS.search(remaining) is None:
+            line = remaining.strip()
+            tokens = _SEPARATOR_PATTERN.split(line) if line else ()
+        else:
+            tokens = _tokenize(remaining)
+
+        keys, values = self._keys, self._values
+        if len(values) > self.cache_size or len(keys) > self.cache_size:
+            keys.clear()
+            values.clear()
+        for token in tokens:
+            if not token:
+                continue
+            key, eq, value = token.partition("=")
+            if eq:
+                clean_key = keys.get(key)
+                if clean_key is None:
+                    clean_key = keys[key] = key.strip()
+                value = value.strip()
+                try:
+                    result[clean_key] = values[value]
+                except KeyError:
+                    result[clean_key] = values[value] = _convert_value(value)
+            else:
+                try:
+                    converted = values[token]
+                except KeyError:
+                    converted = values[token] = _convert_value(token)
+                result.setdefault("payload", []).append(converted)
+        return result
+
+
+def parse_block_header(data: bytes | bytearray | memoryview) -> tuple[int, int] | None:
+    """Parse an IEEE 488.2 definite-length block header ``#<n><len>``.
+
+    返回 ``(头部字节数, 数据字节数)``；数据不足以解析完整头部时返回 None。
+    不支持 ``#0`` 不定长块，遇到非 ``#`` 开头或非数字长度时抛出 ValueError。
+    """
+
+    if len(data) < 2:
+        return None
+    if data[0] != 0x23:  # "#"
+        raise ValueError("binary block must start with '#'")
+    digits = data[1] - 0x30
+    if not 1 <= digits <= 9:
+        raise ValueError("indefinite-length (#0) or malformed binary block header")
+    header_len = 2 + digits
+    if len(data) < header_len:
+        return None
+    length = bytes(data[2:header_len])
+    if not length.isdigit():
+        raise ValueError(f"malformed binary block length {length!r}")
+    return header_len, int(length)
+
+
+def build_block(payload: bytes | bytearray | memoryview) -> bytes:
+    """Wrap ``payload`` in a definite-length block header."""
+
+    length = str(len(payload))
+    if len(length) > 9:
+        raise ValueError("binary block too large for a definite-length header")
+    return f"#{len(length)}{length}".encode("ascii") + bytes(payload)
+
+
+def decode_block(payload: bytes | bytearray | memoryview, dtype: str = "f4", byteorder: str = ">") -> Any:
+    """View block bytes as a NumPy array without copying.
+
+    ``byteorder`` 取 ``">"``（SCPI ``FORM:BORD NORM`` 的默认大端）、``"<"``（``SWAP``）
+    或 ``"="``（本机）。数组直接引用 ``payload`` 的内存；``payload`` 被复用前如需
+    保留数据，调用方应自行 ``.copy()``。
+    """
+
+    try:
+        import numpy as np  # type: ignore
+    except ImportError as exc:
+        raise RuntimeError("numpy 未安装，无法解码二进制块。请运行 'uv sync --extra numpy'。") from exc
+
+    return np.frombuffer(payload, dtype=np.dtype(dtype).newbyteorder(byteorder))
+
+
 def _tokenize(payload: str) -> Iterable[str]:
     segments: list[str] = []
     for line in payload.splitlines():
@@ -105,4 +233,11 @@ def _convert_value(token: str) -> Any:
         return token
 
 
-__all__ = ["build_command", "parse_response"]
+__all__ = [
+    "ResponseParser",
+    "build_block",
+    "build_command",
+    "decode_block",
+    "parse_block_header",
+    "parse_response",
+]
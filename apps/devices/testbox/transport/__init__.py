@@ -1,5 +1,7 @@
 """Transport 层封装串口、TCP、VISA 等连接。"""
 
+from .async_serial_transport import AsyncSerialTransport
+from .scheduler import ScpiScheduler
 from .serial_transport import SerialTransport
 
-__all__ = ["SerialTransport"]
\ No newline at end of file
+__all__ = ["AsyncSerialTransport", "ScpiScheduler", "SerialTransport"]
\ No newline at end of file
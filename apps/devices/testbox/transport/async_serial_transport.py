@@ -0,0 +1,249 @@
+"""Asyncio-native serial transport built on top of ``SerialTransport``."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Optional
+
+from serial import SerialTimeoutException
+
+from ..parsers.scpi import decode_block, parse_block_header
+from .framing import LineFramer
+from .serial_transport import SerialTransport
+
+logger = logging.getLogger(__name__)
+
+_READ_CHUNK = 4096
+_BLOCK_HEADER_MAX = 11
+
+
+class AsyncSerialTransport:
+    """Non-blocking serial I/O driven by the event loop.
+
+    串口以 ``timeout=0`` 打开；存在文件描述符（POSIX 真实串口、pty）时通过
+    ``loop.add_reader``/``add_writer`` 挂到事件循环上，读写均不占用线程。
+    ``loop://`` 等没有 fd 的 URL 退化为按 ``poll_interval`` 轮询 ``in_waiting``，
+    便于测试与离线调试。接口：
+
+    - ``await read_line()``：返回一行（含换行符），连接关闭时抛出 ``ConnectionError``；
+    - ``await read_block()``：IEEE 488.2 定长二进制块，数据直接读入预分配缓冲区；
+    - ``async for line in transport``：逐行迭代，连接关闭时结束；
+    - ``write()`` 只写入发送缓冲，``await drain()`` 等待缓冲全部写出，
+      ``await write_line()`` 为二者的组合。
+    """
+
+    def __init__(
+        self,
+        url: str = "loop://",
+        *,
+        poll_interval: float = 0.01,
+        newline: bytes | str = b"\n",
+        **serial_kwargs: Any,
+    ) -> None:
+        serial_kwargs.pop("timeout", None)
+        self._serial_transport = SerialTransport(url, timeout=0, newline=newline, **serial_kwargs)
+        self.poll_interval = poll_interval
+        self.newline = self._serial_transport.newline
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._fd: Optional[int] = None
+        self._rx = LineFramer(self.newline)
+        self._tx = bytearray()
+        self._readable: Optional[asyncio.Event] = None
+        self._drained: Optional[asyncio.Event] = None
+        self._block_buffer: Optional[bytearray] = None
+        # 读取二进制块期间，可读回调直接 readinto 到该视图，绕过行缓冲
+        self._block_view: Optional[memoryview] = None
+        self._block_filled = 0
+
+    @property
+    def url(self) -> str:
+        return self._serial_transport.url
+
+    @property
+    def is_open(self) -> bool:
+        return self._serial_transport.is_open
+
+    @property
+    def uses_fd(self) -> bool:
+        """True when reads/writes are driven by ``add_reader``/``add_writer``."""
+
+        return self._fd is not None
+
+    def open(self) -> None:
+        if self.is_open:
+            return
+        self._serial_transport.open()
+        self._loop = asyncio.get_running_loop()
+        self._readable = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._drained.set()
+        serial = self._serial_transport._ensure_open()
+        try:
+            self._fd = serial.fileno()
+        except (AttributeError, OSError, ValueError):  # io.UnsupportedOperation 属于 OSError/ValueError
+            self._fd = None
+        if self._fd is not None:
+            # 有 fd 时写入也改为非阻塞，由 add_writer 负责写完剩余部分
+            serial.write_timeout = 0
+            self._loop.add_reader(self._fd, self._on_readable)
+        logger.debug("Async serial transport %s uses %s", self.url, "fd" if self._fd is not None else "polling")
+
+    def close(self) -> None:
+        if not self.is_open:
+            return
+        if self._fd is not None and self._loop is not None:
+            self._loop.remove_reader(self._fd)
+            self._loop.remove_writer(self._fd)
+        self._fd = None
+        self._serial_transport.close()
+        self._tx.clear()
+        # 唤醒等待方，使其观察到连接已关闭
+        if self._readable is not None:
+            self._readable.set()
+        if self._drained is not None:
+            self._drained.set()
+
+    # -- reading -------------------------------------------------------------
+    def _on_readable(self) -> None:
+        serial = self._serial_transport._serial
+        if serial is None:
+            return
+        try:
+            block = self._block_view
+            if block is not None:
+                count = serial.readinto(block[self._block_filled :]) or 0
+                self._block_filled += count
+            else:
+                count = self._rx.fill_from(serial, max(serial.in_waiting, _READ_CHUNK))
+        except Exception as exc:  # noqa: BLE001 - 串口被拔出等
+            logger.warning("Serial read failed on %s: %s", self.url, exc)
+            self.close()
+            return
+        if count:
+            assert self._readable is not None
+            self._readable.set()
+
+    async def _wait_readable(self) -> None:
+        assert self._readable is not None
+        if self._fd is not None:
+            await self._readable.wait()
+            return
+        self._on_readable()
+        if not self._readable.is_set():
+            await asyncio.sleep(self.poll_interval)
+
+    async def read_line(self) -> bytes:
+        while True:
+            line = self._rx.next_line()
+            if line is not None:
+                return line  # type: ignore[return-value]
+            await self._wait_for_data()
+
+    async def read(self, size: int) -> bytes:
+        """Return exactly ``size`` bytes."""
+
+        while self._rx.pending < size:
+            await self._wait_for_data()
+        return self._rx.take(size)
+
+    async def read_block(self, *, into: Optional[bytearray] = None) -> memoryview:
+        """Read one ``#<n><len><data>`` block; the view is valid until the next call."""
+
+        while (header := parse_block_header(bytes(self._rx.peek(_BLOCK_HEADER_MAX)))) is None:
+            await self._wait_for_data()
+        header_len, length = header
+        self._rx.take(header_len)
+
+        if into is None:
+            if self._block_buffer is None or len(self._block_buffer) < length:
+                self._block_buffer = bytearray(length)
+            into = self._block_buffer
+        elif len(into) < length:
+            raise ValueError(f"buffer of {len(into)} bytes cannot hold a {length}-byte block")
+        view = memoryview(into)[:length]
+        self._block_filled = self._rx.take_into(view)
+        self._block_view = view
+        try:
+            while self._block_filled < length:
+                await self._wait_for_data()
+        finally:
+            self._block_view = None
+        # 终止符可能晚于数据到达；留在缓冲区会让下一次 read_line 读到空行
+        while self._rx.pending < len(self.newline):
+            await self._wait_for_data()
+        if bytes(self._rx.peek(len(self.newline))) == self.newline:
+            self._rx.take(len(self.newline))
+        return view
+
+    async def read_block_array(
+        self, dtype: str = "f4", byteorder: str = ">", *, into: Optional[bytearray] = None
+    ) -> Any:
+        return decode_block(await self.read_block(into=into), dtype, byteorder)
+
+    async def _wait_for_data(self) -> None:
+        if not self.is_open:
+            raise ConnectionError(f"serial transport {self.url} closed")
+        assert self._readable is not None
+        self._readable.clear()
+        await self._wait_readable()
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return self._iter_lines()
+
+    async def _iter_lines(self) -> AsyncIterator[bytes]:
+        while True:
+            try:
+                yield await self.read_line()
+            except ConnectionError:
+                return
+
+    # -- writing -------------------------------------------------------------
+    def write(self, data: bytes) -> None:
+        serial = self._serial_transport._ensure_open()
+        if self._fd is None:
+            serial.write(data)
+            return
+        if not self._tx:
+            data = data[self._write_some(data) :]
+            if not data:
+                return
+            assert self._drained is not None and self._loop is not None
+            self._drained.clear()
+            self._loop.add_writer(self._fd, self._on_writable)
+        self._tx += data
+
+    def _write_some(self, data: bytes) -> int:
+        try:
+            return self._serial_transport._ensure_open().write(data) or 0
+        except SerialTimeoutException:  # 非阻塞写遇到 EAGAIN
+            return 0
+
+    def _on_writable(self) -> None:
+        if not self.is_open or self._fd is None:
+            return
+        del self._tx[: self._write_some(bytes(self._tx))]
+        if not self._tx:
+            assert self._loop is not None and self._drained is not None
+            self._loop.remove_writer(self._fd)
+            self._drained.set()
+
+    async def drain(self) -> None:
+        assert self._drained is not None
+        await self._drained.wait()
+        if not self.is_open:
+            raise ConnectionError(f"serial transport {self.url} closed")
+
+    async def write_line(self, text: str) -> None:
+        self.write(text.encode("utf-8") + self.newline)
+        await self.drain()
+
+    async def __aenter__(self) -> "AsyncSerialTransport":
+        self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:  # type: ignore[override]
+        self.close()
+
+
+__all__ = ["AsyncSerialTransport"]
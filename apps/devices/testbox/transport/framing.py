@@ -0,0 +1,108 @@
+"""Line framing over a reusable receive buffer."""
+
+from __future__ import annotations
+
+from typing import Any, Optional
+
+
+class LineFramer:
+    """Split a byte stream into lines using one preallocated ``bytearray``.
+
+    数据按块写入同一个缓冲区（``fill_from`` 直接 ``readinto`` 到 memoryview 切片），
+    已消费的前缀在空间不足时整体左移复用，而不是每行重新分配；只有单块数据
+    超过剩余容量时才扩容。``next_line(as_view=True)``/``lines(as_view=True)``
+    返回零拷贝的 memoryview，仅在下一次 ``feed``/``fill_from`` 之前有效。
+    """
+
+    __slots__ = ("newline", "_buf", "_view", "_start", "_end")
+
+    def __init__(self, newline: bytes = b"\n", *, capacity: int = 65536) -> None:
+        if not newline:
+            raise ValueError("newline must not be empty")
+        self.newline = newline
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._start = 0
+        self._end = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of buffered bytes not yet handed out."""
+
+        return self._end - self._start
+
+    def clear(self) -> None:
+        self._start = self._end = 0
+
+    def _reserve(self, size: int) -> None:
+        if self._end + size <= len(self._buf):
+            return
+        pending = self._end - self._start
+        if pending:
+            self._view[:pending] = self._view[self._start : self._end]
+        self._start, self._end = 0, pending
+        if pending + size > len(self._buf):
+            self._view.release()
+            self._buf.extend(bytes(max(pending + size - len(self._buf), len(self._buf))))
+            self._view = memoryview(self._buf)
+
+    def feed(self, data: bytes) -> None:
+        size = len(data)
+        self._reserve(size)
+        self._view[self._end : self._end + size] = data
+        self._end += size
+
+    def fill_from(self, stream: Any, size: int) -> int:
+        """``readinto`` up to ``size`` bytes from ``stream``; returns the byte count."""
+
+        self._reserve(size)
+        count = stream.readinto(self._view[self._end : self._end + size]) or 0
+        self._end += count
+        return count
+
+    def next_line(self, *, as_view: bool = False) -> Optional[bytes | memoryview]:
+        """Return the next complete line including ``newline``, or None."""
+
+        index = self._buf.find(self.newline, self._start, self._end)
+        if index < 0:
+            return None
+        stop = index + len(self.newline)
+        line = self._view[self._start : stop]
+        self._start = stop
+        if self._start == self._end:
+            self._start = self._end = 0
+        return line if as_view else line.tobytes()
+
+    def lines(self, *, as_view: bool = False) -> list[bytes | memoryview]:
+        out: list[bytes | memoryview] = []
+        while (line := self.next_line(as_view=as_view)) is not None:
+            out.append(line)
+        return out
+
+    def peek(self, size: int) -> memoryview:
+        """View up to ``size`` buffered bytes without consuming them."""
+
+        return self._view[self._start : min(self._start + size, self._end)]
+
+    def take_into(self, target: memoryview) -> int:
+        """Move up to ``len(target)`` buffered bytes into ``target``; returns the count."""
+
+        size = min(len(target), self._end - self._start)
+        target[:size] = self._view[self._start : self._start + size]
+        self._start += size
+        if self._start == self._end:
+            self._start = self._end = 0
+        return size
+
+    def take(self, size: int) -> bytes:
+        """Hand out up to ``size`` buffered bytes regardless of line boundaries."""
+
+        size = min(size, self._end - self._start)
+        data = self._view[self._start : self._start + size].tobytes()
+        self._start += size
+        if self._start == self._end:
+            self._start = self._end = 0
+        return data
+
+
+__all__ = ["LineFramer"]
@@ -0,0 +1,257 @@
+"""Pipelined SCPI request/response scheduler over ``AsyncSerialTransport``."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from ..parsers.scpi import build_command
+from .async_serial_transport import AsyncSerialTransport
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class SchedulerStats:
+    requests: int = 0
+    lines_sent: int = 0
+    #: 被合并进前一条指令行的请求数
+    merged: int = 0
+    timeouts: int = 0
+    unsolicited: int = 0
+
+
+class _Request:
+    __slots__ = ("text", "future", "deadline", "is_query", "timer")
+
+    def __init__(self, text: str, future: asyncio.Future[str], deadline: float) -> None:
+        self.text = text
+        self.future = future
+        self.deadline = deadline
+        self.is_query = text.rstrip().endswith("?")
+        self.timer: asyncio.TimerHandle | None = None
+
+    def resolve(self, result: str) -> None:
+        self.cancel_timer()
+        if not self.future.done():
+            self.future.set_result(result)
+
+    def fail(self, exc: BaseException) -> None:
+        self.cancel_timer()
+        if not self.future.done():
+            self.future.set_exception(exc)
+
+    def cancel_timer(self) -> None:
+        # 请求一旦有结果即撤销其截止定时器，避免事件循环堆积大量失效的 TimerHandle
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+
+class _InFlight:
+    __slots__ = ("queries", "deadline")
+
+    def __init__(self, queries: list[_Request]) -> None:
+        self.queries = queries
+        self.deadline = max(request.deadline for request in queries)
+
+
+def _join(requests: list[_Request]) -> str:
+    # 复合指令中后续单元以 ":" 回到根节点，避免继承前一条的子系统路径
+    parts = [requests[0].text]
+    parts.extend(text if text.startswith((":", "*")) else f":{text}" for text in (r.text for r in requests[1:]))
+    return ";".join(parts)
+
+
+class ScpiScheduler:
+    """Keep up to ``depth`` SCPI lines in flight and match responses FIFO.
+
+    - ``query()``/``submit()`` 使用 ``build_command`` 组装指令，返回 Future 或直接等待结果；
+      ``send()`` 用于无应答的设置类指令，与查询保持提交顺序。
+    - ``merge=True`` 时把排队中的相邻指令合并为一条 ``;`` 连接的复合指令（最多
+      ``max_merge`` 条），仪器对其中查询的应答同样以 ``;`` 分隔在一行返回。
+    - 每个请求有独立超时（请求完成时撤销其定时器）；队首指令行超过其截止时间仍无应答时
+      整体判定超时并出队，
+      此后若迟到的应答到达会与下一条错配，调用方应在超时后 ``reset`` 串口。
+    - 没有在途请求时收到的行交给 ``on_unsolicited``（例如仪器主动推送的进度记录）。
+    """
+
+    def __init__(
+        self,
+        transport: AsyncSerialTransport,
+        *,
+        depth: int = 4,
+        timeout: float = 1.0,
+        merge: bool = True,
+        max_merge: int = 8,
+        on_unsolicited: Optional[Callable[[bytes], None]] = None,
+    ) -> None:
+        if depth < 1:
+            raise ValueError("depth must be >= 1")
+        self._transport = transport
+        self.depth = depth
+        self.timeout = timeout
+        self.merge = merge
+        self.max_merge = max(1, max_merge)
+        self._on_unsolicited = on_unsolicited
+        self.stats = SchedulerStats()
+        self._pending: deque[_Request] = deque()
+        self._inflight: deque[_InFlight] = deque()
+        self._pending_added = asyncio.Event()
+        self._slots = asyncio.Semaphore(depth)
+        self._tasks: list[asyncio.Task[None]] = []
+        # 只为队首指令行挂一个 call_at 定时器，出队时改挂到新的队首
+        self._head_timer: asyncio.TimerHandle | None = None
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._transport.open()
+        self._tasks = [asyncio.create_task(self._send_loop()), asyncio.create_task(self._read_loop())]
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._fail_all(ConnectionError("scheduler stopped"))
+
+    async def __aenter__(self) -> "ScpiScheduler":
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:  # type: ignore[override]
+        await self.stop()
+
+    def submit(self, cmd: str, *args: object, timeout: float | None = None) -> asyncio.Future[str]:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[str] = loop.create_future()
+        deadline = loop.time() + (self.timeout if timeout is None else timeout)
+        request = _Request(build_command(cmd, *args).rstrip("\r\n"), future, deadline)
+        request.timer = loop.call_at(deadline, self._expire, request)
+        self._pending.append(request)
+        self._pending_added.set()
+        self.stats.requests += 1
+        return future
+
+    async def query(self, cmd: str, *args: object, timeout: float | None = None) -> str:
+        return await self.submit(cmd, *args, timeout=timeout)
+
+    async def send(self, cmd: str, *args: object, timeout: float | None = None) -> None:
+        """Queue a command without a response; returns once it has been written."""
+
+        await self.submit(cmd, *args, timeout=timeout)
+
+    def _expire(self, request: _Request) -> None:
+        request.timer = None
+        if not request.future.done():
+            self.stats.timeouts += 1
+            request.fail(asyncio.TimeoutError())
+
+    def _fail_all(self, exc: BaseException) -> None:
+        requests = list(self._pending) + [r for entry in self._inflight for r in entry.queries]
+        # 每条在途指令行占着一个 depth 槽位，丢弃时逐一归还，否则 stop()/start() 后无法再发送
+        for _ in self._inflight:
+            self._slots.release()
+        self._pending.clear()
+        self._inflight.clear()
+        self._arm_head_timer()
+        for request in requests:
+            request.fail(exc)
+
+    async def _send_loop(self) -> None:
+        pending = self._pending
+        while True:
+            while not pending:
+                self._pending_added.clear()
+                await self._pending_added.wait()
+            await self._slots.acquire()
+            batch: list[_Request] = []
+            limit = self.max_merge if self.merge else 1
+            while pending and len(batch) < limit:
+                request = pending.popleft()
+                if request.future.done():  # 排队期间已超时或被取消
+                    request.cancel_timer()
+                else:
+                    batch.append(request)
+            if not batch:
+                self._slots.release()
+                continue
+            queries = [request for request in batch if request.is_query]
+            if queries:
+                self._inflight.append(_InFlight(queries))
+                if len(self._inflight) == 1:
+                    self._arm_head_timer()
+            else:
+                self._slots.release()
+            self.stats.lines_sent += 1
+            self.stats.merged += len(batch) - 1
+            self._transport.write(_join(batch).encode("utf-8") + self._transport.newline)
+            await self._transport.drain()
+            for request in batch:
+                if not request.is_query:
+                    request.resolve("")
+
+    async def _read_loop(self) -> None:
+        # 直接等待下一行；超时由队首定时器处理，读循环不再为每行创建等待任务
+        read_line = self._transport.read_line
+        while True:
+            try:
+                line = await read_line()
+            except ConnectionError as exc:
+                self._fail_all(exc)
+                return
+            self._dispatch(line)
+
+    def _arm_head_timer(self) -> None:
+        if self._head_timer is not None:
+            self._head_timer.cancel()
+            self._head_timer = None
+        if self._inflight:
+            loop = asyncio.get_running_loop()
+            self._head_timer = loop.call_at(self._inflight[0].deadline, self._on_head_timeout)
+
+    def _on_head_timeout(self) -> None:
+        self._head_timer = None
+        if self._inflight:
+            logger.warning("SCPI response timed out on %s", self._transport.url)
+            self._complete(self._pop_head(), None)
+
+    def _pop_head(self) -> _InFlight:
+        entry = self._inflight.popleft()
+        self._arm_head_timer()
+        return entry
+
+    def _dispatch(self, line: bytes) -> None:
+        if not self._inflight:
+            self.stats.unsolicited += 1
+            if self._on_unsolicited is not None:
+                self._on_unsolicited(line)
+            return
+        self._complete(self._pop_head(), line.decode("utf-8", "replace").strip())
+
+    def _complete(self, entry: _InFlight, text: str | None) -> None:
+        self._slots.release()
+        queries = entry.queries
+        if text is None:
+            for request in queries:
+                self._expire(request)
+            return
+        parts = text.split(";") if len(queries) > 1 else [text]
+        if len(parts) != len(queries):
+            error = ValueError(f"expected {len(queries)} responses, got {text!r}")
+            for request in queries:
+                request.fail(error)
+            return
+        for request, part in zip(queries, parts):
+            request.resolve(part.strip())
+
+
+__all__ = ["SchedulerStats", "ScpiScheduler"]
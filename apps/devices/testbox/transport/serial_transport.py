@@ -8,6 +8,12 @@ from typing import Any, Optional
 from serial import SerialException, serial_for_url
 from serial.serialutil import SerialBase
 
+from ..parsers.scpi import decode_block, parse_block_header
+from .framing import LineFramer
+
+#: ``#`` + 位数 + 最多 9 位长度
+_BLOCK_HEADER_MAX = 11
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,6 +22,9 @@ class SerialTransport:
 
     默认使用 pyserial 的 ``loop://`` URL，实现无需真实仪器的回环调试。
     通过配置参数可覆盖常见串口特性（波特率、数据位、校验、流控等）。
+    接收侧经 ``LineFramer`` 分帧：每次按 ``in_waiting`` 整块读入复用的缓冲区，
+    再按 ``newline`` 切行，``read_lines()`` 一次返回当前已到达的全部整行。
+    ``read_block()`` 读取 IEEE 488.2 定长二进制块 ``#<n><len><data>``。
     """
 
     def __init__(
@@ -32,6 +41,7 @@ class SerialTransport:
         rtscts: bool = False,
         dsrdtr: bool = False,
         newline: bytes | str = b"\n",
+        read_buffer_size: int = 65536,
     ) -> None:
         self.url = url
         self.baudrate = baudrate
@@ -45,6 +55,8 @@ class SerialTransport:
         self.dsrdtr = dsrdtr
         self.newline = newline.encode() if isinstance(newline, str) else newline
         self._serial: Optional[SerialBase] = None
+        self._framer = LineFramer(self.newline, capacity=read_buffer_size)
+        self._block_buffer: Optional[bytearray] = None
 
     def _open_kwargs(self) -> dict[str, Any]:
         kwargs: dict[str, Any] = {
@@ -78,6 +90,7 @@ class SerialTransport:
         logger.info("Serial transport closing %s", self.url)
         self._serial.close()
         self._serial = None
+        self._framer.clear()
 
     def write(self, data: bytes) -> int:
         serial = self._ensure_open()
@@ -90,11 +103,92 @@ class SerialTransport:
 
     def read(self, size: int = 1) -> bytes:
         serial = self._ensure_open()
-        return serial.read(size)
+        buffered = self._framer.take(size)
+        if len(buffered) == size:
+            return buffered
+        return buffered + serial.read(size - len(buffered))
 
     def readline(self) -> bytes:
+        """Return one line including ``newline``; ``b""`` on timeout.
+
+        未凑成整行的数据保留在缓冲区，下次读取时继续拼接。
+        """
+
+        serial = self._ensure_open()
+        while True:
+            line = self._framer.next_line()
+            if line is not None:
+                return line  # type: ignore[return-value]
+            if not self._fill(serial):
+                return b""
+
+    def read_lines(self) -> list[bytes]:
+        """Return every complete line received so far, waiting up to ``timeout`` for the first."""
+
+        serial = self._ensure_open()
+        lines = self._framer.lines()
+        if not lines and self._fill(serial):
+            lines = self._framer.lines()
+        return lines  # type: ignore[return-value]
+
+    def read_block(self, *, into: Optional[bytearray] = None) -> memoryview:
+        """Read one definite-length binary block and return a view of its payload.
+
+        数据直接 ``readinto`` 预分配缓冲区（``into`` 或内部复用的缓冲区），不经过
+        中间 bytes；返回的视图在下一次 ``read_block`` 前有效。块后的换行终止符
+        在 ``timeout`` 内等待并一并丢弃。超时未读满时抛出 ``TimeoutError``。
+        """
+
         serial = self._ensure_open()
-        return serial.readline()
+        while (header := parse_block_header(bytes(self._framer.peek(_BLOCK_HEADER_MAX)))) is None:
+            if not self._fill(serial):
+                raise TimeoutError(f"timed out waiting for binary block header on {self.url}")
+        header_len, length = header
+        self._framer.take(header_len)
+
+        buffer = into if into is not None else self._block_buffer_for(length)
+        if len(buffer) < length:
+            raise ValueError(f"buffer of {len(buffer)} bytes cannot hold a {length}-byte block")
+        view = memoryview(buffer)[:length]
+        filled = self._framer.take_into(view)
+        while filled < length:
+            count = serial.readinto(view[filled:]) or 0
+            if not count:
+                raise TimeoutError(f"binary block truncated on {self.url}: {filled}/{length} bytes")
+            filled += count
+        self._discard_terminator(serial)
+        return view
+
+    def read_block_array(
+        self, dtype: str = "f4", byteorder: str = ">", *, into: Optional[bytearray] = None
+    ) -> Any:
+        """``read_block`` + :func:`decode_block`: the payload as a zero-copy NumPy array."""
+
+        return decode_block(self.read_block(into=into), dtype, byteorder)
+
+    def _block_buffer_for(self, length: int) -> bytearray:
+        # 不足时重新分配而非 extend：旧数组可能仍引用原缓冲区
+        if self._block_buffer is None or len(self._block_buffer) < length:
+            self._block_buffer = bytearray(length)
+        return self._block_buffer
+
+    def _discard_terminator(self, serial: SerialBase) -> None:
+        # 终止符可能晚于数据到达：在 timeout 内等待它，而不是只看一次 in_waiting
+        newline = self.newline
+        while self._framer.pending < len(newline):
+            if not self._fill(serial):
+                return
+        if bytes(self._framer.peek(len(newline))) == newline:
+            self._framer.take(len(newline))
+
+    def _fill(self, serial: SerialBase) -> int:
+        # 无数据时阻塞读 1 字节（受 timeout 约束），随后把已到达的数据一次读完
+        count = self._framer.fill_from(serial, max(serial.in_waiting, 1))
+        if count:
+            waiting = serial.in_waiting
+            if waiting:
+                count += self._framer.fill_from(serial, waiting)
+        return count
 
     def flush(self) -> None:
         serial = self._ensure_open()
@@ -104,6 +198,7 @@ class SerialTransport:
         serial = self._ensure_open()
         serial.reset_input_buffer()
         serial.reset_output_buffer()
+        self._framer.clear()
 
     @property
     def is_open(self) -> bool:
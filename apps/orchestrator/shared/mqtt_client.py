@@ -1,23 +1,52 @@
 """
 统一 MQTT 客户端工具，供各设备编排模块复用。
+
+``protocol="5"`` 时启用 MQTT v5：``share_group`` 让水平扩展的多个编排实例以
+``$share/<group>/`` 共享订阅分摊遥测，``publish_command`` 按命令的 ``timeout_s``
+设置消息过期，高频主题自动使用主题别名。
 """
-import paho.mqtt.client as mqtt
+from core.mqtt_v5 import MQTTv5Client, MQTTv5Settings, command_expiry_interval, connect_paho, create_paho_client, shared_filter
+
 
 class MQTTClient:
-    def __init__(self, broker_url, broker_port):
-        self.client = mqtt.Client()
+    def __init__(self, broker_url, broker_port, protocol="3.1.1", share_group=None, command_expiry_s=None, keepalive=60):
+        self.settings = MQTTv5Settings(protocol=str(protocol), share_group=share_group, command_expiry_s=command_expiry_s)
+        self.client = create_paho_client(self.settings, client_id="")
+        self._publisher = MQTTv5Client(self.client, self.settings) if self.settings.enabled else None
         self.broker_url = broker_url
         self.broker_port = broker_port
+        self.keepalive = keepalive
+
+    @classmethod
+    def from_config(cls, mqtt_cfg):
+        settings = MQTTv5Settings.from_mapping(mqtt_cfg)
+        return cls(
+            mqtt_cfg.get("broker_url", "localhost"),
+            mqtt_cfg.get("broker_port", 1883),
+            protocol=settings.protocol,
+            share_group=settings.share_group,
+            command_expiry_s=settings.command_expiry_s,
+        )
 
     def connect(self):
-        self.client.connect(self.broker_url, self.broker_port)
+        connect_paho(self._publisher or self.client, self.broker_url, self.broker_port, self.keepalive, self.settings)
 
-    def publish(self, topic, payload, qos=0, retain=False):
-        self.client.publish(topic, payload, qos, retain)
+    def publish(self, topic, payload, qos=0, retain=False, expiry_s=None):
+        if self._publisher is not None:
+            return self._publisher.publish(topic, payload, qos=qos, retain=retain, expiry_s=expiry_s)
+        return self.client.publish(topic, payload, qos, retain)
 
-    def subscribe(self, topic, callback):
-        self.client.subscribe(topic)
+    def publish_command(self, topic, payload, timeout_s=None, qos=1):
+        """下发 cmd/* 命令；v5 下超过 timeout_s 仍未投递的命令由 broker 丢弃。"""
+        expiry = command_expiry_interval(timeout_s, self.settings.command_expiry_s) if self._publisher else None
+        return self.publish(topic, payload, qos=qos, expiry_s=expiry)
+
+    def subscribe(self, topic, callback, qos=0, shared=True):
+        # 共享订阅按 $share/<group>/<topic> 订阅，但消息仍以原主题到达，回调按原主题注册
+        group = self.settings.share_group if (shared and self.settings.enabled) else None
+        self.client.subscribe(shared_filter(topic, group), qos)
         self.client.message_callback_add(topic, callback)
 
     def loop_forever(self):
         self.client.loop_forever()
+
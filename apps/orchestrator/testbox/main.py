@@ -13,11 +13,8 @@ if __name__ == "__main__":
     import yaml
     with open(config_path, "r", encoding="utf-8") as f:
         config = yaml.safe_load(f)
-    broker_url = config["mqtt"].get("broker_url", "localhost")
-    broker_port = config["mqtt"].get("broker_port", 1883)
-
-    # 初始化 MQTT 客户端和编排流程
-    mqtt_client = MQTTClient(broker_url, broker_port)
+    # 初始化 MQTT 客户端和编排流程（protocol/v5 配置见 config.yaml）
+    mqtt_client = MQTTClient.from_config(config["mqtt"])
     workflow = TestBoxWorkflow(mqtt_client, config_path=config_path)
 
     # 启动编排流程（下发命令并进入消息循环）
@@ -20,15 +20,14 @@ class TestBoxWorkflow:
             config = yaml.safe_load(f)
         self.base_topic = config["mqtt"].get("base_topic", "lab/local/line/device_testbox/TB-001")
 
-    def start(self, job_id=None, profile_id=None):
+    def start(self, job_id=None, profile_id=None, timeout_s=None):
         import logging
-        def on_connect(client, userdata, flags, rc):
+        def on_connect(client, userdata, flags, rc, properties=None):
             logging.info(f"[MQTT] Connected with result code {rc}")
             try:
-                client.subscribe(f"{self.base_topic}/tele/progress")
-                client.message_callback_add(f"{self.base_topic}/tele/progress", handle_progress)
-                client.subscribe(f"{self.base_topic}/tele/done")
-                client.message_callback_add(f"{self.base_topic}/tele/done", handle_result)
+                # v5 且配置了 share_group 时为共享订阅，多个编排实例分摊同一设备的遥测
+                self.mqtt.subscribe(f"{self.base_topic}/tele/progress", handle_progress)
+                self.mqtt.subscribe(f"{self.base_topic}/tele/done", handle_result)
                 if job_id and profile_id:
                     import json
                     topic = f"{self.base_topic}/cmd/run_diagnostic"
@@ -38,8 +37,10 @@ class TestBoxWorkflow:
                         "device_id": self.base_topic.split("/")[-1],
                         "params": {"profile": profile_id},
                     }
+                    if timeout_s:
+                        cmd["timeout_s"] = timeout_s
                     logging.info(f"[Orchestrator] 发布命令: {topic} {cmd}")
-                    client.publish(topic, json.dumps(cmd))
+                    self.mqtt.publish_command(topic, json.dumps(cmd), timeout_s=cmd.get("timeout_s"))
             except Exception as exc:
                 logging.error(f"MQTT on_connect error: {exc}")
 
@@ -0,0 +1,83 @@
+"""线程 → 事件循环的批量投递桥：MQTT 网络线程攒批，事件循环每批只唤醒一次。"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Generic, TypeVar
+
+from core.metrics import SIZE_BUCKETS, Histogram
+
+T = TypeVar("T")
+
+
+@dataclass(slots=True)
+class BridgeStats:
+    messages: int = 0
+    wakeups: int = 0
+    batch_size: Histogram = field(default_factory=lambda: Histogram(SIZE_BUCKETS))
+    #: 从 ``submit`` 到交给 sink 的耗时（秒）
+    latency_s: Histogram = field(default_factory=Histogram)
+
+    @property
+    def wakeups_per_message(self) -> float:
+        return self.wakeups / self.messages if self.messages else 0.0
+
+
+class LoopBridge(Generic[T]):
+    """Hand items from foreign threads to ``sink`` on the event loop in batches.
+
+    ``submit`` 可在任意线程调用：元素追加到 ``deque``（CPython 下 append/popleft
+    原子），仅当没有待执行的排空回调时才 ``call_soon_threadsafe`` 一次，
+    因此同一批内的消息共享一次自管道写入与一次回调，不再为每条消息创建
+    lambda/协程/Task。排空在事件循环线程执行，先清除调度标记再取数据，
+    保证并发 ``submit`` 的元素不会滞留。
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        sink: Callable[[list[T]], None],
+        *,
+        max_batch: int = 1024,
+    ) -> None:
+        self._loop = loop
+        self._sink = sink
+        self._max_batch = max_batch
+        self._buffer: deque[tuple[float, T]] = deque()
+        self._scheduled = False
+        self.stats = BridgeStats()
+
+    def submit(self, item: T) -> None:
+        self._buffer.append((time.monotonic(), item))
+        if not self._scheduled:
+            self._scheduled = True
+            self._loop.call_soon_threadsafe(self._drain)
+
+    def _drain(self) -> None:
+        buffer = self._buffer
+        stats = self.stats
+        stats.wakeups += 1
+        now = time.monotonic()
+        batch: list[T] = []
+        while buffer and len(batch) < self._max_batch:
+            submitted_at, item = buffer.popleft()
+            stats.latency_s.observe(now - submitted_at)
+            batch.append(item)
+        if buffer:
+            # 单批上限后让出事件循环，剩余部分在下一轮继续排空
+            self._loop.call_soon(self._drain)
+        else:
+            self._scheduled = False
+            if buffer:  # 清除标记前后有新元素到达
+                self._scheduled = True
+                self._loop.call_soon(self._drain)
+        if batch:
+            stats.messages += len(batch)
+            stats.batch_size.observe(len(batch))
+            self._sink(batch)
+
+
+__all__ = ["BridgeStats", "LoopBridge"]
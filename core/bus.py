@@ -0,0 +1,789 @@
+"""asyncio 原生消息总线：统一的 publish/subscribe/request 接口。
+
+生产环境由 ``PahoMessageBus`` 承载（paho 网络线程 → ``LoopBridge`` 单点回到事件循环），
+测试与基准使用 ``InMemoryBroker`` + ``InMemoryBus``，在进程内实现 MQTT 通配符、保留消息
+与 QoS 确认语义，可在没有网络噪声的情况下度量整条管道的吞吐。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Mapping, Optional
+
+from core.bridge import LoopBridge
+from core.mqtt_v5 import (
+    _V5_PROPERTY_NAMES,
+    MQTTv5Settings,
+    TopicAliasManager,
+    build_publish_properties,
+    connect_paho,
+    is_v5,
+    split_shared,
+)
+from core.reconnect import ConnectionManager, ReconnectPolicy
+from core.topics import TopicTrie, topic_matches, validate_filter
+
+logger = logging.getLogger(__name__)
+
+Payload = bytes | bytearray | memoryview | str
+
+
+def _as_bytes(payload: Payload) -> bytes:
+    if isinstance(payload, str):
+        return payload.encode("utf-8")
+    return bytes(payload)
+
+
+@dataclass(slots=True)
+class BusMessage:
+    """A received or published message.
+
+    ``properties`` 承载 MQTT v5 属性（``response_topic``、``correlation_data``、
+    ``message_expiry_interval``、``user_property`` 等）；v3.1.1 连接下会被忽略。
+    """
+
+    topic: str
+    payload: bytes
+    qos: int = 0
+    retain: bool = False
+    properties: dict[str, Any] = field(default_factory=dict)
+
+
+MessageCallback = Callable[[BusMessage], None]
+
+
+class Subscription:
+    """Local handle for one ``subscribe`` call.
+
+    给定 ``callback`` 时消息在事件循环中直接回调（不入队、不建任务）；否则写入内部
+    队列，可 ``async for`` 或 ``await get()`` 消费。``ready`` 在 broker 确认（SUBACK）后完成。
+    """
+
+    def __init__(
+        self,
+        bus: "MessageBus",
+        topic_filter: str,
+        qos: int,
+        callback: Optional[MessageCallback],
+        maxsize: int,
+    ) -> None:
+        self.bus = bus
+        self.topic_filter = topic_filter
+        #: ``$share/<group>/`` 前缀之外的过滤器，消息按它在本地匹配
+        self.share_group, self.local_filter = split_shared(topic_filter)
+        self.qos = qos
+        self._callback = callback
+        self._queue: Optional[asyncio.Queue[BusMessage]] = None if callback is not None else asyncio.Queue(maxsize)
+        self.ready: asyncio.Future[int] = asyncio.get_running_loop().create_future()
+        self.active = True
+        self.dropped = 0
+
+    def matches(self, topic: str) -> bool:
+        return topic_matches(self.local_filter, topic)
+
+    def deliver(self, message: BusMessage) -> None:
+        if self._callback is not None:
+            try:
+                self._callback(message)
+            except Exception:  # noqa: BLE001 - 单个订阅者异常不影响其它订阅
+                logger.exception("Bus subscriber for %s failed", self.topic_filter)
+            return
+        assert self._queue is not None
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def get(self) -> BusMessage:
+        if self._queue is None:
+            raise RuntimeError("callback subscriptions have no queue")
+        return await self._queue.get()
+
+    def __aiter__(self) -> AsyncIterator[BusMessage]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[BusMessage]:
+        while self.active:
+            yield await self.get()
+
+    def unsubscribe(self) -> None:
+        if self.active:
+            self.active = False
+            self.bus._remove_subscription(self)
+
+    async def __aenter__(self) -> "Subscription":
+        await self.ready
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:  # type: ignore[override]
+        self.unsubscribe()
+
+
+class MessageBus(ABC):
+    """Transport-independent async pub/sub with request/response.
+
+    - ``publish`` 在 QoS>0 时等待 broker 确认（PUBACK）；``publish_nowait`` 返回确认 Future，
+      供热路径批量发布后统一等待；
+    - ``subscribe`` 对同一过滤器做引用计数，只向 broker 订阅一次，本地按过滤器分发；
+    - ``request`` 使用 v5 的 ``response_topic``/``correlation_data``，应答方调用 ``respond``。
+    """
+
+    def __init__(self, *, client_id: str | None = None, reply_prefix: str = "_bus/reply") -> None:
+        self.client_id = client_id or f"bus-{uuid.uuid4().hex[:12]}"
+        self._subscriptions: list[Subscription] = []
+        # 本地分发按过滤器层级建前缀树，订阅数增大时匹配开销只随主题深度增长
+        self._routes: TopicTrie[Subscription] = TopicTrie()
+        self._filters: dict[str, int] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reply_prefix = f"{reply_prefix}/{self.client_id}"
+        self._reply_sub: Optional[Subscription] = None
+        self._pending_requests: dict[str, asyncio.Future[BusMessage]] = {}
+        self._request_ids = itertools.count(1)
+
+    # -- lifecycle -----------------------------------------------------------
+    async def connect(self) -> None:
+        self._loop = asyncio.get_running_loop()
+
+    async def close(self) -> None:
+        for future in self._pending_requests.values():
+            if not future.done():
+                future.set_exception(ConnectionError("bus closed"))
+        self._pending_requests.clear()
+
+    def is_connected(self) -> bool:
+        """Whether publishes currently reach the broker (transports with reconnects override)."""
+
+        return True
+
+    def max_inflight_messages_set(self, inflight: int) -> None:
+        """Set the QoS>0 in-flight window; in-process transports have none, so this is a no-op."""
+
+    async def __aenter__(self) -> "MessageBus":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:  # type: ignore[override]
+        await self.close()
+
+    # -- transport hooks -----------------------------------------------------
+    @abstractmethod
+    def _send(self, message: BusMessage) -> asyncio.Future[None]:
+        """Hand ``message`` to the transport; the future completes on acknowledgement."""
+
+    @abstractmethod
+    def _remote_subscribe(self, subscription: Subscription) -> None:
+        """Subscribe ``subscription.topic_filter`` at the broker and resolve ``subscription.ready``."""
+
+    @abstractmethod
+    def _remote_unsubscribe(self, topic_filter: str) -> None:
+        """Drop the broker-side subscription once no local subscriber needs it."""
+
+    # -- publishing ----------------------------------------------------------
+    def publish_nowait(
+        self,
+        topic: str,
+        payload: Payload,
+        *,
+        qos: int = 0,
+        retain: bool = False,
+        properties: Mapping[str, Any] | None = None,
+    ) -> asyncio.Future[None]:
+        if "+" in topic or "#" in topic:
+            raise ValueError(f"cannot publish to a wildcard topic: {topic!r}")
+        message = BusMessage(topic, _as_bytes(payload), qos, retain, dict(properties or {}))
+        return self._send(message)
+
+    async def publish(
+        self,
+        topic: str,
+        payload: Payload,
+        *,
+        qos: int = 0,
+        retain: bool = False,
+        properties: Mapping[str, Any] | None = None,
+    ) -> None:
+        await self.publish_nowait(topic, payload, qos=qos, retain=retain, properties=properties)
+
+    # -- subscribing ---------------------------------------------------------
+    def subscribe_nowait(
+        self,
+        topic_filter: str,
+        *,
+        qos: int = 0,
+        callback: Optional[MessageCallback] = None,
+        maxsize: int = 0,
+    ) -> Subscription:
+        validate_filter(topic_filter)
+        subscription = Subscription(self, topic_filter, qos, callback, maxsize)
+        self._subscriptions.append(subscription)
+        self._routes.insert(subscription.local_filter, subscription)
+        count = self._filters.get(topic_filter, 0)
+        self._filters[topic_filter] = count + 1
+        if count == 0:
+            self._remote_subscribe(subscription)
+        else:
+            subscription.ready.set_result(qos)
+        return subscription
+
+    async def subscribe(
+        self,
+        topic_filter: str,
+        *,
+        qos: int = 0,
+        callback: Optional[MessageCallback] = None,
+        maxsize: int = 0,
+    ) -> Subscription:
+        subscription = self.subscribe_nowait(topic_filter, qos=qos, callback=callback, maxsize=maxsize)
+        await subscription.ready
+        return subscription
+
+    def _remove_subscription(self, subscription: Subscription) -> None:
+        try:
+            self._subscriptions.remove(subscription)
+        except ValueError:
+            return
+        self._routes.remove(subscription.local_filter, subscription)
+        remaining = self._filters.get(subscription.topic_filter, 1) - 1
+        if remaining:
+            self._filters[subscription.topic_filter] = remaining
+            return
+        self._filters.pop(subscription.topic_filter, None)
+        self._remote_unsubscribe(subscription.topic_filter)
+
+    def _dispatch(self, message: BusMessage) -> None:
+        """Deliver an incoming message to every matching local subscription (loop thread)."""
+
+        for subscription in self._routes.match(message.topic):
+            if subscription.active:
+                subscription.deliver(message)
+
+    # -- request/response ----------------------------------------------------
+    async def request(
+        self,
+        topic: str,
+        payload: Payload,
+        *,
+        qos: int = 1,
+        timeout: float = 5.0,
+        properties: Mapping[str, Any] | None = None,
+    ) -> BusMessage:
+        if self._reply_sub is None:
+            self._reply_sub = await self.subscribe(f"{self._reply_prefix}/+", qos=qos, callback=self._on_reply)
+        correlation = f"{next(self._request_ids):x}"
+        future: asyncio.Future[BusMessage] = asyncio.get_running_loop().create_future()
+        self._pending_requests[correlation] = future
+        props = dict(properties or {})
+        # 应答主题末级即关联 ID，即使应答方未回传 correlation_data 也能匹配
+        props["response_topic"] = f"{self._reply_prefix}/{correlation}"
+        props["correlation_data"] = correlation.encode("ascii")
+        try:
+            await self.publish(topic, payload, qos=qos, properties=props)
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending_requests.pop(correlation, None)
+
+    def _on_reply(self, message: BusMessage) -> None:
+        correlation_data = message.properties.get("correlation_data")
+        correlation = (
+            bytes(correlation_data).decode("ascii", "replace")
+            if correlation_data is not None
+            else message.topic.rsplit("/", 1)[-1]
+        )
+        future = self._pending_requests.get(correlation)
+        if future is not None and not future.done():
+            future.set_result(message)
+
+    def respond(self, request: BusMessage, payload: Payload, *, qos: int = 1) -> asyncio.Future[None]:
+        """Publish ``payload`` to the request's ``response_topic``."""
+
+        response_topic = request.properties.get("response_topic")
+        if not response_topic:
+            raise ValueError(f"message on {request.topic} carries no response_topic")
+        props: dict[str, Any] = {}
+        if "correlation_data" in request.properties:
+            props["correlation_data"] = request.properties["correlation_data"]
+        return self.publish_nowait(response_topic, payload, qos=qos, properties=props)
+
+
+# -- in-memory broker ---------------------------------------------------------
+class _SharedGroup:
+    """Members of one ``$share/<group>/<filter>`` subscription, served round-robin."""
+
+    __slots__ = ("members", "next")
+
+    def __init__(self) -> None:
+        self.members: list[InMemoryBus] = []
+        self.next = 0
+
+    def pick(self) -> "InMemoryBus":
+        member = self.members[self.next % len(self.members)]
+        self.next += 1
+        return member
+
+
+class InMemoryBroker:
+    """Process-local broker with MQTT wildcard, retained and shared-subscription semantics.
+
+    每个 ``InMemoryBus`` 连接到同一个 broker 即相当于独立的 MQTT 客户端；消息经
+    ``call_soon_threadsafe`` 投递到订阅方所在的事件循环，QoS>0 的确认在 broker 接收后
+    即完成。``$share/<group>/`` 订阅在组内轮询投递，且不接收保留消息（与 MQTT v5 一致）。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subscribers: dict[str, set["InMemoryBus"]] = {}
+        self._routes: TopicTrie[InMemoryBus | _SharedGroup] = TopicTrie()
+        self._groups: dict[str, _SharedGroup] = {}
+        self._retained: dict[str, BusMessage] = {}
+        self.published = 0
+        self.delivered = 0
+
+    def attach(self, bus: "InMemoryBus", topic_filter: str) -> list[BusMessage]:
+        with self._lock:
+            subscribers = self._subscribers.setdefault(topic_filter, set())
+            group_name, local_filter = split_shared(topic_filter)
+            if bus not in subscribers:
+                subscribers.add(bus)
+                if group_name is None:
+                    self._routes.insert(topic_filter, bus)
+                else:
+                    group = self._groups.get(topic_filter)
+                    if group is None:
+                        group = self._groups[topic_filter] = _SharedGroup()
+                        self._routes.insert(local_filter, group)
+                    group.members.append(bus)
+            if group_name is not None:
+                return []
+            return [message for topic, message in self._retained.items() if topic_matches(topic_filter, topic)]
+
+    def detach(self, bus: "InMemoryBus", topic_filter: str | None = None) -> None:
+        with self._lock:
+            filters = [topic_filter] if topic_filter is not None else list(self._subscribers)
+            for item in filters:
+                subscribers = self._subscribers.get(item)
+                if subscribers is not None and bus in subscribers:
+                    subscribers.discard(bus)
+                    group = self._groups.get(item)
+                    if group is None:
+                        self._routes.remove(item, bus)
+                    else:
+                        group.members.remove(bus)
+                        if not group.members:
+                            del self._groups[item]
+                            self._routes.remove(split_shared(item)[1], group)
+                    if not subscribers:
+                        del self._subscribers[item]
+
+    def route(self, message: BusMessage) -> None:
+        with self._lock:
+            self.published += 1
+            if message.retain:
+                if message.payload:
+                    self._retained[message.topic] = message
+                else:
+                    self._retained.pop(message.topic, None)
+            # 同一客户端的多个重叠过滤器只投递一份；共享组每条消息只选一个成员
+            targets = dict.fromkeys(
+                entry.pick() if isinstance(entry, _SharedGroup) else entry
+                for entry in self._routes.match(message.topic)
+            )
+        # 实时转发的消息 retain 标志为 False，与 MQTT broker 行为一致
+        live = BusMessage(message.topic, message.payload, message.qos, False, message.properties)
+        for bus in targets:
+            self.delivered += 1
+            bus._receive(live)
+
+
+class InMemoryBus(MessageBus):
+    """``MessageBus`` connected to an ``InMemoryBroker``."""
+
+    def __init__(self, broker: InMemoryBroker, *, client_id: str | None = None) -> None:
+        super().__init__(client_id=client_id)
+        self.broker = broker
+        self._inbox: deque[BusMessage] = deque()
+        self._scheduled = False
+
+    async def close(self) -> None:
+        self.broker.detach(self)
+        await super().close()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        return self._loop
+
+    def _send(self, message: BusMessage) -> asyncio.Future[None]:
+        future: asyncio.Future[None] = self._ensure_loop().create_future()
+        self.broker.route(message)
+        future.set_result(None)
+        return future
+
+    def _receive(self, message: BusMessage) -> None:
+        # 同一轮发布的多条消息合并为一次回调，避免每条都调度
+        self._inbox.append(message)
+        if not self._scheduled:
+            self._scheduled = True
+            assert self._loop is not None
+            self._loop.call_soon_threadsafe(self._drain_inbox)
+
+    def _drain_inbox(self) -> None:
+        self._scheduled = False
+        inbox = self._inbox
+        while inbox:
+            self._dispatch(inbox.popleft())
+
+    def _remote_subscribe(self, subscription: Subscription) -> None:
+        self._ensure_loop()
+        retained = self.broker.attach(self, subscription.topic_filter)
+        subscription.ready.set_result(subscription.qos)
+        for message in retained:
+            subscription.deliver(message)
+
+    def _remote_unsubscribe(self, topic_filter: str) -> None:
+        self.broker.detach(self, topic_filter)
+
+
+# -- paho-backed bus ----------------------------------------------------------
+#: 无人登记的确认（如断线期间被丢弃的订阅、绕过总线直接发布的消息）最多保留的条数与时长；
+#: mid 为 16 位并会回绕，过期的早到确认不能留下来误配后来的同号消息
+_EARLY_ACK_LIMIT = 1024
+_EARLY_ACK_TTL_S = 30.0
+
+
+class PahoMessageBus(MessageBus):
+    """``MessageBus`` over a paho-mqtt client running its own network thread.
+
+    网络线程中的消息、PUBACK/SUBACK 统一经一个 ``LoopBridge`` 攒批交回事件循环，
+    取代各适配器各自的线程切换；``protocol="5"`` 时映射 v5 属性（请求/应答依赖于此），
+    并按 ``topic_alias_maximum`` 为高频主题分配主题别名（见 ``core.mqtt_v5``）。
+    每次 CONNACK 后以一个 SUBSCRIBE 恢复全部过滤器，断线期间发起的订阅在恢复时确认；
+    给定 ``reconnect`` 时由 ``core.reconnect.ConnectionManager`` 按抖动退避重连，
+    ``connection`` 提供重连统计与 ``add_connect_hook``。
+    """
+
+    def __init__(
+        self,
+        *,
+        host: str = "localhost",
+        port: int = 1883,
+        keepalive: int = 60,
+        client_id: str | None = None,
+        username: str | None = None,
+        password: str | None = None,
+        protocol: str = "3.1.1",
+        clean_session: bool = True,
+        topic_alias_maximum: int = 0,
+        settings: MQTTv5Settings | None = None,
+        reconnect: ReconnectPolicy | None = None,
+        client: Any | None = None,
+    ) -> None:
+        super().__init__(client_id=client_id)
+        try:
+            import paho.mqtt.client as mqtt  # type: ignore
+        except ImportError as exc:
+            raise RuntimeError("paho-mqtt 未安装，无法创建 MQTT 总线。请运行 'uv pip install paho-mqtt'。") from exc
+
+        self._mqtt = mqtt
+        self.host = host
+        self.port = port
+        self.keepalive = keepalive
+        self.settings = settings or MQTTv5Settings(protocol=protocol)
+        self.is_v5 = self.settings.enabled
+        self.aliases: Optional[TopicAliasManager] = (
+            TopicAliasManager(maximum=topic_alias_maximum, topics=self.settings.alias_topics)
+            if self.is_v5 and topic_alias_maximum > 0
+            else None
+        )
+        if client is None:
+            client = mqtt.Client(
+                mqtt.CallbackAPIVersion.VERSION2,
+                client_id=self.client_id,
+                protocol=mqtt.MQTTv5 if self.is_v5 else mqtt.MQTTv311,
+                clean_session=None if self.is_v5 else clean_session,
+            )
+        if username:
+            client.username_pw_set(username, password)
+        self.client = client
+        client.on_connect = self._on_connect
+        client.on_disconnect = self._on_disconnect
+        client.on_message = self._on_message
+        client.on_publish = self._on_publish
+        client.on_subscribe = self._on_subscribe
+        self.connection: Optional[ConnectionManager] = (
+            ConnectionManager(
+                client,
+                host=host,
+                port=port,
+                keepalive=keepalive,
+                settings=self.settings,
+                policy=reconnect,
+                connect_listener=self._on_connect,
+                disconnect_listener=self._on_disconnect,
+            )
+            if reconnect is not None
+            else None
+        )
+        self._ack_lock = threading.Lock()
+        self._acks: dict[int, asyncio.Future[Any] | list[asyncio.Future[Any]]] = {}
+        self._early_acks: OrderedDict[int, tuple[float, Any]] = OrderedDict()
+        # broker 端应有的订阅（过滤器 → QoS）；网络线程在 CONNACK 时读取，故以锁保护
+        self._sub_lock = threading.Lock()
+        self._remote: dict[str, int] = {}
+        self._unconfirmed: list[asyncio.Future[Any]] = []
+        self._online = False
+        self._bridge: Optional[LoopBridge[tuple[str, Any, Any]]] = None
+        self._connected: Optional[asyncio.Future[None]] = None
+
+    # -- lifecycle -----------------------------------------------------------
+    async def connect(self, *, wait: bool = True) -> None:
+        """Start the network thread; ``wait=False`` returns before the first CONNACK.
+
+        不等待时 broker 暂不可用也不会阻塞启动：期间的订阅在连上后统一发出，
+        发布由 paho（QoS≥1）或上层的 ``OutboundSpool`` 暂存。
+        """
+
+        await super().connect()
+        assert self._loop is not None
+        self._bridge = LoopBridge(self._loop, self._on_batch)
+        self._connected = self._loop.create_future()
+        if self.connection is not None:
+            self.connection.start()
+        else:
+            connect_paho(self.client, self.host, self.port, self.keepalive, self.settings, asynchronous=True)
+            self.client.loop_start()
+        if wait:
+            await self._connected
+        else:
+            self._connected.add_done_callback(_log_connect_failure)
+
+    async def close(self) -> None:
+        if self.connection is not None:
+            self.connection.stop()
+        else:
+            self.client.disconnect()
+            self.client.loop_stop()
+        with self._ack_lock:
+            acks, self._acks = self._acks, {}
+            self._early_acks.clear()
+        with self._sub_lock:
+            unconfirmed, self._unconfirmed = self._unconfirmed, []
+        for entry in [*acks.values(), unconfirmed]:
+            for future in entry if isinstance(entry, list) else [entry]:
+                if not future.done():
+                    future.set_exception(ConnectionError("bus closed"))
+                    # 热路径发布多为即发即弃，不让每个未确认的 Future 在关闭时都打一条错误日志
+                    future.exception()
+        await super().close()
+
+    def is_connected(self) -> bool:
+        return bool(self.client.is_connected())
+
+    def max_inflight_messages_set(self, inflight: int) -> None:
+        # 适配器经总线配置 paho 的 QoS1/2 未确认窗口（mqtt.telemetry.max_inflight）
+        self.client.max_inflight_messages_set(inflight)
+
+    # -- network-thread callbacks --------------------------------------------
+    def _on_connect(self, client: Any, userdata: Any, flags: Any, reason_code: Any, properties: Any = None) -> None:
+        assert self._bridge is not None
+        if getattr(reason_code, "is_failure", False):
+            self._bridge.submit(("connect", reason_code, None))
+            return
+        if self.aliases is not None:
+            self.aliases.restore_queued(client)
+            self.aliases.reset(int(getattr(properties, "TopicAliasMaximum", 0) or 0))
+        with self._sub_lock:
+            self._online = True
+            batch = list(self._remote.items())
+            waiting, self._unconfirmed = self._unconfirmed, []
+        if self.connection is not None:
+            self.connection.stats.resubscribed = len(batch)
+        if batch:
+            # clean session 下 broker 已丢弃旧订阅：一个 SUBSCRIBE 恢复全部过滤器
+            _, mid = client.subscribe(batch)
+            if waiting:
+                self._register_ack(mid, waiting)
+            logger.info("MQTT bus %s resubscribed %d filters", self.client_id, len(batch))
+        self._bridge.submit(("connect", reason_code, None))
+
+    def _on_disconnect(self, client: Any, userdata: Any, flags: Any, reason_code: Any, properties: Any = None) -> None:
+        with self._sub_lock:
+            self._online = False
+        logger.warning("MQTT bus %s disconnected: %s", self.client_id, reason_code)
+
+    def _on_message(self, client: Any, userdata: Any, message: Any) -> None:
+        assert self._bridge is not None
+        self._bridge.submit(("message", self._to_bus_message(message), None))
+
+    def _on_publish(self, client: Any, userdata: Any, mid: int, reason_code: Any = None, properties: Any = None) -> None:
+        self._ack_from_thread(mid, reason_code)
+
+    def _on_subscribe(self, client: Any, userdata: Any, mid: int, reason_codes: Any, properties: Any = None) -> None:
+        self._ack_from_thread(mid, reason_codes)
+
+    def _ack_from_thread(self, mid: int, result: Any) -> None:
+        with self._ack_lock:
+            target = self._acks.pop(mid, None)
+            if target is None:
+                # 确认先于登记到达（QoS0 或极快的 broker），或根本无人登记
+                self._remember_early_ack(mid, result)
+                return
+        assert self._bridge is not None
+        self._bridge.submit(("ack", target, result))
+
+    def _remember_early_ack(self, mid: int, result: Any) -> None:
+        early = self._early_acks
+        now = time.monotonic()
+        early.pop(mid, None)
+        early[mid] = (now, result)
+        while early:
+            oldest_mid, (seen_at, _) = next(iter(early.items()))
+            if len(early) <= _EARLY_ACK_LIMIT and now - seen_at <= _EARLY_ACK_TTL_S:
+                break
+            del early[oldest_mid]
+
+    def _register_ack(self, mid: int, target: asyncio.Future[Any] | list[asyncio.Future[Any]]) -> None:
+        with self._ack_lock:
+            early = self._early_acks.pop(mid, None)
+            if early is None or time.monotonic() - early[0] > _EARLY_ACK_TTL_S:
+                self._acks[mid] = target
+                return
+        assert self._bridge is not None
+        self._bridge.submit(("ack", target, early[1]))
+
+    def _on_batch(self, items: list[tuple[str, Any, Any]]) -> None:
+        for kind, first, second in items:
+            if kind == "message":
+                self._dispatch(first)
+            elif kind == "ack":
+                for future in first if isinstance(first, list) else (first,):
+                    if not future.done():
+                        future.set_result(second)
+            elif kind == "connect" and self._connected is not None and not self._connected.done():
+                if getattr(first, "is_failure", False):
+                    self._connected.set_exception(ConnectionError(f"MQTT connect refused: {first}"))
+                else:
+                    self._connected.set_result(None)
+
+    # -- transport hooks -----------------------------------------------------
+    def _send(self, message: BusMessage) -> asyncio.Future[None]:
+        assert self._loop is not None, "call connect() first"
+        future: asyncio.Future[Any] = self._loop.create_future()
+        topic, properties = message.topic, message.properties
+        if self.aliases is not None:
+            topic, alias = self.aliases.resolve(topic)
+            if alias is not None:
+                properties = {**properties, "topic_alias": alias}
+        info = self.client.publish(
+            topic,
+            message.payload,
+            qos=message.qos,
+            retain=message.retain,
+            properties=self._to_properties(properties),
+        )
+        if info.rc != self._mqtt.MQTT_ERR_SUCCESS and message.qos == 0:
+            # 断线期间 QoS0 消息直接丢弃，不会有 on_publish 回调
+            future.set_exception(ConnectionError(f"publish to {message.topic} failed: rc={info.rc}"))
+            return future
+        # QoS0 在写入套接字后确认，QoS1/2 在 PUBACK/PUBCOMP 后确认
+        self._register_ack(info.mid, future)
+        return future
+
+    def _remote_subscribe(self, subscription: Subscription) -> None:
+        with self._sub_lock:
+            self._remote[subscription.topic_filter] = subscription.qos
+            if not self._online:
+                # 连上后由 _on_connect 一并订阅并确认
+                self._unconfirmed.append(subscription.ready)
+                return
+        result, mid = self.client.subscribe(subscription.topic_filter, qos=subscription.qos)
+        if result != self._mqtt.MQTT_ERR_SUCCESS:
+            with self._sub_lock:
+                self._unconfirmed.append(subscription.ready)
+            return
+        self._register_ack(mid, subscription.ready)
+
+    def _remote_unsubscribe(self, topic_filter: str) -> None:
+        with self._sub_lock:
+            self._remote.pop(topic_filter, None)
+            online = self._online
+        if online:
+            self.client.unsubscribe(topic_filter)
+
+    # -- conversions ---------------------------------------------------------
+    def _to_properties(self, values: Mapping[str, Any]) -> Any:
+        if not self.is_v5:
+            return None
+        return build_publish_properties(values)
+
+    def _to_bus_message(self, message: Any) -> BusMessage:
+        properties: dict[str, Any] = {}
+        raw = getattr(message, "properties", None)
+        if raw is not None:
+            for key, name in _V5_PROPERTY_NAMES.items():
+                if hasattr(raw, name):
+                    properties[key] = getattr(raw, name)
+            if hasattr(raw, "UserProperty"):
+                properties["user_property"] = dict(raw.UserProperty)
+        return BusMessage(message.topic, bytes(message.payload), message.qos, bool(message.retain), properties)
+
+
+def _log_connect_failure(future: asyncio.Future[None]) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("MQTT bus connect failed: %s", future.exception())
+
+
+def publisher_for(client: Any) -> Callable[..., Any]:
+    """Return a sync ``publish(topic, payload, qos=, retain=)`` for a paho client or a bus."""
+
+    if isinstance(client, MessageBus):
+        return client.publish_nowait
+    return client.publish
+
+
+def build_bus(cfg: Mapping[str, Any] | None, *, broker: InMemoryBroker | None = None) -> MessageBus:
+    """Create a bus from ``bus: {type: memory|mqtt, ...}``.
+
+    ``mqtt`` 类型的其余键与 ``mqtt`` 配置段相同（``host``/``port``/``protocol``/``v5``/
+    ``reconnect`` 等），因此可直接传入 ``{**mqtt_cfg, "type": "mqtt"}``。
+    """
+
+    cfg = cfg or {}
+    kind = str(cfg.get("type", "mqtt")).lower()
+    if kind == "memory":
+        return InMemoryBus(broker or InMemoryBroker(), client_id=cfg.get("client_id"))
+    if kind == "mqtt":
+        settings = MQTTv5Settings.from_mapping(cfg)
+        return PahoMessageBus(
+            host=cfg.get("host", "localhost"),
+            port=int(cfg.get("port", 1883)),
+            keepalive=int(cfg.get("keepalive", 60)),
+            client_id=cfg.get("client_id"),
+            username=cfg.get("username"),
+            password=cfg.get("password"),
+            topic_alias_maximum=settings.topic_alias_maximum,
+            settings=settings,
+            reconnect=ReconnectPolicy.from_mapping(cfg.get("reconnect")),
+        )
+    raise ValueError(f"Unsupported bus type: {kind}")
+
+
+__all__ = [
+    "BusMessage",
+    "InMemoryBroker",
+    "InMemoryBus",
+    "MessageBus",
+    "PahoMessageBus",
+    "Subscription",
+    "build_bus",
+    "publisher_for",
+    "topic_matches",
+    "validate_filter",
+]
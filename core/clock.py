@@ -0,0 +1,229 @@
+"""可插拔时钟：真实、按倍速缩放与虚拟时间三种模式。
+
+驱动、Actor 与心跳只通过 ``Clock`` 读取时间、睡眠和设置超时，因此同一段代码既能
+按真实时长运行，也能在测试中把 300 s 的诊断压缩到毫秒级且保持事件顺序。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Callable, Mapping
+
+
+class Clock:
+    """Real wall-clock time; base class for the scaled and virtual clocks.
+
+    所有时长均以"模拟秒"为单位：``monotonic()`` 为单调时间，``now()`` 为带时区的
+    当前时刻，``sleep``/``call_later``/``timeout`` 的参数同样是模拟秒。
+    """
+
+    #: 每个真实秒对应的模拟秒数
+    speed: float = 1.0
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def now(self) -> datetime:
+        return datetime.now(timezone.utc)
+
+    async def sleep(self, delay: float) -> None:
+        await asyncio.sleep(max(0.0, delay))
+
+    def call_later(self, delay: float, callback: Callable[..., Any], *args: Any) -> Any:
+        """Schedule ``callback(*args)``; the returned handle has ``cancel()``."""
+
+        return asyncio.get_running_loop().call_later(max(0.0, delay), callback, *args)
+
+    def timeout(self, delay: float | None) -> contextlib.AbstractAsyncContextManager[Any]:
+        """Like ``asyncio.timeout`` with ``delay`` in clock seconds."""
+
+        return asyncio.timeout(delay)
+
+
+class RealClock(Clock):
+    """Explicit alias of the base clock, used when ``clock.mode: real``."""
+
+
+class ScaledClock(Clock):
+    """Run ``speed`` simulated seconds per real second (``speed=100``: 300 s → 3 s)."""
+
+    def __init__(self, speed: float) -> None:
+        if speed <= 0:
+            raise ValueError("clock speed must be > 0")
+        self.speed = float(speed)
+        self._origin = time.monotonic()
+        self._epoch = datetime.now(timezone.utc)
+
+    def monotonic(self) -> float:
+        return self._origin + (time.monotonic() - self._origin) * self.speed
+
+    def now(self) -> datetime:
+        return self._epoch + timedelta(seconds=self.monotonic() - self._origin)
+
+    async def sleep(self, delay: float) -> None:
+        await asyncio.sleep(max(0.0, delay) / self.speed)
+
+    def call_later(self, delay: float, callback: Callable[..., Any], *args: Any) -> Any:
+        return asyncio.get_running_loop().call_later(max(0.0, delay) / self.speed, callback, *args)
+
+    def timeout(self, delay: float | None) -> contextlib.AbstractAsyncContextManager[Any]:
+        return asyncio.timeout(None if delay is None else delay / self.speed)
+
+
+class VirtualTimer:
+    __slots__ = ("when", "callback", "args", "cancelled")
+
+    def __init__(self, when: float, callback: Callable[..., Any], args: tuple[Any, ...]) -> None:
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class VirtualClock(Clock):
+    """Discrete-event clock: time only moves when ``advance`` (or auto-advance) runs.
+
+    定时器按截止时间（相同时按登记顺序）触发。``auto_advance=True`` 时，只要存在待触发
+    定时器，后台任务会先让出事件循环 ``settle_steps`` 轮，使已就绪的协程跑完，再把时间
+    直接跳到最近的截止时间，因此 ``sleep(300)`` 几乎不占用真实时间。等待真实 I/O
+    （线程池、网络）的代码不会被"等完"，此类场景应改用 ``ScaledClock``。
+    """
+
+    speed = float("inf")
+
+    def __init__(
+        self,
+        *,
+        start: datetime | None = None,
+        auto_advance: bool = True,
+        settle_steps: int = 8,
+    ) -> None:
+        self._now = 0.0
+        self._epoch = start or datetime.now(timezone.utc)
+        self._timers: list[tuple[float, int, VirtualTimer]] = []
+        self._seq = itertools.count()
+        self.auto_advance = auto_advance
+        self.settle_steps = max(1, settle_steps)
+        self._advancer: asyncio.Task[None] | None = None
+
+    def monotonic(self) -> float:
+        return self._now
+
+    def now(self) -> datetime:
+        return self._epoch + timedelta(seconds=self._now)
+
+    @property
+    def pending(self) -> int:
+        return sum(1 for _, _, timer in self._timers if not timer.cancelled)
+
+    def call_later(self, delay: float, callback: Callable[..., Any], *args: Any) -> VirtualTimer:
+        timer = VirtualTimer(self._now + max(0.0, delay), callback, args)
+        heapq.heappush(self._timers, (timer.when, next(self._seq), timer))
+        if self.auto_advance and (self._advancer is None or self._advancer.done()):
+            self._advancer = asyncio.get_running_loop().create_task(self._auto_advance())
+        return timer
+
+    async def sleep(self, delay: float) -> None:
+        if delay <= 0:
+            await asyncio.sleep(0)
+            return
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        timer = self.call_later(delay, _resolve, future)
+        try:
+            await future
+        finally:
+            timer.cancel()
+
+    @contextlib.asynccontextmanager
+    async def timeout(self, delay: float | None) -> AsyncIterator[asyncio.Timeout]:
+        # 由 asyncio.Timeout 负责取消与 TimeoutError 转换，虚拟定时器只负责"何时到期"
+        async with asyncio.timeout(None) as scope:
+            timer = None if delay is None else self.call_later(delay, _expire, scope)
+            try:
+                yield scope
+            finally:
+                if timer is not None:
+                    timer.cancel()
+
+    def advance(self, seconds: float) -> int:
+        """Move time forward by ``seconds`` firing due timers in order; returns the count."""
+
+        return self._fire_until(self._now + max(0.0, seconds))
+
+    def advance_to_next(self) -> int:
+        """Jump to the earliest pending deadline and fire everything due then."""
+
+        self._drop_cancelled()
+        if not self._timers:
+            return 0
+        return self._fire_until(self._timers[0][0])
+
+    def _drop_cancelled(self) -> None:
+        timers = self._timers
+        while timers and timers[0][2].cancelled:
+            heapq.heappop(timers)
+
+    def _fire_until(self, deadline: float) -> int:
+        fired = 0
+        timers = self._timers
+        while timers and timers[0][0] <= deadline:
+            when, _, timer = heapq.heappop(timers)
+            if timer.cancelled:
+                continue
+            self._now = max(self._now, when)
+            timer.callback(*timer.args)
+            fired += 1
+        self._now = max(self._now, deadline)
+        return fired
+
+    async def _auto_advance(self) -> None:
+        while True:
+            for _ in range(self.settle_steps):
+                await asyncio.sleep(0)
+            self._drop_cancelled()
+            if not self._timers:
+                return
+            self.advance_to_next()
+
+
+def _resolve(future: asyncio.Future[None]) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def _expire(scope: asyncio.Timeout) -> None:
+    if scope.expired():
+        return
+    scope.reschedule(asyncio.get_running_loop().time())
+
+
+def build_clock(cfg: Mapping[str, Any] | None) -> Clock:
+    """Create a clock from ``clock: {mode: real|scaled|virtual, speed: 100}``."""
+
+    cfg = cfg or {}
+    mode = str(cfg.get("mode", "real")).lower()
+    if mode == "real":
+        return RealClock()
+    if mode == "scaled":
+        return ScaledClock(float(cfg.get("speed", 1.0)))
+    if mode == "virtual":
+        return VirtualClock(settle_steps=int(cfg.get("settle_steps", 8)))
+    raise ValueError(f"Unsupported clock mode: {mode}")
+
+
+__all__ = [
+    "Clock",
+    "RealClock",
+    "ScaledClock",
+    "VirtualClock",
+    "VirtualTimer",
+    "build_clock",
+]
@@ -0,0 +1,208 @@
+"""线上负载编解码注册表：按主题族（tele/state/cmd）选择 JSON 或二进制编码。"""
+
+from __future__ import annotations
+
+import json
+from abc import ABC, abstractmethod
+from typing import Any, ClassVar, Mapping, TypeVar
+
+from pydantic import BaseModel
+
+M = TypeVar("M", bound=BaseModel)
+
+#: 二进制负载的帧头首字节。JSON 负载总以 ``{``/``[`` 开头，二者不会冲突，
+#: 因此 JSON 保持裸格式以兼容现有订阅方，只有二进制编码携带内容类型标记：
+#: ``0x00 | len(content_type) | content_type | body``。
+FRAME_MARKER = 0x00
+
+
+class Codec(ABC):
+    """Encode pydantic models to wire bytes and back."""
+
+    name: ClassVar[str]
+    content_type: ClassVar[str]
+    binary: ClassVar[bool] = False
+
+    @abstractmethod
+    def encode(self, model: BaseModel) -> bytes:
+        raise NotImplementedError
+
+    @abstractmethod
+    def loads(self, payload: bytes) -> Any:
+        """Decode wire bytes into plain Python data (dict/list/scalars)."""
+        raise NotImplementedError
+
+    def decode(self, payload: bytes, model_type: type[M]) -> M:
+        return model_type.model_validate(self.loads(payload))
+
+
+class PydanticJSONCodec(Codec):
+    """The original path: ``model_dump_json()`` / ``json.loads``."""
+
+    name = "json"
+    content_type = "application/json"
+
+    def encode(self, model: BaseModel) -> bytes:
+        return model.model_dump_json().encode("utf-8")
+
+    def loads(self, payload: bytes) -> Any:
+        return json.loads(payload)
+
+    def decode(self, payload: bytes, model_type: type[M]) -> M:
+        return model_type.model_validate_json(payload)
+
+
+class FastJSONCodec(Codec):
+    """JSON via the pydantic-core serializer/validator directly.
+
+    直接调用 ``__pydantic_serializer__.to_json`` 得到 bytes，省去 str 中转与
+    Python 层包装；解码同样走 ``__pydantic_validator__.validate_json``。
+    """
+
+    name = "json-fast"
+    content_type = "application/json"
+
+    def encode(self, model: BaseModel) -> bytes:
+        return model.__pydantic_serializer__.to_json(model)
+
+    def loads(self, payload: bytes) -> Any:
+        return json.loads(payload)
+
+    def decode(self, payload: bytes, model_type: type[M]) -> M:
+        return model_type.__pydantic_validator__.validate_json(payload)
+
+
+class MsgpackCodec(Codec):
+    """Compact binary encoding using msgpack (optional dependency)."""
+
+    name = "msgpack"
+    content_type = "application/msgpack"
+    binary = True
+
+    def __init__(self) -> None:
+        try:
+            import msgpack  # type: ignore
+        except ImportError as exc:
+            raise RuntimeError("msgpack 未安装，无法启用 msgpack 编码。请运行 'uv sync --extra msgpack'。") from exc
+        self._msgpack = msgpack
+
+    def encode(self, model: BaseModel) -> bytes:
+        return self._msgpack.packb(model.model_dump(mode="json"), use_bin_type=True)
+
+    def loads(self, payload: bytes) -> Any:
+        return self._msgpack.unpackb(payload, raw=False)
+
+
+def frame(content_type: str, body: bytes) -> bytes:
+    marker = content_type.encode("ascii")
+    return bytes((FRAME_MARKER, len(marker))) + marker + body
+
+
+def unframe(payload: bytes) -> tuple[str | None, bytes]:
+    """Split a framed payload into ``(content_type, body)``; JSON yields ``(None, payload)``.
+
+    帧头不完整或内容类型不是 ASCII 时抛出 ``ValueError``。
+    """
+
+    if not payload or payload[0] != FRAME_MARKER:
+        return None, payload
+    if len(payload) < 2 or len(payload) < 2 + payload[1]:
+        raise ValueError("truncated frame")
+    length = payload[1]
+    try:
+        content_type = bytes(payload[2 : 2 + length]).decode("ascii")
+    except UnicodeDecodeError:
+        raise ValueError("unknown frame content type") from None
+    return content_type, payload[2 + length :]
+
+
+class CodecRegistry:
+    """Named codecs plus a per-topic-family selection.
+
+    ``families`` 形如 ``{"tele": "json-fast", "state": "json", "cmd": "msgpack"}``；
+    未配置的主题族使用 ``default``。解码时依据帧头选择编解码器，裸 JSON
+    交给该主题族配置的 JSON 编解码器（二进制主题族退回 ``json``）。
+    """
+
+    def __init__(self, *, default: str = "json") -> None:
+        self._codecs: dict[str, Codec] = {}
+        self._by_content_type: dict[str, Codec] = {}
+        self._families: dict[str, str] = {}
+        self._default = default
+
+    def register(self, codec: Codec) -> None:
+        self._codecs[codec.name] = codec
+        if codec.binary:
+            self._by_content_type[codec.content_type] = codec
+
+    def get(self, name: str) -> Codec:
+        try:
+            return self._codecs[name]
+        except KeyError:
+            raise KeyError(f"unknown codec {name!r}; registered: {sorted(self._codecs)}") from None
+
+    @property
+    def names(self) -> list[str]:
+        return sorted(self._codecs)
+
+    def configure(self, families: Mapping[str, str]) -> None:
+        for family, name in families.items():
+            self.get(name)
+            self._families[family] = name
+
+    def for_family(self, family: str) -> Codec:
+        return self.get(self._families.get(family, self._default))
+
+    def encode(self, family: str, model: BaseModel) -> bytes:
+        codec = self.for_family(family)
+        body = codec.encode(model)
+        return frame(codec.content_type, body) if codec.binary else body
+
+    def _codec_for_payload(self, family: str, payload: bytes) -> tuple[Codec, bytes]:
+        content_type, body = unframe(payload)
+        if content_type is None:
+            codec = self.for_family(family)
+            return (codec if not codec.binary else self.get("json")), body
+        try:
+            return self._by_content_type[content_type], body
+        except KeyError:
+            raise ValueError(f"unsupported content type {content_type!r}") from None
+
+    def loads(self, family: str, payload: bytes) -> Any:
+        codec, body = self._codec_for_payload(family, payload)
+        return codec.loads(body)
+
+    def decode(self, family: str, payload: bytes, model_type: type[M]) -> M:
+        codec, body = self._codec_for_payload(family, payload)
+        return codec.decode(body, model_type)
+
+
+def build_registry(families: Mapping[str, str] | None = None) -> CodecRegistry:
+    """Create a registry with the built-in codecs and apply the family mapping.
+
+    msgpack 为可选依赖：未安装时不注册，只有显式选用时才会报错。
+    """
+
+    registry = CodecRegistry()
+    registry.register(PydanticJSONCodec())
+    registry.register(FastJSONCodec())
+    try:
+        registry.register(MsgpackCodec())
+    except RuntimeError:
+        if families and "msgpack" in families.values():
+            raise
+    if families:
+        registry.configure(families)
+    return registry
+
+
+__all__ = [
+    "Codec",
+    "CodecRegistry",
+    "FastJSONCodec",
+    "MsgpackCodec",
+    "PydanticJSONCodec",
+    "build_registry",
+    "frame",
+    "unframe",
+]
@@ -0,0 +1,95 @@
+"""轻量级进程内指标：计数器与固定分桶直方图。"""
+
+from __future__ import annotations
+
+import math
+from bisect import bisect_left
+from typing import Any, Sequence
+
+# 1 µs ~ 10 s 的延迟分桶（秒）
+LATENCY_BUCKETS_S: tuple[float, ...] = (
+    1e-6,
+    5e-6,
+    1e-5,
+    5e-5,
+    1e-4,
+    5e-4,
+    1e-3,
+    5e-3,
+    1e-2,
+    5e-2,
+    0.1,
+    0.5,
+    1.0,
+    5.0,
+    10.0,
+)
+
+# 批大小、字节数等计数类分桶
+SIZE_BUCKETS: tuple[float, ...] = tuple(float(2**exp) for exp in range(13))
+
+
+class Histogram:
+    """Fixed-bucket histogram with count/sum/max and bucket-based percentiles.
+
+    ``observe`` 仅做一次二分查找与整数自增，可放在热路径上。
+    """
+
+    __slots__ = ("_bounds", "_counts", "count", "total", "max")
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS_S) -> None:
+        if list(bounds) != sorted(bounds):
+            raise ValueError("histogram bounds must be sorted")
+        self._bounds = tuple(bounds)
+        self._counts = [0] * (len(self._bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect_left(self._bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """Return the upper bound of the bucket holding the ``q`` quantile (0..1)."""
+
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for index, bucket in enumerate(self._counts):
+            seen += bucket
+            if seen >= rank:
+                return self._bounds[index] if index < len(self._bounds) else self.max
+        return self.max
+
+    def buckets(self) -> list[tuple[float, int]]:
+        """Return ``(upper_bound, count)`` pairs; the last bound is ``inf``."""
+
+        bounds = list(self._bounds) + [float("inf")]
+        return list(zip(bounds, self._counts))
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "p50": self.percentile(0.5),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+        }
+
+    def reset(self) -> None:
+        self._counts = [0] * (len(self._bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+__all__ = ["Histogram", "LATENCY_BUCKETS_S", "SIZE_BUCKETS"]
@@ -0,0 +1,361 @@
+"""MQTT v5 支持：连接参数、主题别名、共享订阅与消息过期。
+
+默认仍以 MQTT 3.1.1 连接；``mqtt.protocol: "5"`` 时：
+
+- ``TopicAliasManager`` 为高频遥测主题分配别名，同一连接内第二次起只发送 2 字节别名，
+  不再重复 ``lab/local/line/device_testbox/...`` 长主题；
+- ``shared_filter`` 生成 ``$share/<group>/<filter>``，同组的多个消费者由 broker 负载均衡；
+- ``command_expiry_interval`` 由命令的 ``timeout_s`` 推导消息过期时间：超时前仍未投递的
+  命令即使设备数小时后重连也不会再收到。
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+from dataclasses import dataclass
+from typing import Any, Mapping
+
+from core.topics import TopicTrie, validate_filter
+
+logger = logging.getLogger(__name__)
+
+V5_PROTOCOLS = frozenset({"5", "5.0", "v5", "mqttv5"})
+
+SHARE_PREFIX = "$share/"
+
+#: 默认参与别名分配的高频主题（进度、传感器快照、批量遥测与状态影子）
+DEFAULT_ALIAS_TOPICS: tuple[str, ...] = (
+    "lab/+/+/+/+/tele/progress",
+    "lab/+/+/+/+/tele/sensor_snapshot",
+    "lab/+/+/+/+/tele/batch",
+    "lab/+/+/+/+/state/shadow",
+)
+
+_V5_PROPERTY_NAMES = {
+    "response_topic": "ResponseTopic",
+    "correlation_data": "CorrelationData",
+    "message_expiry_interval": "MessageExpiryInterval",
+    "content_type": "ContentType",
+    "topic_alias": "TopicAlias",
+}
+
+
+def is_v5(protocol: Any) -> bool:
+    return str(protocol).strip().lower() in V5_PROTOCOLS
+
+
+def shared_filter(topic_filter: str, group: str | None) -> str:
+    """``$share/<group>/<filter>``; ``group=None`` returns the filter unchanged."""
+
+    if not group:
+        return topic_filter
+    if any(char in group for char in "/+#"):
+        raise ValueError(f"invalid shared subscription group: {group!r}")
+    validate_filter(topic_filter)
+    return f"{SHARE_PREFIX}{group}/{topic_filter}"
+
+
+def split_shared(topic_filter: str) -> tuple[str | None, str]:
+    """Return ``(group, filter)``; messages arrive on topics matching ``filter``."""
+
+    if not topic_filter.startswith(SHARE_PREFIX):
+        return None, topic_filter
+    group, _, inner = topic_filter[len(SHARE_PREFIX) :].partition("/")
+    if not group or not inner:
+        raise ValueError(f"malformed shared subscription: {topic_filter!r}")
+    return group, inner
+
+
+def command_expiry_interval(timeout_s: float | None, default_s: float | None = None) -> int | None:
+    """Message expiry (whole seconds) for a command with ``timeout_s``.
+
+    超过 ``timeout_s`` 仍未投递的命令即使开始执行也必然超时，因此以它作为过期时间；
+    未设置 ``timeout_s`` 时使用 ``default_s``，二者皆无则不过期。
+    """
+
+    value = timeout_s if timeout_s is not None else default_s
+    if value is None or value <= 0:
+        return None
+    return max(1, math.ceil(value))
+
+
+def build_publish_properties(values: Mapping[str, Any]) -> Any:
+    """Convert ``{"message_expiry_interval": 30, ...}`` into paho ``Properties`` (``None`` if empty)."""
+
+    if not values:
+        return None
+    from paho.mqtt.packettypes import PacketTypes  # type: ignore
+    from paho.mqtt.properties import Properties  # type: ignore
+
+    props = Properties(PacketTypes.PUBLISH)
+    for key, value in values.items():
+        if value is None:
+            continue
+        if key == "user_property":
+            props.UserProperty = list(value.items()) if isinstance(value, Mapping) else list(value)
+        elif key in _V5_PROPERTY_NAMES:
+            setattr(props, _V5_PROPERTY_NAMES[key], value)
+    return props
+
+
+@dataclass(slots=True)
+class MQTTv5Settings:
+    """``mqtt.protocol`` plus the optional ``mqtt.v5`` section.
+
+    ``topic_alias_maximum`` 为客户端愿意使用的别名上限，实际上限取其与 broker 在 CONNACK
+    中声明的 ``TopicAliasMaximum`` 的较小值；``clean_start: false`` 搭配
+    ``session_expiry_s`` 使 broker 在设备离线期间保留订阅与未过期的命令。
+    """
+
+    protocol: str = "3.1.1"
+    clean_start: bool = True
+    session_expiry_s: int = 0
+    topic_alias_maximum: int = 16
+    alias_topics: tuple[str, ...] = DEFAULT_ALIAS_TOPICS
+    share_group: str | None = None
+    command_expiry_s: float | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return is_v5(self.protocol)
+
+    @classmethod
+    def from_mapping(cls, mqtt_cfg: Mapping[str, Any] | None) -> "MQTTv5Settings":
+        mqtt_cfg = mqtt_cfg or {}
+        cfg = mqtt_cfg.get("v5") or {}
+        defaults = cls()
+        protocol = str(mqtt_cfg.get("protocol", defaults.protocol))
+        if not is_v5(protocol) and protocol not in {"3.1.1", "3.1", "311"}:
+            raise ValueError(f"Unsupported MQTT protocol: {protocol}")
+        expiry = cfg.get("command_expiry_s", defaults.command_expiry_s)
+        return cls(
+            protocol=protocol,
+            clean_start=bool(cfg.get("clean_start", defaults.clean_start)),
+            session_expiry_s=max(0, int(cfg.get("session_expiry_s", defaults.session_expiry_s))),
+            topic_alias_maximum=max(0, int(cfg.get("topic_alias_maximum", defaults.topic_alias_maximum))),
+            alias_topics=tuple(cfg.get("alias_topics") or defaults.alias_topics),
+            share_group=cfg.get("share_group") or defaults.share_group,
+            command_expiry_s=float(expiry) if expiry is not None else None,
+        )
+
+
+class TopicAliasManager:
+    """Assign per-connection topic aliases to hot topics, first come first served.
+
+    别名只在一条连接内有效：``reset`` 于每次 CONNACK 时调用并读取 broker 的
+    ``TopicAliasMaximum``（缺省为 0，即 broker 不接受别名）。首次发布某主题时携带完整主题
+    与别名以建立映射，之后以空主题 + 别名发布。别名用尽后其余主题照常发送完整主题。
+    """
+
+    def __init__(self, *, maximum: int = 16, topics: tuple[str, ...] = DEFAULT_ALIAS_TOPICS) -> None:
+        self.maximum = maximum
+        self._hot: TopicTrie[bool] = TopicTrie()
+        for topic_filter in topics:
+            self._hot.insert(topic_filter, True)
+        self._lock = threading.Lock()
+        self._limit = 0
+        self._aliases: dict[str, int] = {}
+        self._topics: dict[int, str] = {}
+        # 主题是否"热"与连接无关，按主题缓存以免每次发布都遍历前缀树
+        self._hot_cache: dict[str, bool] = {}
+        self.aliased = 0
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    def reset(self, broker_maximum: int) -> None:
+        with self._lock:
+            self._limit = max(0, min(self.maximum, broker_maximum))
+            self._aliases.clear()
+            self._topics.clear()
+
+    def resolve(self, topic: str) -> tuple[str, int | None]:
+        """Return ``(topic_to_send, alias)``; ``topic_to_send`` is empty once the alias is established."""
+
+        with self._lock:
+            alias = self._aliases.get(topic)
+            if alias is not None:
+                self.aliased += 1
+                return "", alias
+            if len(self._aliases) >= self._limit:
+                return topic, None
+            hot = self._hot_cache.get(topic)
+            if hot is None:
+                hot = self._hot_cache[topic] = bool(self._hot.match(topic))
+            if not hot:
+                return topic, None
+            alias = len(self._aliases) + 1
+            self._aliases[topic] = alias
+            self._topics[alias] = topic
+            return topic, alias
+
+    def topic_for(self, alias: int) -> str | None:
+        return self._topics.get(alias)
+
+    def restore_queued(self, client: Any) -> int:
+        """Re-expand alias-only messages still queued in paho before they are resent.
+
+        paho 在重连后按原样重发未确认的 QoS≥1 消息，而旧连接的别名对新连接无效；
+        ``on_connect`` 先于重发执行，此处把这些消息的主题还原为完整主题并去掉别名属性。
+        读取的是 paho 2.1 的私有 ``_out_messages``/``_out_message_mutex``（pyproject 中
+        限定了版本范围）；缺失时记录警告并跳过，排队的纯别名消息可能被 broker 拒绝。
+        """
+
+        messages = getattr(client, "_out_messages", None)
+        mutex = getattr(client, "_out_message_mutex", None)
+        if messages is None or mutex is None:
+            logger.warning(
+                "paho client %s has no _out_messages/_out_message_mutex; "
+                "queued alias-only messages cannot be restored",
+                type(client).__name__,
+            )
+            return 0
+        restored = 0
+        with mutex, self._lock:
+            for message in messages.values():
+                props = getattr(message, "properties", None)
+                alias = getattr(props, "TopicAlias", None) if props is not None else None
+                if alias is None:
+                    continue
+                if not message.topic:
+                    topic = self._topics.get(alias)
+                    if topic is None:
+                        continue
+                    message.topic = topic.encode("utf-8")  # paho 的 setter 接收 bytes
+                del props.TopicAlias
+                restored += 1
+        return restored
+
+
+def create_paho_client(
+    settings: MQTTv5Settings,
+    *,
+    client_id: str,
+    username: str | None = None,
+    password: str | None = None,
+) -> Any:
+    """Create a paho client for ``settings.protocol`` (3.1.1 keeps the previous defaults)."""
+
+    try:
+        import paho.mqtt.client as mqtt  # type: ignore
+    except ImportError as exc:
+        raise RuntimeError("paho-mqtt 未安装，无法创建 MQTT 客户端。请运行 'uv pip install paho-mqtt'。") from exc
+
+    if settings.enabled:
+        client = mqtt.Client(client_id=client_id, protocol=mqtt.MQTTv5)
+    else:
+        client = mqtt.Client(client_id=client_id, clean_session=True)
+    if username:
+        client.username_pw_set(username, password)
+    return client
+
+
+def connect_paho(
+    client: Any,
+    host: str,
+    port: int,
+    keepalive: int,
+    settings: MQTTv5Settings,
+    *,
+    asynchronous: bool = False,
+) -> None:
+    """``client.connect`` with v5 clean-start/session-expiry properties when enabled.
+
+    ``asynchronous=True`` 使用 ``connect_async``：连接由 ``loop_start`` 的网络线程建立，
+    broker 暂不可用时首次连接也按重连策略重试，而不是抛出异常。
+    """
+
+    connect = client.connect_async if asynchronous else client.connect
+    if not settings.enabled:
+        connect(host, port, keepalive)
+        return
+    if isinstance(client, MQTTv5Client):
+        client.install()
+    from paho.mqtt.packettypes import PacketTypes  # type: ignore
+    from paho.mqtt.properties import Properties  # type: ignore
+
+    props = Properties(PacketTypes.CONNECT)
+    if settings.session_expiry_s:
+        props.SessionExpiryInterval = settings.session_expiry_s
+    connect(host, port, keepalive, clean_start=settings.clean_start, properties=props)
+
+
+class MQTTv5Client:
+    """paho-compatible wrapper adding topic aliases and message expiry to ``publish``.
+
+    除 ``publish`` 外的属性与方法原样委托给底层 paho 客户端，因此可以直接替换适配器、
+    心跳等处的 ``client``；``on_connect`` 由本类接管，原回调仍会被调用（``connect_paho``
+    连接前会再次 ``install``，因此之后才赋值的 ``on_connect`` 也会被串接）。
+    """
+
+    def __init__(self, client: Any, settings: MQTTv5Settings) -> None:
+        self.client = client
+        self.settings = settings
+        self.aliases = TopicAliasManager(maximum=settings.topic_alias_maximum, topics=settings.alias_topics)
+        self._user_on_connect: Any = None
+        self.install()
+
+    def install(self) -> None:
+        current = self.client.on_connect
+        if current != self._on_connect:
+            self._user_on_connect = current
+            self.client.on_connect = self._on_connect
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    def _on_connect(self, client: Any, userdata: Any, flags: Any, reason_code: Any, properties: Any = None) -> None:
+        broker_maximum = int(getattr(properties, "TopicAliasMaximum", 0) or 0)
+        restored = self.aliases.restore_queued(client)
+        self.aliases.reset(broker_maximum)
+        logger.info("MQTT v5 connected: topic alias limit %d, %d queued messages restored", self.aliases.limit, restored)
+        if self._user_on_connect is not None:
+            self._user_on_connect(client, userdata, flags, reason_code, properties)
+
+    def publish(
+        self,
+        topic: str,
+        payload: Any = None,
+        qos: int = 0,
+        retain: bool = False,
+        properties: Any = None,
+        *,
+        expiry_s: float | None = None,
+    ) -> Any:
+        values: dict[str, Any] = {}
+        send_topic, alias = self.aliases.resolve(topic)
+        if alias is not None:
+            values["topic_alias"] = alias
+        if expiry_s is not None:
+            values["message_expiry_interval"] = max(1, math.ceil(expiry_s))
+        if properties is None:
+            properties = build_publish_properties(values)
+        else:
+            for key, value in values.items():
+                setattr(properties, _V5_PROPERTY_NAMES[key], value)
+        return self.client.publish(send_topic, payload, qos=qos, retain=retain, properties=properties)
+
+    def publish_command(self, topic: str, payload: Any, *, timeout_s: float | None, qos: int = 1) -> Any:
+        """Publish a ``cmd/*`` message that expires after ``timeout_s`` (or ``command_expiry_s``)."""
+
+        expiry = command_expiry_interval(timeout_s, self.settings.command_expiry_s)
+        return self.publish(topic, payload, qos=qos, expiry_s=expiry)
+
+
+__all__ = [
+    "DEFAULT_ALIAS_TOPICS",
+    "MQTTv5Client",
+    "MQTTv5Settings",
+    "SHARE_PREFIX",
+    "TopicAliasManager",
+    "build_publish_properties",
+    "command_expiry_interval",
+    "connect_paho",
+    "create_paho_client",
+    "is_v5",
+    "shared_filter",
+    "split_shared",
+]
@@ -1,8 +1,39 @@
-"""占位：通用重试/退避策略。"""
+"""通用重试/退避策略。"""
 
 from __future__ import annotations
 
+import random
+from typing import Optional
 
-def exponential_backoff(attempt: int, base: float = 0.5, factor: float = 2.0) -> float:
-    """占位公式：后续根据业务调整。"""
-    return base * (factor ** max(0, attempt - 1))
+JITTER_MODES = frozenset({"none", "full", "equal"})
+
+
+def exponential_backoff(
+    attempt: int,
+    base: float = 0.5,
+    factor: float = 2.0,
+    *,
+    max_delay: Optional[float] = None,
+    jitter: str = "none",
+    rng: Optional[random.Random] = None,
+) -> float:
+    """``base * factor**(attempt-1)``, optionally capped at ``max_delay`` and jittered.
+
+    ``jitter="full"`` 在 ``[0, delay]`` 内均匀取值，``"equal"`` 在 ``[delay/2, delay]`` 内取值；
+    broker 重启时整批设备同时断线，抖动把它们的重连分散开，避免同一时刻涌向 broker。
+    """
+
+    if jitter not in JITTER_MODES:
+        raise ValueError(f"unknown jitter mode: {jitter!r}")
+    delay = base * (factor ** max(0, attempt - 1))
+    if max_delay is not None:
+        delay = min(delay, max_delay)
+    if jitter == "none":
+        return delay
+    uniform = (rng or random).uniform
+    if jitter == "full":
+        return uniform(0.0, delay)
+    return delay / 2 + uniform(0.0, delay / 2)
+
+
+__all__ = ["JITTER_MODES", "exponential_backoff"]
@@ -0,0 +1,254 @@
+"""paho 连接管理：带抖动的指数退避重连与恢复指标。
+
+paho 的 ``loop_start`` 线程在断线后会自动重连，但等待时间固定为 ``min_delay`` 起的倍增，
+没有抖动；clean session 下重连后 broker 端的订阅也全部丢失。``ConnectionManager``：
+
+- 在 ``on_disconnect``/``on_connect_fail`` 中按 ``core.policies.retry_backoff.exponential_backoff``
+  计算下一次等待并通过 ``reconnect_delay_set`` 交给 paho（二者都在 paho 等待之前回调）；
+- 每次 CONNACK 先通知 ``connect_listener``（``PahoMessageBus`` 在其中以一个 SUBSCRIBE
+  批量恢复自己记录的订阅，并把过滤器数写入 ``stats.resubscribed``）；
+- 之后依次调用 ``add_connect_hook`` 登记的回调（如立即补发心跳），并统计重连次数与恢复耗时。
+
+它与 ``MQTTv5Client`` 一样是 paho 兼容的委托包装，可以直接作为各适配器的 ``client``。
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Mapping, Optional
+
+from core.metrics import Histogram
+from core.mqtt_v5 import MQTTv5Client, MQTTv5Settings, connect_paho
+from core.policies.retry_backoff import JITTER_MODES, exponential_backoff
+
+logger = logging.getLogger(__name__)
+
+#: 恢复耗时分桶（秒）：100 ms ~ 5 min
+RECOVERY_BUCKETS_S: tuple[float, ...] = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+@dataclass(slots=True)
+class ReconnectPolicy:
+    """``mqtt.reconnect`` section.
+
+    第 n 次重试等待 ``min(min_delay_s * factor**(n-1), max_delay_s)``，再按 ``jitter``
+    （``full``/``equal``/``none``）随机化；连接成功后重新从 ``min_delay_s`` 开始。
+    """
+
+    min_delay_s: float = 0.5
+    factor: float = 2.0
+    max_delay_s: float = 30.0
+    jitter: str = "full"
+
+    @classmethod
+    def from_mapping(cls, cfg: Mapping[str, Any] | None) -> "ReconnectPolicy":
+        cfg = cfg or {}
+        defaults = cls()
+        jitter = str(cfg.get("jitter", defaults.jitter)).lower()
+        if jitter not in JITTER_MODES:
+            raise ValueError(f"Unsupported reconnect jitter: {jitter}")
+        min_delay = max(0.01, float(cfg.get("min_delay_s", defaults.min_delay_s)))
+        return cls(
+            min_delay_s=min_delay,
+            factor=max(1.0, float(cfg.get("factor", defaults.factor))),
+            max_delay_s=max(min_delay, float(cfg.get("max_delay_s", defaults.max_delay_s))),
+            jitter=jitter,
+        )
+
+    def delay(self, attempt: int, rng: Optional[random.Random] = None) -> float:
+        return exponential_backoff(
+            attempt,
+            self.min_delay_s,
+            self.factor,
+            max_delay=self.max_delay_s,
+            jitter=self.jitter,
+            rng=rng,
+        )
+
+
+@dataclass(slots=True)
+class ConnectionStats:
+    connects: int = 0
+    #: 断线后重新连上的次数（不含首次连接）
+    reconnects: int = 0
+    disconnects: int = 0
+    failed_attempts: int = 0
+    #: 最近一次批量重订阅的过滤器数（由持有订阅表的上层，即 ``PahoMessageBus``，填写）
+    resubscribed: int = 0
+    last_recovery_s: float | None = None
+    #: 从检测到断线到收到 CONNACK 并发出重订阅的耗时
+    recovery_s: Histogram = field(default_factory=lambda: Histogram(RECOVERY_BUCKETS_S))
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+            "disconnects": self.disconnects,
+            "failed_attempts": self.failed_attempts,
+            "resubscribed": self.resubscribed,
+            "last_recovery_s": self.last_recovery_s,
+            "recovery_s": self.recovery_s.snapshot(),
+        }
+
+
+def _reason_value(reason_code: Any) -> int:
+    return int(getattr(reason_code, "value", reason_code) or 0)
+
+
+class ConnectionManager:
+    """Own a paho client's connect/reconnect cycle.
+
+    其余属性原样委托给被包装的客户端（paho 客户端或 ``MQTTv5Client``），回调与 paho
+    一样运行在网络线程中。订阅不在这里记录：``connect_listener``/``disconnect_listener``
+    以 paho 的回调签名接收每次 CONNACK（含被拒绝的）与断线，先于统计和连接钩子调用，
+    ``PahoMessageBus`` 在其中恢复自身的订阅表。
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        *,
+        host: str,
+        port: int = 1883,
+        keepalive: int = 60,
+        settings: MQTTv5Settings | None = None,
+        policy: ReconnectPolicy | None = None,
+        rng: Optional[random.Random] = None,
+        clock: Callable[[], float] = time.monotonic,
+        connect_listener: Callable[..., None] | None = None,
+        disconnect_listener: Callable[..., None] | None = None,
+    ) -> None:
+        self.client = client
+        self._raw = client.client if isinstance(client, MQTTv5Client) else client
+        self.host = host
+        self.port = port
+        self.keepalive = keepalive
+        self.settings = settings or MQTTv5Settings()
+        self.policy = policy or ReconnectPolicy()
+        self._rng = rng or random.Random()
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._connected = False
+        self._closing = False
+        self._attempt = 0
+        self._outage_started: float | None = None
+        self._hooks: list[Callable[[], None]] = []
+        self._connect_listener = connect_listener
+        self._disconnect_listener = disconnect_listener
+        self.stats = ConnectionStats()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    # -- lifecycle -----------------------------------------------------------
+    def install(self) -> None:
+        raw = self._raw
+        raw.on_connect = self._on_connect
+        raw.on_disconnect = self._on_disconnect
+        raw.on_connect_fail = self._on_connect_fail
+        raw.reconnect_delay_set(min_delay=self.policy.delay(1, self._rng), max_delay=self.policy.max_delay_s)
+
+    def start(self) -> None:
+        """Connect asynchronously and start paho's network thread; the first connect is retried too."""
+
+        self._closing = False
+        self._outage_started = self._clock()
+        self.install()
+        connect_paho(self.client, self.host, self.port, self.keepalive, self.settings, asynchronous=True)
+        self._raw.loop_start()
+
+    def stop(self) -> None:
+        self._closing = True
+        self._raw.disconnect()
+        self._raw.loop_stop()
+
+    def add_connect_hook(self, hook: Callable[[], None]) -> None:
+        """Run ``hook()`` in the network thread after every successful (re)connect."""
+
+        self._hooks.append(hook)
+
+    # -- network-thread callbacks --------------------------------------------
+    def _arm_backoff(self) -> None:
+        self._attempt += 1
+        delay = self.policy.delay(self._attempt, self._rng)
+        self._raw.reconnect_delay_set(min_delay=delay, max_delay=max(delay, self.policy.max_delay_s))
+        logger.info("MQTT reconnect attempt %d in %.2f s", self._attempt, delay)
+
+    def _on_connect(self, client: Any, userdata: Any, flags: Any, reason_code: Any, properties: Any = None) -> None:
+        if self._connect_listener is not None:
+            self._connect_listener(client, userdata, flags, reason_code, properties)
+        if _reason_value(reason_code) != 0:
+            logger.warning("MQTT connection refused: %s", reason_code)
+            return
+        now = self._clock()
+        with self._lock:
+            self._connected = True
+        recovered = self.stats.connects > 0
+        self.stats.connects += 1
+        if recovered:
+            self.stats.reconnects += 1
+            if self._outage_started is not None:
+                elapsed = now - self._outage_started
+                self.stats.last_recovery_s = elapsed
+                self.stats.recovery_s.observe(elapsed)
+                logger.info(
+                    "MQTT reconnected after %.2f s (%d attempts), resubscribed %d filters",
+                    elapsed,
+                    self._attempt,
+                    self.stats.resubscribed,
+                )
+        self._outage_started = None
+        self._attempt = 0
+        self._raw.reconnect_delay_set(min_delay=self.policy.delay(1, self._rng), max_delay=self.policy.max_delay_s)
+        for hook in self._hooks:
+            try:
+                hook()
+            except Exception:  # noqa: BLE001
+                logger.exception("MQTT connect hook failed")
+
+    def _on_disconnect(self, client: Any, userdata: Any, *args: Any) -> None:
+        if self._disconnect_listener is not None:
+            self._disconnect_listener(client, userdata, *args)
+        with self._lock:
+            was_connected, self._connected = self._connected, False
+        if self._closing:
+            return
+        if was_connected:
+            self.stats.disconnects += 1
+            self._outage_started = self._clock()
+            logger.warning("MQTT connection lost; reconnecting to %s:%s", self.host, self.port)
+        self._arm_backoff()
+
+    def _on_connect_fail(self, client: Any, userdata: Any) -> None:
+        self.stats.failed_attempts += 1
+        self._arm_backoff()
+
+
+def build_connection_manager(
+    client: Any,
+    mqtt_cfg: Mapping[str, Any],
+    settings: MQTTv5Settings | None = None,
+) -> ConnectionManager:
+    """Build a manager from the ``mqtt`` section (``host``/``port``/``keepalive``/``reconnect``)."""
+
+    return ConnectionManager(
+        client,
+        host=mqtt_cfg.get("host", "localhost"),
+        port=int(mqtt_cfg.get("port", 1883)),
+        keepalive=int(mqtt_cfg.get("keepalive", 60)),
+        settings=settings,
+        policy=ReconnectPolicy.from_mapping(mqtt_cfg.get("reconnect")),
+    )
+
+
+__all__ = [
+    "ConnectionManager",
+    "ConnectionStats",
+    "RECOVERY_BUCKETS_S",
+    "ReconnectPolicy",
+    "build_connection_manager",
+]
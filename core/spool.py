@@ -0,0 +1,345 @@
+"""磁盘分段外发缓冲：broker 不可用时把待发布消息落盘，恢复后限速重放。
+
+``OutboundSpool`` 位于遥测适配器与 MQTT 客户端之间：连接正常、在途窗口未满且磁盘上没有
+积压时直接发布；否则把消息追加到分段文件。重连后后台任务按 ``replay_rate`` 从最旧的分段
+依次重放，新消息在积压清空前继续落盘，因此整体（也即每台设备）保持先进先出；分段内
+所有记录都被 broker 确认后才删除文件。进程重启时目录中残留的分段会被重新加载并重放。
+
+语义为至少一次：重放到一半时进程退出，整个分段会在下次启动时再次发送。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import struct
+import zlib
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterator, Mapping, Optional
+
+from core.bus import publisher_for
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct(">II")  # body length, crc32(body)
+_META = struct.Struct(">BBH")  # qos, retain, topic length
+_SEGMENT_GLOB = "seg-*.log"
+
+
+@dataclass(slots=True)
+class SpoolRecord:
+    topic: str
+    payload: bytes
+    qos: int = 1
+    retain: bool = False
+
+
+def encode_record(record: SpoolRecord) -> bytes:
+    topic = record.topic.encode("utf-8")
+    body = _META.pack(record.qos, 1 if record.retain else 0, len(topic)) + topic + record.payload
+    return _HEADER.pack(len(body), zlib.crc32(body)) + body
+
+
+def iter_records(data: bytes) -> Iterator[SpoolRecord]:
+    """Decode records; stops quietly at a torn or corrupt tail (crash during append)."""
+
+    offset = 0
+    end = len(data)
+    while offset + _HEADER.size <= end:
+        length, crc = _HEADER.unpack_from(data, offset)
+        start = offset + _HEADER.size
+        if start + length > end or length < _META.size:
+            return
+        body = data[start : start + length]
+        if zlib.crc32(body) != crc:
+            logger.warning("Spool record at offset %d failed CRC check; ignoring the rest of the segment", offset)
+            return
+        qos, retain, topic_len = _META.unpack_from(body)
+        topic = body[_META.size : _META.size + topic_len].decode("utf-8")
+        yield SpoolRecord(topic, bytes(body[_META.size + topic_len :]), qos, bool(retain))
+        offset = start + length
+
+
+@dataclass(slots=True)
+class SpoolConfig:
+    """``mqtt.spool`` section; the spool is disabled unless ``dir`` is set.
+
+    ``segment_kb`` 为单个分段上限（也是重放时一次读入内存的上限），``max_mb`` 为磁盘总量
+    上限，超出时丢弃最旧的分段；``max_inflight`` 为直发与重放共享的未确认窗口，
+    ``replay_rate`` 为重连后的重放速率（条/秒）；``fsync: true`` 时每次追加后落盘。
+    """
+
+    directory: str | None = None
+    segment_bytes: int = 1024 * 1024
+    max_bytes: int = 256 * 1024 * 1024
+    max_inflight: int = 100
+    replay_rate: float = 500.0
+    fsync: bool = False
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    @classmethod
+    def from_mapping(cls, cfg: Mapping[str, Any] | None) -> "SpoolConfig":
+        cfg = cfg or {}
+        defaults = cls()
+        return cls(
+            directory=cfg.get("dir") or defaults.directory,
+            segment_bytes=max(1024, int(float(cfg.get("segment_kb", defaults.segment_bytes / 1024)) * 1024)),
+            max_bytes=max(1024, int(float(cfg.get("max_mb", defaults.max_bytes / 2**20)) * 2**20)),
+            max_inflight=max(1, int(cfg.get("max_inflight", defaults.max_inflight))),
+            replay_rate=max(1.0, float(cfg.get("replay_rate", defaults.replay_rate))),
+            fsync=bool(cfg.get("fsync", defaults.fsync)),
+        )
+
+
+@dataclass(slots=True)
+class SpoolStats:
+    direct: int = 0
+    spooled: int = 0
+    replayed: int = 0
+    #: 因超出 ``max_mb`` 被丢弃的分段数与字节数
+    dropped_segments: int = 0
+    dropped_bytes: int = 0
+    segments_deleted: int = 0
+
+
+class _Segment:
+    __slots__ = ("path", "size", "records", "next", "unacked", "sealed")
+
+    def __init__(self, path: Path, size: int, *, sealed: bool) -> None:
+        self.path = path
+        self.size = size
+        self.records: Optional[list[SpoolRecord]] = None
+        self.next = 0
+        self.unacked = 0
+        self.sealed = sealed
+
+    @property
+    def exhausted(self) -> bool:
+        return self.records is not None and self.next >= len(self.records)
+
+
+def _is_acked(handle: Any) -> bool:
+    if handle is None:
+        return True
+    if isinstance(handle, asyncio.Future):
+        if not handle.done():
+            return False
+        if not handle.cancelled():
+            handle.exception()  # 标记已读取，避免 "exception was never retrieved"
+        return True
+    is_published = getattr(handle, "is_published", None)
+    return bool(is_published()) if callable(is_published) else True
+
+
+class OutboundSpool:
+    """Bounded-memory, disk-backed outbound queue in front of a paho client or ``MessageBus``.
+
+    ``publish`` 与 paho 的 ``publish`` 签名兼容，可直接作为适配器的发布函数；返回值为
+    直发时客户端的确认句柄，落盘时为 ``None``。连接状态取自客户端的 ``is_connected()``
+    （没有该方法时视为始终在线）。
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        config: SpoolConfig,
+        *,
+        sender: Callable[..., Any] | None = None,
+        tick_s: float = 0.05,
+    ) -> None:
+        if not config.enabled:
+            raise ValueError("spool directory is not configured")
+        self.config = config
+        self._send = sender or publisher_for(client)
+        self._is_connected: Callable[[], bool] = getattr(client, "is_connected", None) or (lambda: True)
+        self._tick_s = tick_s
+        self._dir = Path(config.directory)  # type: ignore[arg-type]
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._segments: deque[_Segment] = deque()
+        self._next_seq = 1
+        for path in sorted(self._dir.glob(_SEGMENT_GLOB)):
+            self._segments.append(_Segment(path, path.stat().st_size, sealed=True))
+            self._next_seq = max(self._next_seq, int(path.stem.split("-", 1)[1]) + 1)
+        self._writer: Optional[BinaryIO] = None
+        self._inflight: deque[tuple[Any, Optional[_Segment]]] = deque()
+        self._credits = 0.0
+        self._task: Optional[asyncio.Task[None]] = None
+        self.stats = SpoolStats()
+        if self._segments:
+            logger.info(
+                "Spool %s holds %d segments (%d bytes) from a previous run", self._dir, len(self._segments), self.backlog_bytes
+            )
+
+    # -- introspection -------------------------------------------------------
+    @property
+    def backlog_bytes(self) -> int:
+        return sum(segment.size for segment in self._segments)
+
+    @property
+    def has_backlog(self) -> bool:
+        return bool(self._segments)
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    # -- lifecycle -----------------------------------------------------------
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._close_writer()
+
+    # -- publishing ----------------------------------------------------------
+    def publish(self, topic: str, payload: Any, qos: int = 0, retain: bool = False) -> Any:
+        self._prune()
+        if not self._segments and len(self._inflight) < self.config.max_inflight and self._is_connected():
+            handle = self._send(topic, payload, qos=qos, retain=retain)
+            self._inflight.append((handle, None))
+            self.stats.direct += 1
+            return handle
+        data = payload.encode("utf-8") if isinstance(payload, str) else bytes(payload)
+        self._append(encode_record(SpoolRecord(topic, data, qos, retain)))
+        return None
+
+    def _append(self, record: bytes) -> None:
+        tail = self._segments[-1] if self._segments else None
+        if tail is None or tail.sealed or self._writer is None:
+            tail = self._open_segment()
+        writer = self._writer
+        assert writer is not None
+        writer.write(record)
+        writer.flush()
+        if self.config.fsync:
+            os.fsync(writer.fileno())
+        tail.size += len(record)
+        self.stats.spooled += 1
+        if tail.size >= self.config.segment_bytes:
+            self._close_writer()
+        self._enforce_limit()
+
+    def _open_segment(self) -> _Segment:
+        path = self._dir / f"seg-{self._next_seq:012d}.log"
+        self._next_seq += 1
+        self._writer = open(path, "ab")
+        segment = _Segment(path, 0, sealed=False)
+        self._segments.append(segment)
+        return segment
+
+    def _close_writer(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._segments:
+            self._segments[-1].sealed = True
+
+    def _enforce_limit(self) -> None:
+        while self.backlog_bytes > self.config.max_bytes:
+            # 正在重放与正在写入的分段保留，丢弃其余最旧的一个
+            index = 1 if self._segments[0].records is not None else 0
+            if index >= len(self._segments) or not self._segments[index].sealed:
+                break
+            victim = self._segments[index]
+            del self._segments[index]
+            self.stats.dropped_segments += 1
+            self.stats.dropped_bytes += victim.size
+            logger.warning("Spool over %d bytes; dropped segment %s", self.config.max_bytes, victim.path.name)
+            victim.path.unlink(missing_ok=True)
+
+    # -- replay --------------------------------------------------------------
+    def _prune(self) -> None:
+        inflight = self._inflight
+        while inflight and _is_acked(inflight[0][0]):
+            _, segment = inflight.popleft()
+            if segment is not None:
+                segment.unacked -= 1
+                self._maybe_delete(segment)
+
+    def _maybe_delete(self, segment: _Segment) -> None:
+        if segment.unacked or not segment.exhausted:
+            return
+        if self._segments and self._segments[0] is segment:
+            self._segments.popleft()
+        segment.path.unlink(missing_ok=True)
+        segment.records = None
+        self.stats.segments_deleted += 1
+
+    def _next_record(self) -> tuple[SpoolRecord, _Segment] | None:
+        while self._segments:
+            head = self._segments[0]
+            if head.records is None:
+                if not head.sealed:
+                    # 重放追上了正在写的分段：封存它，之后的新消息写入新分段
+                    self._close_writer()
+                head.records = list(iter_records(head.path.read_bytes()))
+            if not head.exhausted:
+                record = head.records[head.next]
+                head.next += 1
+                return record, head
+            if head.unacked:
+                return None  # 等待该分段的确认后再继续，保证删除顺序
+            self._maybe_delete(head)
+        return None
+
+    def replay_step(self, budget: int) -> int:
+        """Send up to ``budget`` spooled records within the in-flight window; returns the count."""
+
+        self._prune()
+        if not self._segments or not self._is_connected():
+            return 0
+        sent = 0
+        while sent < budget and len(self._inflight) < self.config.max_inflight:
+            item = self._next_record()
+            if item is None:
+                break
+            record, segment = item
+            handle = self._send(record.topic, record.payload, qos=record.qos, retain=record.retain)
+            segment.unacked += 1
+            self._inflight.append((handle, segment))
+            sent += 1
+        self.stats.replayed += sent
+        self._prune()
+        return sent
+
+    async def _run(self) -> None:
+        rate = self.config.replay_rate
+        while True:
+            await asyncio.sleep(self._tick_s)
+            if not self._segments:
+                self._credits = 0.0
+                self._prune()
+                continue
+            # 令牌桶：每个 tick 累积 rate*tick 条额度，最多攒一个 tick 的突发
+            self._credits = min(self._credits + rate * self._tick_s, max(1.0, rate * self._tick_s))
+            sent = self.replay_step(int(self._credits))
+            self._credits -= sent
+
+
+def build_spool(client: Any, cfg: Mapping[str, Any] | SpoolConfig | None) -> OutboundSpool | None:
+    config = cfg if isinstance(cfg, SpoolConfig) else SpoolConfig.from_mapping(cfg)
+    return OutboundSpool(client, config) if config.enabled else None
+
+
+__all__ = [
+    "OutboundSpool",
+    "SpoolConfig",
+    "SpoolRecord",
+    "SpoolStats",
+    "build_spool",
+    "encode_record",
+    "iter_records",
+]
@@ -0,0 +1,311 @@
+"""主题过滤器匹配与按层级前缀树的订阅路由。
+
+README 约定的主题形如 ``lab/<site>/<line>/<deviceType>/<deviceId>/<channel>/<verb>``。
+监控成千上万台设备时，不再为每台设备注册精确主题回调（paho 按回调逐个线性匹配），
+而是由 ``TopicRouter`` 持有少量通配符订阅，按主题层级在 ``TopicTrie`` 中以 O(深度)
+匹配处理器；同一主题的解析与匹配结果被缓存，热路径上只剩一次字典查找。
+"""
+
+from __future__ import annotations
+
+import functools
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Generic, Iterable, Sequence, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def topic_matches(topic_filter: str, topic: str) -> bool:
+    """MQTT filter matching: ``+`` one level, ``#`` the rest; ``$`` topics need an explicit prefix."""
+
+    if topic.startswith("$") and topic_filter[:1] in {"+", "#"}:
+        return False
+    filter_parts = topic_filter.split("/")
+    topic_parts = topic.split("/")
+    for index, part in enumerate(filter_parts):
+        if part == "#":
+            return True
+        if index >= len(topic_parts):
+            return False
+        if part != "+" and part != topic_parts[index]:
+            return False
+    return len(filter_parts) == len(topic_parts)
+
+
+def validate_filter(topic_filter: str) -> None:
+    if not topic_filter:
+        raise ValueError("topic filter must not be empty")
+    parts = topic_filter.split("/")
+    for index, part in enumerate(parts):
+        if "#" in part and (part != "#" or index != len(parts) - 1):
+            raise ValueError(f"'#' must be the last level of a filter: {topic_filter!r}")
+        if "+" in part and part != "+":
+            raise ValueError(f"'+' must occupy a whole level: {topic_filter!r}")
+
+
+@dataclass(frozen=True, slots=True)
+class TopicAddress:
+    """A topic split into levels, with the README naming convention decoded.
+
+    不符合 ``lab/<site>/<line>/<type>/<id>/<channel>/<verb>`` 约定的主题各字段为 ``None``；
+    ``verb`` 可以包含多级（如 ``state/shadow/full``）。
+    """
+
+    topic: str
+    levels: tuple[str, ...]
+    site: str | None = None
+    line: str | None = None
+    device_type: str | None = None
+    device_id: str | None = None
+    channel: str | None = None
+    verb: str | None = None
+
+
+@functools.lru_cache(maxsize=65536)
+def parse_topic(topic: str) -> TopicAddress:
+    """Split ``topic`` once; repeated topics (the common case) hit the cache."""
+
+    levels = tuple(topic.split("/"))
+    if len(levels) < 7 or levels[0] != "lab":
+        return TopicAddress(topic, levels)
+    return TopicAddress(
+        topic,
+        levels,
+        site=levels[1],
+        line=levels[2],
+        device_type=levels[3],
+        device_id=levels[4],
+        channel=levels[5],
+        verb="/".join(levels[6:]),
+    )
+
+
+class _TrieNode:
+    __slots__ = ("children", "values")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _TrieNode] = {}
+        self.values: list[Any] = []
+
+
+class TopicTrie(Generic[T]):
+    """Topic filters keyed level by level; ``match`` visits O(depth) nodes per wildcard branch."""
+
+    def __init__(self) -> None:
+        self._root = _TrieNode()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def insert(self, topic_filter: str, value: T) -> None:
+        validate_filter(topic_filter)
+        node = self._root
+        for level in topic_filter.split("/"):
+            child = node.children.get(level)
+            if child is None:
+                child = node.children[level] = _TrieNode()
+            node = child
+        node.values.append(value)
+        self._size += 1
+
+    def remove(self, topic_filter: str, value: T) -> bool:
+        path: list[tuple[_TrieNode, str]] = []
+        node = self._root
+        for level in topic_filter.split("/"):
+            child = node.children.get(level)
+            if child is None:
+                return False
+            path.append((node, level))
+            node = child
+        try:
+            node.values.remove(value)
+        except ValueError:
+            return False
+        self._size -= 1
+        # 自底向上剪掉已空的分支，避免设备下线后残留节点
+        for parent, level in reversed(path):
+            child = parent.children[level]
+            if child.values or child.children:
+                break
+            del parent.children[level]
+        return True
+
+    def match(self, topic: str | Sequence[str]) -> list[T]:
+        levels = topic.split("/") if isinstance(topic, str) else topic
+        depth_total = len(levels)
+        # ``$SYS/...`` 等主题不被首级通配符匹配
+        system = depth_total > 0 and levels[0][:1] == "$"
+        results: list[T] = []
+        stack = [(self._root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            children = node.children
+            if depth == depth_total:
+                results.extend(node.values)
+                tail = children.get("#")  # ``a/#`` 同时匹配 ``a``
+                if tail is not None:
+                    results.extend(tail.values)
+                continue
+            if not (system and depth == 0):
+                tail = children.get("#")
+                if tail is not None:
+                    results.extend(tail.values)
+                single = children.get("+")
+                if single is not None:
+                    stack.append((single, depth + 1))
+            exact = children.get(levels[depth])
+            if exact is not None:
+                stack.append((exact, depth + 1))
+        return results
+
+
+RouteHandler = Callable[[TopicAddress, Any], None]
+
+
+@dataclass(slots=True)
+class RouterStats:
+    dispatched: int = 0
+    #: 命中订阅但没有处理器的消息（通配符订阅比处理器宽时出现）
+    unmatched: int = 0
+    cache_misses: int = 0
+
+
+def fleet_filters(topics: Iterable[str]) -> list[str]:
+    """Collapse per-device topics into ``+`` filters on the device-id level.
+
+    只合并符合命名约定、且除 ``<deviceId>`` 外完全相同的主题（例如所有设备的
+    ``.../cmd/run_diagnostic``）；其余主题保持原样，因此不会订阅到多余的通道。
+    """
+
+    groups: dict[str, list[str]] = {}
+    for topic in dict.fromkeys(topics):
+        address = parse_topic(topic)
+        if address.device_id is None or "+" in address.levels or "#" in address.levels:
+            groups.setdefault(topic, []).append(topic)
+            continue
+        levels = list(address.levels)
+        levels[4] = "+"
+        groups.setdefault("/".join(levels), []).append(topic)
+    return [key if len(members) > 1 else members[0] for key, members in groups.items()]
+
+
+class TopicRouter:
+    """Dispatch messages from a few wildcard subscriptions to per-topic handlers.
+
+    处理器签名为 ``handler(address, message)``，``address`` 是缓存的 ``TopicAddress``，
+    直接提供 ``device_id``/``channel``/``verb``，热路径上不再切分字符串。``on_message``
+    可作为 paho 回调在网络线程调用；``add``/``remove`` 在任意线程执行，会整体替换
+    解析缓存而不是原地修改。
+    """
+
+    def __init__(self, *, cache_size: int = 65536) -> None:
+        self._trie: TopicTrie[RouteHandler] = TopicTrie()
+        self._filters: dict[str, int] = {}
+        self._cache: dict[str, tuple[TopicAddress, tuple[RouteHandler, ...]]] = {}
+        self._cache_size = max(1, cache_size)
+        self._lock = threading.Lock()
+        self._attached: list[tuple[Any, str, Any]] = []
+        self.stats = RouterStats()
+
+    @property
+    def filters(self) -> list[str]:
+        return list(self._filters)
+
+    def add(self, topic_filter: str, handler: RouteHandler) -> None:
+        with self._lock:
+            self._trie.insert(topic_filter, handler)
+            self._filters[topic_filter] = self._filters.get(topic_filter, 0) + 1
+            self._cache = {}
+
+    def remove(self, topic_filter: str, handler: RouteHandler) -> bool:
+        with self._lock:
+            if not self._trie.remove(topic_filter, handler):
+                return False
+            remaining = self._filters[topic_filter] - 1
+            if remaining:
+                self._filters[topic_filter] = remaining
+            else:
+                del self._filters[topic_filter]
+            self._cache = {}
+            return True
+
+    def resolve(self, topic: str) -> tuple[TopicAddress, tuple[RouteHandler, ...]]:
+        cache = self._cache
+        entry = cache.get(topic)
+        if entry is None:
+            address = parse_topic(topic)
+            entry = (address, tuple(self._trie.match(address.levels)))
+            if len(cache) >= self._cache_size:
+                cache.clear()
+            # 写回读取时的那份缓存：若期间有 add/remove，旧缓存随之丢弃
+            cache[topic] = entry
+            self.stats.cache_misses += 1
+        return entry
+
+    def dispatch(self, topic: str, message: Any) -> int:
+        address, handlers = self.resolve(topic)
+        if not handlers:
+            self.stats.unmatched += 1
+            return 0
+        for handler in handlers:
+            try:
+                handler(address, message)
+            except Exception:  # noqa: BLE001 - 单个处理器异常不影响其它处理器
+                logger.exception("Topic handler for %s failed", topic)
+        self.stats.dispatched += 1
+        return len(handlers)
+
+    def on_message(self, client: Any, userdata: object, message: Any) -> None:
+        """paho ``message_callback_add`` signature."""
+
+        self.dispatch(message.topic, message)
+
+    def attach(self, client: Any, *, qos: int = 1, filters: Iterable[str] | None = None) -> list[str]:
+        """Subscribe ``client`` once per filter (default: ``fleet_filters(self.filters)``).
+
+        ``client`` 可以是 paho 客户端或 ``core.bus.MessageBus``。
+        """
+
+        from core.bus import MessageBus  # 避免与 core.bus 循环导入
+
+        subscribe_filters = list(filters) if filters is not None else fleet_filters(self._filters)
+        for topic_filter in subscribe_filters:
+            if isinstance(client, MessageBus):
+                handle = client.subscribe_nowait(topic_filter, qos=qos, callback=self._on_bus_message)
+            else:
+                client.subscribe(topic_filter, qos=qos)
+                client.message_callback_add(topic_filter, self.on_message)
+                handle = None
+            self._attached.append((client, topic_filter, handle))
+        logger.info("Topic router attached %d filters for %d routes", len(subscribe_filters), len(self._trie))
+        return subscribe_filters
+
+    def detach(self) -> None:
+        attached, self._attached = self._attached, []
+        for client, topic_filter, handle in attached:
+            if handle is not None:
+                handle.unsubscribe()
+                continue
+            client.message_callback_remove(topic_filter)
+            client.unsubscribe(topic_filter)
+
+    def _on_bus_message(self, message: Any) -> None:
+        self.dispatch(message.topic, message)
+
+
+__all__ = [
+    "RouteHandler",
+    "RouterStats",
+    "TopicAddress",
+    "TopicRouter",
+    "TopicTrie",
+    "fleet_filters",
+    "parse_topic",
+    "topic_matches",
+    "validate_filter",
+]
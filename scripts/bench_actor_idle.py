@@ -0,0 +1,99 @@
+"""Benchmark: idle CPU, wakeups and shutdown latency of many TestBox actors.
+
+用法::
+
+    uv run python -m scripts.bench_actor_idle --actors 1000 --idle 2.0
+
+对比当前事件驱动的 Actor 循环与旧版 ``wait_for(get_command(), 0.1)`` 轮询循环。
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from apps.devices.testbox.apps.actor import DeviceTestBoxActor, create_actor
+from apps.devices.testbox.domain.models import DeviceTestBoxRunCommand
+
+
+class _PollingActor(DeviceTestBoxActor):
+    """Previous loop implementation, kept here only as a baseline."""
+
+    async def run(self) -> None:
+        while True:
+            if self._stop_event.is_set() and self._command_queue.empty():
+                break
+            try:
+                command = await asyncio.wait_for(self._command_queue.get_command(), 0.1)
+            except asyncio.TimeoutError:
+                self.metrics.wakeups += 1
+                continue
+            self.metrics.wakeups += 1
+            if not isinstance(command, DeviceTestBoxRunCommand):
+                self._command_queue.task_done()
+                continue
+            try:
+                self.metrics.commands += 1
+                self.metrics.pickup_latency_s.observe(self._command_queue.last_wait_s)
+                await self._handle_command(command)
+            finally:
+                self._command_queue.task_done()
+
+
+async def _bench(actor_count: int, idle_s: float, polling: bool) -> dict[str, float]:
+    actors: list[DeviceTestBoxActor] = []
+    for index in range(actor_count):
+        runtime = create_actor({"device_id": f"TB-{index:04d}", "driver": {"type": "fake"}})
+        actor = runtime.actor
+        if polling:
+            actor.__class__ = _PollingActor
+        actors.append(actor)
+    tasks = [asyncio.create_task(actor.run()) for actor in actors]
+    await asyncio.sleep(0.2)
+
+    # 观测窗口内没有命令，期间的每次唤醒都是空转
+    wakeups_started = sum(actor.metrics.wakeups for actor in actors)
+    cpu_started = time.process_time()
+    await asyncio.sleep(idle_s)
+    idle_cpu = time.process_time() - cpu_started
+    idle_wakeups = sum(actor.metrics.wakeups for actor in actors) - wakeups_started
+
+    for actor in actors:
+        await actor._command_queue.put_command(  # noqa: SLF001 - benchmark access
+            DeviceTestBoxRunCommand(corr_id="bench", device_id=actor.device_id)
+        )
+    await asyncio.gather(*(actor._command_queue.join() for actor in actors))  # noqa: SLF001
+
+    stop_started = time.perf_counter()
+    for actor in actors:
+        actor.stop()
+    await asyncio.gather(*tasks)
+    shutdown_s = time.perf_counter() - stop_started
+
+    pickup_max = max(actor.metrics.pickup_latency_s.max for actor in actors)
+    return {
+        "idle_cpu_pct": 100.0 * idle_cpu / idle_s,
+        "idle_wakeups_per_s": idle_wakeups / idle_s,
+        "shutdown_ms": shutdown_s * 1000,
+        "pickup_max_ms": pickup_max * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--actors", type=int, default=1000)
+    parser.add_argument("--idle", type=float, default=2.0, help="空闲观测窗口（秒）")
+    args = parser.parse_args()
+
+    print(f"{'loop':>8} {'idle CPU %':>11} {'idle wakeups/s':>15} {'shutdown ms':>12} {'pickup max ms':>14}")
+    for label, polling in (("polling", True), ("event", False)):
+        row = asyncio.run(_bench(args.actors, args.idle, polling))
+        print(
+            f"{label:>8} {row['idle_cpu_pct']:>11.2f} {row['idle_wakeups_per_s']:>15.0f} "
+            f"{row['shutdown_ms']:>12.1f} {row['pickup_max_ms']:>14.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
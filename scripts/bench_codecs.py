@@ -0,0 +1,95 @@
+"""Benchmark: encode/decode throughput and payload size per codec and TestBox model.
+
+用法::
+
+    uv run python -m scripts.bench_codecs --iterations 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from pydantic import BaseModel
+
+from apps.devices.testbox.domain.models import (
+    DeviceTestBoxDoneEvent,
+    DeviceTestBoxProgressEvent,
+    DeviceTestBoxRunCommand,
+    DeviceTestBoxRunParams,
+    DeviceTestBoxSensorReading,
+    DeviceTestBoxSensorSnapshot,
+    DeviceTestBoxShadow,
+    DeviceTestBoxState,
+)
+from core.codecs import build_registry
+
+
+def _samples() -> list[BaseModel]:
+    return [
+        DeviceTestBoxRunCommand(
+            corr_id="job-1",
+            device_id="TB-001",
+            timeout_s=120.0,
+            params=DeviceTestBoxRunParams(duration_s=45.0, profile="burn-in"),
+        ),
+        DeviceTestBoxProgressEvent(
+            corr_id="job-1",
+            device_id="TB-001",
+            progress=0.4,
+            stage="sensor_calibration",
+            message="sensor_calibration completed",
+            metadata={"elapsed_s": 18.2, "device_id": "TB-001"},
+        ),
+        DeviceTestBoxDoneEvent(
+            corr_id="job-1",
+            device_id="TB-001",
+            duration_s=45.0,
+            summary="All diagnostics completed without anomalies.",
+            metadata={"profile": "burn-in", "device_id": "TB-001"},
+        ),
+        DeviceTestBoxSensorSnapshot(
+            corr_id="job-1",
+            device_id="TB-001",
+            sensors=[DeviceTestBoxSensorReading(name=f"ch{idx}", value=idx * 0.5, unit="V") for idx in range(16)],
+        ),
+        DeviceTestBoxShadow(
+            device_id="TB-001",
+            state=DeviceTestBoxState.BUSY,
+            last_command="testbox.run_diagnostic",
+            corr_id="job-1",
+            health="OK",
+            metadata={"stage": "sensor_calibration", "progress": 0.4},
+        ),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20_000)
+    args = parser.parse_args()
+
+    registry = build_registry()
+    print(f"{'model':>28} {'codec':>10} {'bytes':>6} {'encode/s':>10} {'decode/s':>10}")
+    for model in _samples():
+        model_type = type(model)
+        for name in registry.names:
+            registry.configure({"bench": name})
+            payload = registry.encode("bench", model)
+            assert registry.decode("bench", payload, model_type) == model
+
+            started = time.perf_counter()
+            for _ in range(args.iterations):
+                registry.encode("bench", model)
+            encode_rate = args.iterations / (time.perf_counter() - started)
+
+            started = time.perf_counter()
+            for _ in range(args.iterations):
+                registry.decode("bench", payload, model_type)
+            decode_rate = args.iterations / (time.perf_counter() - started)
+
+            print(f"{model_type.__name__:>28} {name:>10} {len(payload):>6} {encode_rate:>10.0f} {decode_rate:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
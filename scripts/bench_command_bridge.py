@@ -0,0 +1,105 @@
+"""Benchmark: paho-thread → asyncio command handoff, per-message vs batched bridge.
+
+用法::
+
+    uv run python -m scripts.bench_command_bridge --commands 20000
+
+模拟编排器向机架扇出命令的突发：一个线程连续调用 ``_on_message``，统计
+每条消息的事件循环唤醒次数、端到端入队延迟（提交 → 进入 ``CommandQueue``）与吞吐。
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from apps.devices.testbox.apps.queues import CommandQueue
+from apps.devices.testbox.domain.models import DeviceTestBoxRunCommand
+from apps.devices.testbox.drivers.command_adapter import CommandTopicLayout, MQTTCommandAdapter
+from core.metrics import Histogram
+
+LAYOUT = CommandTopicLayout(base_topic="lab/bench/device_testbox/TB-001")
+
+
+@dataclass
+class _Message:
+    topic: str
+    payload: bytes
+
+
+class _LegacyAdapter(MQTTCommandAdapter):
+    """The previous per-message ``call_soon_threadsafe(create_task(...))`` handoff."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.wakeups = 0
+        self.latency_s = Histogram()
+
+    def _enqueue_command(self, command: DeviceTestBoxRunCommand) -> None:
+        submitted_at = time.monotonic()
+
+        async def _put() -> None:
+            await self._command_queue.offer(command)
+            self.latency_s.observe(time.monotonic() - submitted_at)
+
+        def _schedule() -> None:
+            self.wakeups += 1
+            asyncio.create_task(_put())
+
+        self._loop.call_soon_threadsafe(_schedule)
+
+
+async def _bench(commands: int, legacy: bool) -> dict[str, float]:
+    loop = asyncio.get_running_loop()
+    queue = CommandQueue()
+    adapter_cls = _LegacyAdapter if legacy else MQTTCommandAdapter
+    adapter = adapter_cls(client=None, loop=loop, command_queue=queue, topic_layout=LAYOUT)
+    payloads = [
+        DeviceTestBoxRunCommand(corr_id=f"c-{idx}", device_id="TB-001").model_dump_json().encode("utf-8")
+        for idx in range(commands)
+    ]
+
+    def burst() -> None:
+        for payload in payloads:
+            adapter._on_message(None, None, _Message(LAYOUT.run_diagnostic, payload))
+
+    started = time.perf_counter()
+    producer = threading.Thread(target=burst)
+    producer.start()
+    for _ in range(commands):
+        await queue.get()
+    elapsed = time.perf_counter() - started
+    producer.join()
+
+    if legacy:
+        wakeups, latency = adapter.wakeups, adapter.latency_s
+    else:
+        wakeups, latency = adapter.ingest_stats.wakeups, adapter.ingest_stats.latency_s
+    return {
+        "cmd_per_s": commands / elapsed,
+        "wakeups_per_msg": wakeups / commands,
+        "p50_ms": latency.percentile(0.5) * 1000,
+        "p99_ms": latency.percentile(0.99) * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commands", type=int, default=20_000)
+    args = parser.parse_args()
+
+    print(f"{'handoff':>12} {'cmd/s':>10} {'wakeups/msg':>12} {'p50 ms':>8} {'p99 ms':>8}")
+    for label, legacy in (("per-message", True), ("bridge", False)):
+        row = asyncio.run(_bench(args.commands, legacy))
+        print(
+            f"{label:>12} {row['cmd_per_s']:>10.0f} {row['wakeups_per_msg']:>12.3f} "
+            f"{row['p50_ms']:>8.2f} {row['p99_ms']:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark: MQTTCommandAdapter ingest rate for valid, defaulted and invalid payloads.
+
+用法::
+
+    uv run python -m scripts.bench_command_ingest --iterations 50000
+
+对比旧路径（decode → ``json.loads`` → ``model_validate``，失败时补 ``params`` 再校验一次）
+与当前的单次 bytes 校验路径，只测解析，不经过事件循环入队。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import time
+from typing import Any, Callable, Optional
+
+from apps.devices.testbox.domain.models import DeviceTestBoxRunCommand, DeviceTestBoxRunParams
+from apps.devices.testbox.drivers.command_adapter import CommandTopicLayout, MQTTCommandAdapter
+
+TOPIC = "lab/bench/device_testbox/TB-001/cmd/run_diagnostic"
+
+PAYLOADS = {
+    "valid": json.dumps(
+        {
+            "corr_id": "job-1",
+            "device_id": "TB-001",
+            "timeout_s": 30,
+            "params": {"duration_s": 12.5, "profile": "burn-in"},
+        }
+    ).encode("utf-8"),
+    "defaulted": json.dumps({"corr_id": "job-2", "device_id": "TB-001", "params": None}).encode("utf-8"),
+    "invalid": json.dumps({"device_id": "TB-001", "params": {"duration_s": 0}}).encode("utf-8"),
+}
+
+
+def _legacy_parse(payload: bytes) -> Optional[DeviceTestBoxRunCommand]:
+    try:
+        data = json.loads(payload.decode("utf-8"))
+    except Exception:  # noqa: BLE001
+        return None
+    try:
+        return DeviceTestBoxRunCommand.model_validate(data)
+    except Exception:  # noqa: BLE001
+        if "params" not in data or data["params"] is None:
+            data["params"] = DeviceTestBoxRunParams().model_dump(exclude_none=True)
+            try:
+                return DeviceTestBoxRunCommand.model_validate(data)
+            except Exception:  # noqa: BLE001
+                return None
+        return None
+
+
+def _rate(parse: Callable[[bytes], Any], payload: bytes, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        parse(payload)
+    return iterations / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50_000)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    adapter = MQTTCommandAdapter(
+        client=None,
+        loop=None,  # type: ignore[arg-type]
+        command_queue=None,  # type: ignore[arg-type]
+        topic_layout=CommandTopicLayout(base_topic=TOPIC.rsplit("/cmd/", 1)[0]),
+    )
+
+    def single_pass(payload: bytes) -> Optional[DeviceTestBoxRunCommand]:
+        return adapter._decode_command(TOPIC, payload)
+
+    print(f"{'payload':>10} {'legacy cmd/s':>13} {'single cmd/s':>13} {'speedup':>8}")
+    for label, payload in PAYLOADS.items():
+        legacy = _rate(_legacy_parse, payload, args.iterations)
+        current = _rate(single_pass, payload, args.iterations)
+        print(f"{label:>10} {legacy:>13.0f} {current:>13.0f} {current / legacy:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
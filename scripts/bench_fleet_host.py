@@ -0,0 +1,125 @@
+"""Benchmark: memory per device and commands/s of the TestBox fleet host.
+
+用法::
+
+    uv run python -m scripts.bench_fleet_host --devices 1 10 100 500 --commands 5
+
+使用进程内的回环 MQTT 客户端，不依赖 broker；命令通过与 paho 相同的
+``message_callback_add`` 回调注入，遥测在 ``publish`` 处计数。
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict
+
+from apps.devices.testbox.apps.fleet import FleetMQTTHost, create_fleet
+from core.topics import topic_matches
+
+
+@dataclass
+class _Message:
+    topic: str
+    payload: bytes
+
+
+class _LoopbackClient:
+    """Minimal paho-compatible client counting ``tele/done`` publishes."""
+
+    def __init__(self) -> None:
+        self._callbacks: Dict[str, Callable[[Any, Any, _Message], None]] = {}
+        self.done = 0
+        self.published = 0
+        self.target = 0
+        self.finished = asyncio.Event()
+
+    def subscribe(self, topic: str, qos: int = 0) -> None:
+        pass
+
+    def unsubscribe(self, topic: str) -> None:
+        pass
+
+    def message_callback_add(self, topic: str, callback: Callable[[Any, Any, _Message], None]) -> None:
+        self._callbacks[topic] = callback
+
+    def message_callback_remove(self, topic: str) -> None:
+        self._callbacks.pop(topic, None)
+
+    def publish(self, topic: str, payload: Any, qos: int = 0, retain: bool = False) -> None:
+        self.published += 1
+        if topic.endswith("/tele/done"):
+            self.done += 1
+            if self.done >= self.target:
+                self.finished.set()
+
+    def inject(self, topic: str, payload: bytes) -> None:
+        callback = next(cb for pattern, cb in self._callbacks.items() if topic_matches(pattern, topic))
+        callback(self, None, _Message(topic=topic, payload=payload))
+
+
+async def _bench(device_count: int, commands_per_device: int) -> dict[str, float]:
+    config = {
+        "defaults": {"driver": {"type": "fake", "seed": 1}},
+        "devices": [{"device_id": "TB-{index:04d}", "count": device_count}],
+    }
+    gc.collect()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    client = _LoopbackClient()
+    fleet = create_fleet(config)
+    host = FleetMQTTHost(client=client, loop=asyncio.get_running_loop(), fleet=fleet)
+    host.start()
+    await asyncio.sleep(0)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    payloads = [
+        (
+            f"{device.base_topic}/cmd/run_diagnostic",
+            json.dumps({"corr_id": f"c-{device.device_id}", "device_id": device.device_id}).encode(),
+        )
+        for device in fleet.devices
+    ]
+    client.target = device_count * commands_per_device
+    started = time.perf_counter()
+    for _ in range(commands_per_device):
+        for topic, payload in payloads:
+            client.inject(topic, payload)
+        await asyncio.sleep(0)
+    await client.finished.wait()
+    elapsed = time.perf_counter() - started
+    await host.stop()
+
+    return {
+        "devices": device_count,
+        "bytes_per_device": (current - baseline) / device_count,
+        "commands": client.target,
+        "commands_per_s": client.target / elapsed,
+        "publishes_per_s": client.published / elapsed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument("--commands", type=int, default=5, help="每台设备下发的命令数")
+    args = parser.parse_args()
+
+    print(f"{'devices':>8} {'KiB/device':>11} {'commands':>9} {'cmd/s':>10} {'publish/s':>10}")
+    for count in args.devices:
+        row = asyncio.run(_bench(count, args.commands))
+        print(
+            f"{row['devices']:>8} {row['bytes_per_device'] / 1024:>11.1f} {row['commands']:>9} "
+            f"{row['commands_per_s']:>10.0f} {row['publishes_per_s']:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark: multi-megabyte sweep over ``loop://``, ASCII CSV vs IEEE 488.2 binary block.
+
+用法::
+
+    uv run python -m scripts.bench_scpi_block --megabytes 2
+
+写线程把同一组 float32 采样分别以 ``1.234567e-01,...`` 文本行与 ``#<n><len><bytes>``
+定长块发送，读侧分别用 ``readline`` + 逐项解析与 ``read_block_array`` 零拷贝解码，
+比较线上字节数、耗时与有效吞吐。loop:// 逐字节排队，绝对速度偏低，但两种格式的
+相对差异与真实串口一致（线上字节数决定传输时间）。
+"""
+
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+from typing import Any, Callable
+
+from apps.devices.testbox.parsers.scpi import build_block
+from apps.devices.testbox.transport import SerialTransport
+
+try:
+    import numpy as np  # type: ignore
+except ImportError as exc:  # pragma: no cover - benchmark only
+    raise RuntimeError("numpy 未安装，无法运行该基准。请运行 'uv pip install numpy'。") from exc
+
+
+def _run(payload: bytes, read: Callable[[SerialTransport], Any]) -> tuple[float, Any]:
+    transport = SerialTransport(timeout=5.0, write_timeout=None)  # type: ignore[arg-type]
+    transport.open()
+    writer = threading.Thread(target=transport.write, args=(payload,))
+    try:
+        started = time.perf_counter()
+        writer.start()
+        result = read(transport)
+        elapsed = time.perf_counter() - started
+        writer.join()
+    finally:
+        transport.close()
+    return elapsed, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--megabytes", type=float, default=2.0, help="binary payload size")
+    args = parser.parse_args()
+
+    samples = np.random.default_rng(7).standard_normal(int(args.megabytes * 1024 * 1024) // 4).astype(">f4")
+    ascii_payload = ",".join(f"{value:.6e}" for value in samples).encode("ascii") + b"\n"
+    block_payload = build_block(samples.tobytes()) + b"\n"
+
+    def read_ascii(transport: SerialTransport) -> Any:
+        line = transport.readline()
+        return np.array([float(token) for token in line.split(b",")], dtype=">f4")
+
+    buffer = bytearray(len(block_payload))
+
+    def read_block(transport: SerialTransport) -> Any:
+        return transport.read_block_array("f4", ">", into=buffer)
+
+    print(f"{'format':>8} {'wire MB':>8} {'seconds':>8} {'samples/s':>12}")
+    for label, payload, reader in (("ascii", ascii_payload, read_ascii), ("block", block_payload, read_block)):
+        elapsed, array = _run(payload, reader)
+        assert np.allclose(array, samples, rtol=1e-6)
+        print(f"{label:>8} {len(payload) / 1e6:>8.2f} {elapsed:>8.2f} {len(samples) / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark: SCPI response parse throughput, parse_response vs ResponseParser.
+
+用法::
+
+    uv run python -m scripts.bench_scpi_parser --lines 200000
+
+语料模拟真实驱动的进度/结果流：重复的记录类型、阶段名与布尔值，变化的数值。
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from apps.devices.testbox.parsers.scpi import ResponseParser, parse_response
+
+_STAGES = ["power_on_self_test", "sensor_calibration", "load_test", "thermal_cycle", "final_report"]
+
+
+def _corpus(count: int) -> list[str]:
+    rng = random.Random(11)
+    lines = []
+    for idx in range(count):
+        if idx % 50 == 49:
+            lines.append(f"DONE:result=PASS,duration_s={rng.uniform(10, 300):.2f},ok=true")
+        else:
+            lines.append(
+                f"PROGRESS:progress={rng.random():.4f},stage={rng.choice(_STAGES)},"
+                f"elapsed_s={rng.uniform(0, 300):.1f},message=running,ok=on"
+            )
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=200_000)
+    args = parser.parse_args()
+
+    lines = _corpus(args.lines)
+    stream = ("\n".join(lines) + "\n").encode("utf-8")
+
+    started = time.perf_counter()
+    for line in lines:
+        parse_response(line)
+    baseline = args.lines / (time.perf_counter() - started)
+
+    incremental = ResponseParser()
+    started = time.perf_counter()
+    for line in lines:
+        incremental.parse_line(line)
+    per_line = args.lines / (time.perf_counter() - started)
+
+    incremental = ResponseParser()
+    started = time.perf_counter()
+    records = 0
+    for offset in range(0, len(stream), 4096):
+        records += len(incremental.feed(stream[offset : offset + 4096]))
+    fed = records / (time.perf_counter() - started)
+    assert records == args.lines
+
+    print(f"{'path':>26} {'lines/s':>10} {'speedup':>8}")
+    for label, rate in (
+        ("parse_response", baseline),
+        ("ResponseParser.parse_line", per_line),
+        ("ResponseParser.feed 4K", fed),
+    ):
+        print(f"{label:>26} {rate:>10.0f} {rate / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Benchmark: fake-driver sensor stream through actor → TelemetryQueue → adapter.
+
+用法::
+
+    uv run python -m scripts.bench_sensor_stream --rate-hz 5000 --channels 16 --duration 2
+
+Fake 驱动按 ``driver.sensors`` 产出传感器快照，Actor 转换入队，遥测适配器发布到
+只计数的客户端；对比目标速率与实际发布速率，以及不同批量配置下的 flush 分布，
+用于在无硬件时压测整条链路。
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import Any
+
+from apps.devices.testbox.apps.actor import create_actor
+from apps.devices.testbox.domain.models import DeviceTestBoxRunCommand, DeviceTestBoxRunParams
+from apps.devices.testbox.drivers.telemetry_adapter import (
+    MQTTTelemetryAdapter,
+    TelemetryBatchConfig,
+    TelemetryTopicLayout,
+)
+
+
+class _CountingClient:
+    def __init__(self) -> None:
+        self.publishes = 0
+        self.bytes = 0
+        self.done = asyncio.Event()
+
+    def publish(self, topic: str, payload: Any, qos: int = 0, retain: bool = False) -> None:
+        self.publishes += 1
+        self.bytes += len(payload)
+        if topic.endswith("/tele/done"):
+            self.done.set()
+
+
+async def _bench(rate_hz: float, channels: int, duration: float, batching: TelemetryBatchConfig) -> dict[str, Any]:
+    runtime = create_actor(
+        {
+            "device_id": "TB-001",
+            "driver": {
+                "type": "fake",
+                "sensors": {"rate_hz": rate_hz, "channels": channels},
+            },
+            # 传感器按驱动时钟采样：真实时钟下 rate_hz 即每真实秒的快照数
+            "clock": {"mode": "real"},
+        }
+    )
+    client = _CountingClient()
+    adapter = MQTTTelemetryAdapter(
+        client=client,
+        telemetry_queue=runtime.telemetry_queue,
+        topic_layout=TelemetryTopicLayout(base_topic="lab/bench/device_testbox/TB-001"),
+        batching=batching,
+    )
+    adapter.start()
+    worker = asyncio.create_task(runtime.actor.run())
+    started = time.perf_counter()
+    await runtime.command_queue.put_command(
+        DeviceTestBoxRunCommand(
+            corr_id="bench",
+            device_id="TB-001",
+            params=DeviceTestBoxRunParams(duration_s=duration),
+        )
+    )
+    await asyncio.wait_for(client.done.wait(), timeout=duration * 10 + 5)
+    elapsed = time.perf_counter() - started
+    runtime.actor.stop()
+    await worker
+    await adapter.stop()
+    snapshots = runtime.actor.metrics.sensor_snapshots
+    return {
+        "snapshots": snapshots,
+        "snap_per_s": snapshots / elapsed,
+        "publishes": client.publishes,
+        "mb": client.bytes / 1e6,
+        "flush_p50": adapter.stats.flush_size.percentile(0.5),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate-hz", type=float, default=5000.0)
+    parser.add_argument("--channels", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=2.0)
+    args = parser.parse_args()
+
+    cases = [
+        ("N=1", TelemetryBatchConfig()),
+        ("N=256 T=5ms", TelemetryBatchConfig(size=256, interval_ms=5)),
+    ]
+    print(f"target {args.rate_hz:.0f} snapshots/s x {args.channels} channels for {args.duration:.1f} s")
+    print(f"{'case':>14} {'snapshots':>10} {'snap/s':>10} {'publishes':>10} {'MB':>8} {'flush p50':>10}")
+    for label, batching in cases:
+        row = asyncio.run(_bench(args.rate_hz, args.channels, args.duration, batching))
+        print(
+            f"{label:>14} {row['snapshots']:>10} {row['snap_per_s']:>10.0f} {row['publishes']:>10} "
+            f"{row['mb']:>8.2f} {row['flush_p50']:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark: SCPI line throughput over ``loop://``, pyserial readline vs LineFramer.
+
+用法::
+
+    uv run python -m scripts.bench_serial_framing --lines 20000
+
+统计每秒行数与每行底层 ``read``/``readinto`` 调用次数。每次底层读取都会在
+pyserial 中产生一个新的 bytes 对象，再加上交付给调用方的那一行，因此
+``bytes objs/line`` ≈ ``reads/line + 1``，用来近似每行的分配次数。
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Callable
+
+from apps.devices.testbox.transport import SerialTransport
+
+LINE = b"PROGRESS:progress=0.42,stage=sensor_calibration,elapsed_s=12.5\n"
+
+
+class _CountingTransport(SerialTransport):
+    def open(self) -> None:
+        super().open()
+        serial = self._serial
+        assert serial is not None
+        self.reads = 0
+        read, readinto = serial.read, serial.readinto
+
+        def counting_read(size: int = 1) -> bytes:
+            self.reads += 1
+            return read(size)
+
+        def counting_readinto(buffer) -> int:  # type: ignore[no-untyped-def]
+            self.reads += 1
+            return readinto(buffer)
+
+        serial.read = counting_read  # type: ignore[method-assign]
+        serial.readinto = counting_readinto  # type: ignore[method-assign]
+
+
+def _legacy(transport: _CountingTransport, count: int) -> int:
+    serial = transport._serial
+    assert serial is not None
+    received = 0
+    while received < count:
+        if serial.readline():
+            received += 1
+    return received
+
+
+def _framed(transport: _CountingTransport, count: int) -> int:
+    received = 0
+    while received < count:
+        received += len(transport.read_lines())
+    return received
+
+
+def _bench(reader: Callable[[_CountingTransport, int], int], lines: int, chunk: int) -> dict[str, float]:
+    transport = _CountingTransport(timeout=0.1)
+    transport.open()
+    elapsed = 0.0
+    try:
+        for _ in range(lines // chunk):
+            transport._serial.write(LINE * chunk)  # type: ignore[union-attr]
+            started = time.perf_counter()
+            reader(transport, chunk)
+            elapsed += time.perf_counter() - started
+    finally:
+        transport.close()
+    reads_per_line = transport.reads / lines
+    return {
+        "lines_per_s": lines / elapsed,
+        "reads_per_line": reads_per_line,
+        "objs_per_line": reads_per_line + 1,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=20_000)
+    parser.add_argument("--chunk", type=int, default=50, help="lines written per burst (loop:// buffers 4 KiB)")
+    args = parser.parse_args()
+
+    print(f"{'path':>18} {'lines/s':>10} {'reads/line':>11} {'bytes objs/line':>16}")
+    for label, reader in (("pyserial readline", _legacy), ("LineFramer", _framed)):
+        row = _bench(reader, args.lines, args.chunk)
+        print(
+            f"{label:>18} {row['lines_per_s']:>10.0f} {row['reads_per_line']:>11.2f} "
+            f"{row['objs_per_line']:>16.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark: MQTTTelemetryAdapter throughput and flush histograms for batch N/T.
+
+用法::
+
+    uv run python -m scripts.bench_telemetry_batching --messages 50000
+
+以传感器快照为负载，客户端只计数 ``publish`` 调用，用于比较不同 ``batch_size`` /
+``batch_interval_ms`` / ``batch_topic`` 组合下的每秒消息数与 flush 分布。
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import Any
+
+from apps.devices.testbox.apps.queues import TelemetryQueue
+from apps.devices.testbox.domain.models import DeviceTestBoxSensorReading, DeviceTestBoxSensorSnapshot
+from apps.devices.testbox.drivers.telemetry_adapter import (
+    MQTTTelemetryAdapter,
+    TelemetryBatchConfig,
+    TelemetryTopicLayout,
+)
+
+
+class _CountingClient:
+    def __init__(self) -> None:
+        self.publishes = 0
+        self.bytes = 0
+
+    def publish(self, topic: str, payload: Any, qos: int = 0, retain: bool = False) -> None:
+        self.publishes += 1
+        self.bytes += len(payload)
+
+
+async def _bench(messages: int, batching: TelemetryBatchConfig) -> dict[str, Any]:
+    client = _CountingClient()
+    queue = TelemetryQueue()
+    adapter = MQTTTelemetryAdapter(
+        client=client,
+        telemetry_queue=queue,
+        topic_layout=TelemetryTopicLayout(base_topic="lab/bench/device_testbox/TB-001"),
+        batching=batching,
+    )
+    snapshot = DeviceTestBoxSensorSnapshot(
+        corr_id="bench",
+        device_id="TB-001",
+        sensors=[DeviceTestBoxSensorReading(name=f"ch{idx}", value=float(idx)) for idx in range(8)],
+    )
+    adapter.start()
+    started = time.perf_counter()
+    for _ in range(messages):
+        await queue.put_telemetry(snapshot)
+        if queue.qsize() >= 256:
+            await asyncio.sleep(0)
+    await queue.join()
+    elapsed = time.perf_counter() - started
+    await adapter.stop()
+    return {
+        "msg_per_s": messages / elapsed,
+        "publishes": client.publishes,
+        "flush_p50": adapter.stats.flush_size.percentile(0.5),
+        "latency_p99_ms": adapter.stats.flush_latency_s.percentile(0.99) * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=50_000)
+    args = parser.parse_args()
+
+    cases = [
+        ("N=1", TelemetryBatchConfig()),
+        ("N=64 T=5ms", TelemetryBatchConfig(size=64, interval_ms=5)),
+        ("N=256 T=5ms", TelemetryBatchConfig(size=256, interval_ms=5)),
+        ("N=256 T=5ms topic", TelemetryBatchConfig(size=256, interval_ms=5, topic="lab/bench/batch")),
+    ]
+    print(f"{'case':>20} {'msg/s':>10} {'publishes':>10} {'flush p50':>10} {'lat p99 ms':>11}")
+    for label, batching in cases:
+        row = asyncio.run(_bench(args.messages, batching))
+        print(
+            f"{label:>20} {row['msg_per_s']:>10.0f} {row['publishes']:>10} "
+            f"{row['flush_p50']:>10.0f} {row['latency_p99_ms']:>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Benchmark: per-device exact callbacks with linear matching vs one wildcard + topic trie.
+
+用法::
+
+    uv run python -m scripts.bench_topic_router --devices 100 1000 5000 --messages 200000
+
+基线模拟 paho 的 ``message_callback_add``：每台设备注册 ``tele/progress`` 与 ``tele/done``
+两个回调，收到消息时按注册顺序逐个做过滤器匹配；``TopicRouter`` 只持有一个通配符订阅，
+按层级在前缀树中匹配并缓存解析结果，处理器直接拿到 ``device_id``/``verb``。
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from core.topics import TopicRouter, fleet_filters, topic_matches
+
+BASE = "lab/local/line/device_testbox/TB-{index:05d}"
+
+
+@dataclass
+class _Message:
+    topic: str
+    payload: bytes = b""
+
+
+class _LinearCallbacks:
+    """paho-style ``(filter, callback)`` list scanned in order for every message."""
+
+    def __init__(self) -> None:
+        self._callbacks: list[tuple[str, Callable[[Any, Any, _Message], None]]] = []
+
+    def message_callback_add(self, topic_filter: str, callback: Callable[[Any, Any, _Message], None]) -> None:
+        self._callbacks.append((topic_filter, callback))
+
+    def on_message(self, message: _Message) -> None:
+        for topic_filter, callback in self._callbacks:
+            if topic_matches(topic_filter, message.topic):
+                callback(self, None, message)
+
+
+def _workload(devices: int, messages: int) -> list[_Message]:
+    rng = random.Random(1)
+    verbs = ("progress",) * 9 + ("done",)
+    return [_Message(f"{BASE.format(index=rng.randrange(devices))}/tele/{rng.choice(verbs)}") for _ in range(messages)]
+
+
+def _bench_linear(devices: int, workload: list[_Message]) -> float:
+    hits = [0]
+
+    def handler(client: Any, userdata: Any, message: _Message) -> None:
+        # 基线处理器需自行从主题中切出设备号
+        hits[0] += len(message.topic.split("/")[4])
+
+    client = _LinearCallbacks()
+    for index in range(devices):
+        client.message_callback_add(f"{BASE.format(index=index)}/tele/progress", handler)
+        client.message_callback_add(f"{BASE.format(index=index)}/tele/done", handler)
+    started = time.perf_counter()
+    for message in workload:
+        client.on_message(message)
+    return len(workload) / (time.perf_counter() - started)
+
+
+def _bench_router(devices: int, workload: list[_Message]) -> tuple[float, int]:
+    hits = [0]
+
+    def handler(address: Any, message: _Message) -> None:
+        hits[0] += len(address.device_id)
+
+    router = TopicRouter()
+    for index in range(devices):
+        router.add(f"{BASE.format(index=index)}/tele/progress", handler)
+        router.add(f"{BASE.format(index=index)}/tele/done", handler)
+    subscriptions = len(fleet_filters(router.filters))
+    started = time.perf_counter()
+    for message in workload:
+        router.on_message(None, None, message)
+    return len(workload) / (time.perf_counter() - started), subscriptions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--linear-messages", type=int, default=5_000, help="线性基线的消息数（其开销随设备数线性增长）")
+    args = parser.parse_args()
+
+    print(f"{'devices':>8} {'subs (linear)':>14} {'subs (router)':>14} {'linear msg/s':>13} {'router msg/s':>13}")
+    for devices in args.devices:
+        linear = _bench_linear(devices, _workload(devices, args.linear_messages))
+        router, subscriptions = _bench_router(devices, _workload(devices, args.messages))
+        print(f"{devices:>8} {devices * 2:>14} {subscriptions:>14} {linear:>13.0f} {router:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
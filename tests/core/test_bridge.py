@@ -0,0 +1,35 @@
+"""Tests for the thread-to-loop batch bridge."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+
+from core.bridge import LoopBridge
+
+
+@pytest.mark.asyncio
+async def test_bridge_delivers_burst_in_order_with_few_wakeups() -> None:
+    loop = asyncio.get_running_loop()
+    received: list[int] = []
+    done = asyncio.Event()
+    total = 5000
+
+    def sink(batch: list[int]) -> None:
+        received.extend(batch)
+        if len(received) == total:
+            done.set()
+
+    bridge: LoopBridge[int] = LoopBridge(loop, sink, max_batch=256)
+    producer = threading.Thread(target=lambda: [bridge.submit(idx) for idx in range(total)])
+    producer.start()
+    await asyncio.wait_for(done.wait(), timeout=2.0)
+    producer.join()
+
+    assert received == list(range(total))
+    assert bridge.stats.messages == total
+    assert bridge.stats.wakeups < total
+    assert bridge.stats.batch_size.max <= 256
+    assert bridge.stats.latency_s.count == total
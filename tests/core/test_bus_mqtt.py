@@ -1,10 +1,272 @@
-"""Placeholder for MQTT bus tests until adapter实现完成。"""
+"""Tests for the core message bus (in-memory broker and paho backend)."""
 
 from __future__ import annotations
 
+import asyncio
+import json
+import threading
+from types import SimpleNamespace
+from typing import Any
+
 import pytest
 
+from core.bus import BusMessage, InMemoryBroker, InMemoryBus, PahoMessageBus, topic_matches, validate_filter
+
+
+def test_topic_matching_follows_mqtt_wildcard_rules() -> None:
+    assert topic_matches("lab/+/tele/#", "lab/TB-1/tele/done")
+    assert topic_matches("lab/+/tele/#", "lab/TB-1/tele")
+    assert topic_matches("#", "lab/TB-1")
+    assert not topic_matches("lab/+", "lab/TB-1/tele")
+    assert not topic_matches("#", "$SYS/broker/uptime")
+    assert topic_matches("$SYS/#", "$SYS/broker/uptime")
+    with pytest.raises(ValueError):
+        validate_filter("lab/#/tele")
+    with pytest.raises(ValueError):
+        validate_filter("lab/TB+")
+
+
+@pytest.mark.asyncio
+async def test_in_memory_bus_fans_out_by_wildcard_and_delivers_retained() -> None:
+    broker = InMemoryBroker()
+    publisher = InMemoryBus(broker, client_id="pub")
+    consumer = InMemoryBus(broker, client_id="sub")
+    await publisher.connect()
+    await consumer.connect()
+
+    await publisher.publish("lab/TB-1/state/shadow", b'{"state":"IDLE"}', qos=1, retain=True)
+    everything = await consumer.subscribe("lab/#", qos=1)
+    done_only = await consumer.subscribe("lab/+/tele/done")
+
+    retained = await asyncio.wait_for(everything.get(), 1.0)
+    assert retained.retain and retained.topic == "lab/TB-1/state/shadow"
+
+    await publisher.publish("lab/TB-1/tele/done", "ok", qos=1)
+    await publisher.publish("lab/TB-1/tele/progress", "50%", qos=0)
+    assert (await asyncio.wait_for(everything.get(), 1.0)).topic == "lab/TB-1/tele/done"
+    assert (await asyncio.wait_for(everything.get(), 1.0)).payload == b"50%"
+    assert (await asyncio.wait_for(done_only.get(), 1.0)).payload == b"ok"
+    assert done_only._queue is not None and done_only._queue.empty()
+
+    done_only.unsubscribe()
+    everything.unsubscribe()
+    await publisher.publish("lab/TB-1/tele/done", "late")
+    await asyncio.sleep(0)
+    # 同一客户端的重叠订阅只从 broker 收到一份，由总线在本地分发
+    assert broker.delivered == 2
+
+    await publisher.close()
+    await consumer.close()
+
+
+@pytest.mark.asyncio
+async def test_shared_filter_is_subscribed_once_and_refcounted() -> None:
+    broker = InMemoryBroker()
+    bus = InMemoryBus(broker)
+    received: list[str] = []
+    first = await bus.subscribe("lab/+/cmd/#", callback=lambda msg: received.append("first"))
+    second = await bus.subscribe("lab/+/cmd/#", callback=lambda msg: received.append("second"))
+
+    await bus.publish("lab/TB-1/cmd/run", b"{}")
+    await asyncio.sleep(0)
+    first.unsubscribe()
+    await bus.publish("lab/TB-1/cmd/run", b"{}")
+    await asyncio.sleep(0)
+    assert received == ["first", "second", "second"]
+
+    second.unsubscribe()
+    await bus.publish("lab/TB-1/cmd/run", b"{}")
+    await asyncio.sleep(0)
+    assert len(received) == 3
+    assert broker._subscribers == {}
+
+
+@pytest.mark.asyncio
+async def test_request_response_round_trip() -> None:
+    broker = InMemoryBroker()
+    client = InMemoryBus(broker, client_id="client")
+    server = InMemoryBus(broker, client_id="server")
+
+    def handle(message: BusMessage) -> None:
+        body = json.loads(message.payload)
+        server.respond(message, json.dumps({"echo": body["value"] * 2}))
+
+    await server.subscribe("svc/double", callback=handle)
+    replies = await asyncio.gather(*(client.request("svc/double", json.dumps({"value": n})) for n in range(5)))
+
+    assert [json.loads(reply.payload)["echo"] for reply in replies] == [0, 2, 4, 6, 8]
+    with pytest.raises(asyncio.TimeoutError):
+        await client.request("svc/nobody", b"{}", timeout=0.05)
+
+
+class _FakePahoClient:
+    """Stands in for paho: acks arrive from a separate "network" thread."""
+
+    def __init__(self) -> None:
+        self.on_connect: Any = None
+        self.on_disconnect: Any = None
+        self.on_message: Any = None
+        self.on_publish: Any = None
+        self.on_subscribe: Any = None
+        self.on_connect_fail: Any = None
+        self._mid = 0
+        self.published: list[tuple[str, bytes, int]] = []
+        self.subscribe_calls: list[Any] = []
+        self.connected = False
+        self.max_inflight: int | None = None
+
+    def _next_mid(self) -> int:
+        self._mid += 1
+        return self._mid
+
+    def _later(self, fn: Any, *args: Any) -> None:
+        threading.Timer(0.001, fn, args).start()
+
+    def connect_async(self, host: str, port: int, keepalive: int) -> None:
+        self._later(self._connack)
+
+    def _connack(self) -> None:
+        self.connected = True
+        self.on_connect(self, None, {}, SimpleNamespace(is_failure=False, value=0), None)
+
+    def drop(self) -> None:
+        """Simulate a lost connection followed by paho's automatic reconnect."""
+
+        self.connected = False
+        self.on_disconnect(self, None, {}, 7, None)
+        self._later(self._connack)
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    def reconnect_delay_set(self, min_delay: float, max_delay: float) -> None:
+        pass
+
+    def max_inflight_messages_set(self, inflight: int) -> None:
+        self.max_inflight = inflight
+
+    def loop_start(self) -> None:
+        pass
+
+    def loop_stop(self) -> None:
+        pass
+
+    def disconnect(self) -> None:
+        pass
+
+    def publish(self, topic: str, payload: bytes, qos: int = 0, retain: bool = False, properties: Any = None) -> Any:
+        mid = self._next_mid()
+        self.published.append((topic, payload, qos))
+        if qos == 0:
+            # paho 在写出 QoS0 消息时同步回调 on_publish，可能早于调用方登记确认
+            self.on_publish(self, None, mid, None, None)
+        else:
+            self._later(self.on_publish, self, None, mid, None, None)
+        return SimpleNamespace(mid=mid, rc=0)
+
+    def subscribe(self, topic: Any, qos: int = 0) -> tuple[int, int]:
+        self.subscribe_calls.append(topic)
+        if not self.connected:
+            return 4, None  # MQTT_ERR_NO_CONN
+        mid = self._next_mid()
+        self._later(self.on_subscribe, self, None, mid, [qos], None)
+        return 0, mid
+
+    def unsubscribe(self, topic: str) -> None:
+        pass
+
+    def deliver(self, topic: str, payload: bytes) -> None:
+        message = SimpleNamespace(topic=topic, payload=payload, qos=1, retain=False, properties=None)
+        self._later(self.on_message, self, None, message)
+
+
+@pytest.mark.asyncio
+async def test_paho_bus_resolves_acks_and_batches_thread_handoff() -> None:
+    pytest.importorskip("paho.mqtt.client")
+    fake = _FakePahoClient()
+    bus = PahoMessageBus(client=fake, client_id="paho-test")
+    await asyncio.wait_for(bus.connect(), 1.0)
+
+    await asyncio.wait_for(bus.publish("lab/a", b"0", qos=0), 1.0)
+    await asyncio.wait_for(asyncio.gather(*(bus.publish_nowait("lab/a", b"1", qos=1) for _ in range(20))), 1.0)
+
+    subscription = await asyncio.wait_for(bus.subscribe("lab/+/tele/#", qos=1), 1.0)
+    fake.deliver("lab/TB-1/tele/done", b"ok")
+    fake.deliver("lab/TB-1/evt/error", b"ignored")
+    message = await asyncio.wait_for(subscription.get(), 1.0)
+    assert message.topic == "lab/TB-1/tele/done" and message.payload == b"ok"
+
+    await bus.close()
+    assert len(fake.published) == 21
+    assert bus._acks == {} and bus._early_acks == {}
+
+
+@pytest.mark.asyncio
+async def test_paho_bus_resubscribes_after_reconnect() -> None:
+    pytest.importorskip("paho.mqtt.client")
+    from core.reconnect import ReconnectPolicy
+
+    fake = _FakePahoClient()
+    bus = PahoMessageBus(client=fake, client_id="paho-resub", reconnect=ReconnectPolicy(jitter="none"))
+    # 连接前的订阅在首次 CONNACK 时一并发出并确认
+    early = bus.subscribe_nowait("lab/+/cmd/#", qos=1)
+    await asyncio.wait_for(bus.connect(), 1.0)
+    await asyncio.wait_for(early.ready, 1.0)
+    late = await asyncio.wait_for(bus.subscribe("lab/+/tele/done", qos=0), 1.0)
+    assert fake.subscribe_calls == [[("lab/+/cmd/#", 1)], "lab/+/tele/done"]
+
+    fake.drop()
+    for _ in range(100):
+        if len(fake.subscribe_calls) == 3:
+            break
+        await asyncio.sleep(0.01)
+    assert fake.subscribe_calls[-1] == [("lab/+/cmd/#", 1), ("lab/+/tele/done", 0)]
+    assert bus.connection is not None and bus.connection.stats.reconnects == 1
+    # 只有总线持有订阅表，重订阅数由它写入连接统计
+    assert bus.connection.stats.resubscribed == 2
+
+    fake.deliver("lab/TB-1/tele/done", b"ok")
+    assert (await asyncio.wait_for(late.get(), 1.0)).payload == b"ok"
+    await bus.close()
+
+
+@pytest.mark.asyncio
+async def test_paho_bus_bounds_unclaimed_early_acks() -> None:
+    pytest.importorskip("paho.mqtt.client")
+    from core import bus as bus_module
+
+    fake = _FakePahoClient()
+    bus = PahoMessageBus(client=fake, client_id="paho-early")
+    await asyncio.wait_for(bus.connect(), 1.0)
+
+    # 绕过总线直接发布的消息同样触发 on_publish，但永远不会有人登记其 mid
+    for mid in range(10_000, 10_000 + 3 * bus_module._EARLY_ACK_LIMIT):
+        fake.on_publish(fake, None, mid, None, None)
+
+    assert len(bus._early_acks) == bus_module._EARLY_ACK_LIMIT
+    await bus.close()
+    assert bus._early_acks == {}
+
+
+@pytest.mark.asyncio
+async def test_telemetry_adapter_sets_max_inflight_through_paho_bus() -> None:
+    pytest.importorskip("paho.mqtt.client")
+    from apps.devices.testbox.apps.queues import TelemetryQueue
+    from apps.devices.testbox.drivers.telemetry_adapter import (
+        MQTTTelemetryAdapter,
+        TelemetryBatchConfig,
+        TelemetryTopicLayout,
+    )
+
+    fake = _FakePahoClient()
+    bus = PahoMessageBus(client=fake, client_id="paho-inflight")
+    adapter = MQTTTelemetryAdapter(
+        client=bus,
+        telemetry_queue=TelemetryQueue(),
+        topic_layout=TelemetryTopicLayout(base_topic="lab/test/device_testbox/TB-001"),
+        batching=TelemetryBatchConfig.from_mapping({"max_inflight": 200}),
+    )
+    adapter.start()
+    await adapter.stop()
 
-@pytest.mark.skip(reason="MQTT bus migration pending in YLabCore")
-def test_mqtt_bus_placeholder() -> None:
-    assert True
+    assert fake.max_inflight == 200
@@ -0,0 +1,76 @@
+"""Tests for the pluggable real/scaled/virtual clocks."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from core.clock import ScaledClock, VirtualClock, build_clock
+
+
+@pytest.mark.asyncio
+async def test_virtual_clock_fires_sleepers_in_deadline_order_without_waiting() -> None:
+    clock = VirtualClock()
+    order: list[tuple[str, float]] = []
+
+    async def sleeper(name: str, delay: float) -> None:
+        await clock.sleep(delay)
+        order.append((name, clock.monotonic()))
+
+    started = time.perf_counter()
+    await asyncio.gather(sleeper("slow", 300.0), sleeper("fast", 45.0), sleeper("mid", 120.0))
+
+    assert order == [("fast", 45.0), ("mid", 120.0), ("slow", 300.0)]
+    assert time.perf_counter() - started < 0.5
+
+
+@pytest.mark.asyncio
+async def test_virtual_clock_timeout_raises_at_virtual_deadline() -> None:
+    clock = VirtualClock()
+
+    with pytest.raises(TimeoutError):
+        async with clock.timeout(10.0):
+            await clock.sleep(60.0)
+    assert clock.monotonic() == pytest.approx(10.0)
+    assert clock.pending == 0
+
+    async with clock.timeout(10.0):
+        await clock.sleep(5.0)
+    assert clock.monotonic() == pytest.approx(15.0)
+
+
+@pytest.mark.asyncio
+async def test_manual_virtual_clock_only_moves_on_advance() -> None:
+    clock = VirtualClock(auto_advance=False)
+    fired: list[str] = []
+    clock.call_later(2.0, fired.append, "b")
+    clock.call_later(1.0, fired.append, "a")
+    cancelled = clock.call_later(1.5, fired.append, "x")
+    cancelled.cancel()
+
+    assert clock.advance(0.5) == 0
+    assert clock.advance(2.0) == 2
+    assert fired == ["a", "b"]
+    assert clock.monotonic() == pytest.approx(2.5)
+
+
+@pytest.mark.asyncio
+async def test_scaled_clock_compresses_sleep_and_timeout() -> None:
+    clock = ScaledClock(1000.0)
+    started = clock.monotonic()
+    await clock.sleep(50.0)
+    assert clock.monotonic() - started >= 50.0
+
+    with pytest.raises(TimeoutError):
+        async with clock.timeout(20.0):
+            await clock.sleep(300.0)
+
+
+def test_build_clock_from_config() -> None:
+    assert isinstance(build_clock({"mode": "virtual"}), VirtualClock)
+    assert build_clock({"mode": "scaled", "speed": 100}).speed == 100.0
+    assert build_clock(None).speed == 1.0
+    with pytest.raises(ValueError):
+        build_clock({"mode": "warp"})
@@ -0,0 +1,63 @@
+"""Tests for the core payload codec registry."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from apps.devices.testbox.domain.models import (
+    DeviceTestBoxDoneEvent,
+    DeviceTestBoxRunCommand,
+    DeviceTestBoxSensorReading,
+    DeviceTestBoxSensorSnapshot,
+)
+from core.codecs import build_registry, unframe
+
+_MODELS = [
+    DeviceTestBoxRunCommand(corr_id="c-1", device_id="TB-001", timeout_s=30.0, metadata={"k": [1, 2]}),
+    DeviceTestBoxDoneEvent(corr_id="c-1", device_id="TB-001", duration_s=12.5, summary="ok"),
+    DeviceTestBoxSensorSnapshot(
+        corr_id="c-1",
+        device_id="TB-001",
+        sensors=[DeviceTestBoxSensorReading(name="temp", value=21.5, unit="C")],
+    ),
+]
+
+
+@pytest.mark.parametrize("codec_name", ["json", "json-fast", "msgpack"])
+@pytest.mark.parametrize("model", _MODELS, ids=lambda model: type(model).__name__)
+def test_codecs_roundtrip_testbox_models(codec_name: str, model) -> None:
+    if codec_name == "msgpack":
+        pytest.importorskip("msgpack")
+    registry = build_registry({"tele": codec_name})
+
+    payload = registry.encode("tele", model)
+
+    assert registry.decode("tele", payload, type(model)) == model
+
+
+def test_binary_payloads_carry_content_type_marker() -> None:
+    pytest.importorskip("msgpack")
+    producer = build_registry({"cmd": "msgpack"})
+    consumer = build_registry()
+    command = _MODELS[0]
+
+    payload = producer.encode("cmd", command)
+    content_type, _ = unframe(payload)
+
+    assert content_type == "application/msgpack"
+    assert consumer.decode("cmd", payload, DeviceTestBoxRunCommand) == command
+    # JSON 保持裸格式，旧订阅方仍可直接 json.loads
+    assert json.loads(consumer.encode("cmd", command))["corr_id"] == "c-1"
+
+
+def test_unknown_codec_name_is_rejected() -> None:
+    with pytest.raises(KeyError):
+        build_registry({"tele": "yaml"})
+
+
+@pytest.mark.parametrize("payload", [b"\x00", b"\x00\x10app", b"\x00\x02\xff\xfe{}"])
+def test_unframe_rejects_truncated_or_unknown_frames(payload: bytes) -> None:
+    with pytest.raises(ValueError):
+        unframe(payload)
@@ -0,0 +1,130 @@
+"""Tests for MQTT v5 helpers: topic aliases, shared subscriptions and command expiry."""
+
+from __future__ import annotations
+
+import asyncio
+import warnings
+
+import pytest
+
+from core.bus import InMemoryBroker, InMemoryBus
+from core.mqtt_v5 import (
+    MQTTv5Settings,
+    TopicAliasManager,
+    command_expiry_interval,
+    shared_filter,
+    split_shared,
+)
+
+HOT = "lab/local/line/device_testbox/TB-001/tele/progress"
+COLD = "lab/local/line/device_testbox/TB-001/tele/done"
+
+
+def test_settings_and_helpers() -> None:
+    settings = MQTTv5Settings.from_mapping({"protocol": "5", "v5": {"share_group": "orch", "session_expiry_s": 60}})
+    assert settings.enabled and settings.share_group == "orch" and settings.session_expiry_s == 60
+    assert not MQTTv5Settings.from_mapping({}).enabled
+    with pytest.raises(ValueError):
+        MQTTv5Settings.from_mapping({"protocol": "4"})
+
+    assert shared_filter("lab/+/tele/#", "orch") == "$share/orch/lab/+/tele/#"
+    assert shared_filter("lab/#", None) == "lab/#"
+    assert split_shared("$share/orch/lab/+/tele/#") == ("orch", "lab/+/tele/#")
+    with pytest.raises(ValueError):
+        shared_filter("lab/#", "a/b")
+
+    assert command_expiry_interval(45.2) == 46
+    assert command_expiry_interval(None, 600) == 600
+    assert command_expiry_interval(None) is None
+
+
+def test_alias_manager_respects_broker_limit_and_hot_topics() -> None:
+    manager = TopicAliasManager(maximum=8)
+    # 未收到 CONNACK（或 broker 不支持别名）时不分配
+    assert manager.resolve(HOT) == (HOT, None)
+
+    manager.reset(1)
+    assert manager.resolve(HOT) == (HOT, 1)
+    assert manager.resolve(HOT) == ("", 1)
+    assert manager.resolve(COLD) == (COLD, None)
+    assert manager.resolve(HOT.replace("TB-001", "TB-002")) == (HOT.replace("TB-001", "TB-002"), None)
+
+    manager.reset(65535)
+    assert manager.limit == 8
+    assert manager.resolve(HOT) == (HOT, 1)
+
+
+def test_v5_client_restores_alias_only_messages_before_resend() -> None:
+    pytest.importorskip("paho.mqtt.client")
+    from paho.mqtt.packettypes import PacketTypes
+    from paho.mqtt.properties import Properties
+
+    from core.mqtt_v5 import MQTTv5Client, create_paho_client
+
+    settings = MQTTv5Settings(protocol="5")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        raw = create_paho_client(settings, client_id="alias-test")
+    client = MQTTv5Client(raw, settings)
+    connack = Properties(PacketTypes.CONNACK)
+    connack.TopicAliasMaximum = 4
+
+    raw.on_connect(raw, None, {}, 0, connack)
+    client.publish(HOT, b"1", qos=1, expiry_s=30)
+    client.publish(HOT, b"2", qos=1)
+    queued = list(raw._out_messages.values())
+    assert [message.topic for message in queued] == [HOT, ""]
+    assert queued[0].properties.MessageExpiryInterval == 30
+
+    # 重连：旧连接的别名失效，排队消息需恢复完整主题后再由 paho 重发
+    raw.on_connect(raw, None, {}, 0, connack)
+    assert [message.topic for message in queued] == [HOT, HOT]
+    assert not any(hasattr(message.properties, "TopicAlias") for message in queued)
+
+
+@pytest.mark.asyncio
+async def test_shared_subscription_balances_across_group_members() -> None:
+    broker = InMemoryBroker()
+    producer = InMemoryBus(broker, client_id="device")
+    workers = [InMemoryBus(broker, client_id=f"worker-{index}") for index in range(3)]
+    received: dict[str, list[str]] = {bus.client_id: [] for bus in workers}
+    monitor: list[str] = []
+
+    await producer.publish(COLD, b"retained", qos=1, retain=True)
+    for bus in workers:
+        await bus.subscribe(
+            "$share/persist/lab/+/+/+/+/tele/#",
+            qos=1,
+            callback=lambda message, name=bus.client_id: received[name].append(message.topic),
+        )
+    await workers[0].subscribe("lab/+/+/+/+/tele/done", callback=lambda message: monitor.append(message.topic))
+    await asyncio.sleep(0)
+    # 共享订阅不接收保留消息，普通订阅照常接收
+    assert all(not topics for topics in received.values())
+    assert monitor == [COLD]
+
+    for _ in range(6):
+        await producer.publish(HOT, b"{}", qos=1)
+    await asyncio.sleep(0)
+    assert [len(topics) for topics in received.values()] == [2, 2, 2]
+    assert monitor == [COLD]
+
+
+def test_paho_still_exposes_the_queue_restore_queued_relies_on() -> None:
+    pytest.importorskip("paho.mqtt.client")
+    from core.mqtt_v5 import create_paho_client
+
+    settings = MQTTv5Settings(protocol="5")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        raw = create_paho_client(settings, client_id="private-api-test")
+    # paho 重命名这些私有属性时此测试失败，提醒复核 restore_queued 与 pyproject 中的版本上限
+    assert isinstance(raw._out_messages, dict)
+    assert hasattr(raw._out_message_mutex, "__enter__")
+
+
+def test_restore_queued_warns_when_paho_internals_are_missing(caplog: pytest.LogCaptureFixture) -> None:
+    manager = TopicAliasManager(maximum=4)
+    with caplog.at_level("WARNING", logger="core.mqtt_v5"):
+        assert manager.restore_queued(object()) == 0
+    assert "_out_messages" in caplog.text
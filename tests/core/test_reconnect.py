@@ -0,0 +1,164 @@
+"""Tests for jittered backoff and the reconnecting connection manager."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+from typing import Any
+
+import pytest
+
+from core.policies.retry_backoff import exponential_backoff
+from core.reconnect import ConnectionManager, ReconnectPolicy
+
+
+class _FakePaho:
+    """Records what ``ConnectionManager`` asks of paho; callbacks are fired by the test."""
+
+    def __init__(self) -> None:
+        self.on_connect: Any = None
+        self.on_disconnect: Any = None
+        self.on_connect_fail: Any = None
+        self.subscribe_calls: list[Any] = []
+        self.delays: list[tuple[float, float]] = []
+        self.connected_to: tuple[str, int, int] | None = None
+        self.loop_started = False
+
+    def connect_async(self, host: str, port: int, keepalive: int) -> None:
+        self.connected_to = (host, port, keepalive)
+
+    def loop_start(self) -> None:
+        self.loop_started = True
+
+    def loop_stop(self) -> None:
+        self.loop_started = False
+
+    def disconnect(self) -> None:
+        self.on_disconnect(self, None, 0)
+
+    def reconnect_delay_set(self, min_delay: float, max_delay: float) -> None:
+        self.delays.append((min_delay, max_delay))
+
+    def subscribe(self, topic: Any, qos: int = 0) -> tuple[int, int]:
+        self.subscribe_calls.append(topic)
+        return 0, len(self.subscribe_calls)
+
+    def unsubscribe(self, topic: Any) -> tuple[int, int]:
+        return 0, 0
+
+    def publish(self, topic: str, payload: Any, qos: int = 0, retain: bool = False) -> str:
+        return f"published {topic}"
+
+
+def test_exponential_backoff_cap_and_jitter() -> None:
+    assert [exponential_backoff(attempt) for attempt in (1, 2, 3)] == [0.5, 1.0, 2.0]
+    assert exponential_backoff(10, 0.5, 2.0, max_delay=30) == 30
+    rng = random.Random(7)
+    full = [exponential_backoff(6, 1.0, 2.0, max_delay=8, jitter="full", rng=rng) for _ in range(200)]
+    assert all(0 <= value <= 8 for value in full) and len(set(full)) > 100
+    equal = [exponential_backoff(6, 1.0, 2.0, max_delay=8, jitter="equal", rng=rng) for _ in range(200)]
+    assert all(4 <= value <= 8 for value in equal)
+    with pytest.raises(ValueError):
+        exponential_backoff(1, jitter="bogus")
+
+    policy = ReconnectPolicy.from_mapping({"min_delay_s": 1, "max_delay_s": 4, "jitter": "none"})
+    assert [policy.delay(attempt) for attempt in range(1, 6)] == [1, 2, 4, 4, 4]
+    with pytest.raises(ValueError):
+        ReconnectPolicy.from_mapping({"jitter": "sometimes"})
+
+
+def test_reconnect_backs_off_and_records_recovery() -> None:
+    raw = _FakePaho()
+    now = [100.0]
+    manager = ConnectionManager(
+        raw,
+        host="broker",
+        port=1884,
+        keepalive=15,
+        policy=ReconnectPolicy(min_delay_s=1.0, max_delay_s=8.0, jitter="none"),
+        clock=lambda: now[0],
+    )
+    hooks: list[str] = []
+    manager.add_connect_hook(lambda: hooks.append("hb"))
+    manager.start()
+    assert raw.connected_to == ("broker", 1884, 15) and raw.loop_started
+
+    raw.on_connect(raw, None, {}, 0)
+    assert hooks == ["hb"] and manager.stats.reconnects == 0
+
+    # 订阅不经管理器记录或重发：委托给 paho 的调用保持透明
+    manager.subscribe("lab/c/cmd/abort", qos=1)
+    assert raw.subscribe_calls == ["lab/c/cmd/abort"]
+    assert manager.publish("lab/x", b"{}") == "published lab/x"
+
+    # broker 重启：每次失败按退避加倍等待
+    raw.delays.clear()
+    raw.on_disconnect(raw, None, 7)
+    raw.on_connect_fail(raw, None)
+    raw.on_connect_fail(raw, None)
+    raw.on_connect_fail(raw, None)
+    assert [low for low, _ in raw.delays] == [1.0, 2.0, 4.0, 8.0]
+    assert manager.stats.disconnects == 1 and manager.stats.failed_attempts == 3
+
+    now[0] += 12.5
+    raw.on_connect(raw, None, {}, 0)
+    assert raw.subscribe_calls == ["lab/c/cmd/abort"]
+    assert manager.stats.reconnects == 1 and manager.stats.resubscribed == 0
+    assert manager.stats.last_recovery_s == pytest.approx(12.5)
+    assert manager.stats.recovery_s.count == 1
+    assert hooks == ["hb", "hb"]
+    # 连接成功后退避回到初始值
+    assert raw.delays[-1][0] == 1.0
+
+    manager.stop()
+    assert manager.stats.disconnects == 1 and not raw.loop_started
+
+
+def test_refused_connack_does_not_count_as_connected() -> None:
+    raw = _FakePaho()
+    manager = ConnectionManager(raw, host="broker", policy=ReconnectPolicy(jitter="none"))
+    manager.start()
+    raw.on_connect(raw, None, {}, 5)
+    assert raw.subscribe_calls == [] and manager.stats.connects == 0
+    raw.on_disconnect(raw, None, 5)
+    assert manager.stats.disconnects == 0 and raw.delays[-1][0] == 0.5
+
+
+def test_v5_wrapper_keeps_alias_restore_ahead_of_resubscribe() -> None:
+    pytest.importorskip("paho.mqtt.client")
+    import warnings
+
+    from core.mqtt_v5 import MQTTv5Client, MQTTv5Settings, create_paho_client
+
+    settings = MQTTv5Settings(protocol="5")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        raw = create_paho_client(settings, client_id="reconnect-test")
+    wrapper = MQTTv5Client(raw, settings)
+    manager = ConnectionManager(wrapper, host="127.0.0.1", port=1, settings=settings)
+    manager.install()
+    wrapper.install()  # connect_paho 在连接前调用
+    assert raw.on_connect == wrapper._on_connect
+    assert wrapper._user_on_connect == manager._on_connect
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_rearm_publishes_immediately() -> None:
+    from apps.devices.testbox.apps.hb import HeartbeatConfig, HeartbeatPublisher
+
+    published: list[str] = []
+
+    class _Client:
+        def publish(self, topic: str, payload: str, qos: int = 0, retain: bool = False) -> None:
+            published.append(topic)
+
+    loop = asyncio.get_running_loop()
+    heartbeat = HeartbeatPublisher(client=_Client(), loop=loop, config=HeartbeatConfig(topic="lab/hb", interval=3600))
+    heartbeat.start()
+    await asyncio.sleep(0)
+    assert published == ["lab/hb"]
+    await loop.run_in_executor(None, heartbeat.rearm)
+    for _ in range(10):
+        await asyncio.sleep(0)
+    await heartbeat.stop()
+    assert published == ["lab/hb", "lab/hb"]
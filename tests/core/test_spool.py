@@ -0,0 +1,152 @@
+"""Tests for the disk-backed outbound spool."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from core.spool import OutboundSpool, SpoolConfig, SpoolRecord, encode_record, iter_records
+
+
+class _Info:
+    def __init__(self) -> None:
+        self.published = False
+
+    def is_published(self) -> bool:
+        return self.published
+
+
+class _FlakyClient:
+    """paho-like client whose connection and PUBACKs are driven by the test."""
+
+    def __init__(self) -> None:
+        self.connected = True
+        self.sent: list[tuple[str, bytes, _Info]] = []
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    def publish(self, topic: str, payload: bytes, qos: int = 0, retain: bool = False) -> _Info:
+        info = _Info()
+        self.sent.append((topic, payload, info))
+        return info
+
+    def ack_all(self) -> None:
+        for _, _, info in self.sent:
+            info.published = True
+
+
+def _config(tmp_path: Path, **overrides: object) -> SpoolConfig:
+    values = {"dir": str(tmp_path / "spool"), "segment_kb": 1, "max_inflight": 4, "replay_rate": 1000}
+    values.update(overrides)
+    return SpoolConfig.from_mapping(values)
+
+
+def _seq(client: _FlakyClient) -> list[tuple[str, int]]:
+    return [(topic, json.loads(payload)["seq"]) for topic, payload, _ in client.sent]
+
+
+def test_records_round_trip_and_torn_tail_is_ignored() -> None:
+    records = [SpoolRecord("lab/a/tele/progress", b'{"seq": 1}', 1), SpoolRecord("lab/a/state/shadow", b"", 0, True)]
+    data = b"".join(encode_record(record) for record in records)
+    assert list(iter_records(data)) == records
+    # 追加过程中崩溃留下的半条记录被忽略
+    assert list(iter_records(data + encode_record(records[0])[:-3])) == records
+    assert not SpoolConfig.from_mapping({}).enabled
+
+
+def test_outage_spools_to_disk_and_replays_in_order_after_restart(tmp_path: Path) -> None:
+    client = _FlakyClient()
+    spool = OutboundSpool(client, _config(tmp_path))
+    topics = [f"lab/local/line/device_testbox/TB-00{index}/tele/progress" for index in (1, 2)]
+
+    spool.publish(topics[0], json.dumps({"seq": 0}).encode(), qos=1)
+    assert spool.stats.direct == 1
+    client.connected = False
+    for seq in range(1, 61):
+        spool.publish(topics[seq % 2], json.dumps({"seq": seq, "pad": "x" * 40}).encode(), qos=1)
+    assert len(client.sent) == 1 and spool.stats.spooled == 60
+    segments = sorted((tmp_path / "spool").glob("seg-*.log"))
+    assert len(segments) > 1  # 超过 segment_kb 后滚动到新分段
+
+    # 断线期间进程重启：新实例从磁盘恢复积压
+    asyncio.run(spool.stop())
+    client = _FlakyClient()
+    restarted = OutboundSpool(client, _config(tmp_path))
+    assert restarted.has_backlog
+    # 积压未清空前，新消息继续落盘以保持顺序
+    restarted.publish(topics[1], json.dumps({"seq": 61}).encode(), qos=1)
+    assert client.sent == []
+
+    while restarted.has_backlog:
+        sent = restarted.replay_step(budget=100)
+        # 在途窗口限制每轮发送量
+        assert sent <= 4
+        client.ack_all()
+        if not sent:
+            restarted.replay_step(budget=0)
+    received = _seq(client)
+    assert [seq for _, seq in received] == list(range(1, 62))
+    for topic in topics:
+        per_device = [seq for sent_topic, seq in received if sent_topic == topic]
+        assert per_device == sorted(per_device)
+    assert list((tmp_path / "spool").glob("seg-*.log")) == []
+    assert restarted.stats.segments_deleted >= len(segments)
+
+    restarted.publish(topics[0], json.dumps({"seq": 62}).encode(), qos=1)
+    assert restarted.stats.direct == 1 and _seq(client)[-1] == (topics[0], 62)
+
+
+def test_full_inflight_window_spools_and_segment_waits_for_acks(tmp_path: Path) -> None:
+    client = _FlakyClient()
+    spool = OutboundSpool(client, _config(tmp_path, max_inflight=2))
+    for seq in range(4):
+        spool.publish("lab/t/tele/progress", json.dumps({"seq": seq}).encode(), qos=1)
+    # 前两条直发未确认，窗口已满，其余落盘
+    assert spool.stats.direct == 2 and spool.stats.spooled == 2
+    assert spool.replay_step(budget=10) == 0
+
+    client.ack_all()
+    assert spool.replay_step(budget=10) == 2
+    segment_files = list((tmp_path / "spool").glob("seg-*.log"))
+    assert len(segment_files) == 1  # 已全部发出但尚未确认，分段保留
+    client.ack_all()
+    spool.replay_step(budget=10)
+    assert not spool.has_backlog and list((tmp_path / "spool").glob("seg-*.log")) == []
+    assert [seq for _, seq in _seq(client)] == [0, 1, 2, 3]
+
+
+def test_disk_limit_drops_oldest_segments(tmp_path: Path) -> None:
+    client = _FlakyClient()
+    client.connected = False
+    spool = OutboundSpool(client, SpoolConfig(directory=str(tmp_path), segment_bytes=1024, max_bytes=4096))
+    for seq in range(200):
+        spool.publish("lab/t/tele/progress", json.dumps({"seq": seq, "pad": "x" * 40}).encode(), qos=1)
+    assert spool.backlog_bytes <= 4096 + 1024
+    assert spool.stats.dropped_segments > 0
+    assert sum(path.stat().st_size for path in tmp_path.glob("seg-*.log")) == spool.backlog_bytes
+
+
+@pytest.mark.asyncio
+async def test_background_replay_after_reconnect(tmp_path: Path) -> None:
+    client = _FlakyClient()
+    client.connected = False
+    spool = OutboundSpool(client, _config(tmp_path, max_inflight=50, replay_rate=2000), tick_s=0.005)
+    spool.start()
+    for seq in range(40):
+        spool.publish("lab/t/tele/progress", json.dumps({"seq": seq}).encode(), qos=1)
+    await asyncio.sleep(0.02)
+    assert client.sent == []
+
+    client.connected = True
+    for _ in range(200):
+        client.ack_all()
+        if not spool.has_backlog:
+            break
+        await asyncio.sleep(0.005)
+    await spool.stop()
+    assert [seq for _, seq in _seq(client)] == list(range(40))
+    assert spool.stats.replayed == 40
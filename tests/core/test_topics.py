@@ -0,0 +1,88 @@
+"""Tests for the topic trie, cached topic parsing and the wildcard router."""
+
+from __future__ import annotations
+
+import random
+
+from core.topics import TopicRouter, TopicTrie, fleet_filters, parse_topic, topic_matches
+
+
+def test_trie_agrees_with_linear_filter_matching() -> None:
+    filters = [
+        "lab/+/+/device_testbox/+/tele/#",
+        "lab/local/line/device_testbox/TB-001/tele/done",
+        "lab/local/+/+/TB-002/evt/error",
+        "lab/#",
+        "#",
+        "+/+",
+        "$SYS/#",
+        "lab/local/line/device_testbox/TB-001",
+    ]
+    trie: TopicTrie[str] = TopicTrie()
+    for topic_filter in filters:
+        trie.insert(topic_filter, topic_filter)
+
+    rng = random.Random(7)
+    levels = ["lab", "local", "line", "device_testbox", "TB-001", "TB-002", "tele", "done", "evt", "error", "$SYS"]
+    for _ in range(500):
+        topic = "/".join(rng.choice(levels) for _ in range(rng.randint(1, 8)))
+        expected = sorted(f for f in filters if topic_matches(f, topic))
+        assert sorted(trie.match(topic)) == expected, topic
+
+    assert trie.remove("lab/#", "lab/#")
+    assert not trie.remove("lab/#", "lab/#")
+    assert "lab/#" not in trie.match("lab")
+    assert len(trie) == len(filters) - 1
+
+
+def test_parse_topic_decodes_naming_convention_and_is_cached() -> None:
+    address = parse_topic("lab/site-a/line-3/device_testbox/TB-042/state/shadow")
+    assert (address.site, address.line, address.device_type) == ("site-a", "line-3", "device_testbox")
+    assert (address.device_id, address.channel, address.verb) == ("TB-042", "state", "shadow")
+    assert parse_topic("lab/site-a/line-3/device_testbox/TB-042/state/shadow") is address
+
+    other = parse_topic("_bus/reply/client/1")
+    assert other.device_id is None and other.levels == ("_bus", "reply", "client", "1")
+
+
+def test_router_dispatches_from_one_wildcard_subscription() -> None:
+    router = TopicRouter()
+    seen: list[tuple[str | None, str | None, bytes]] = []
+
+    def handler(address, message) -> None:
+        seen.append((address.device_id, address.verb, message.payload))
+
+    topics = [f"lab/local/line/device_testbox/TB-{index:03d}/tele/done" for index in range(100)]
+    for topic in topics:
+        router.add(topic, handler)
+    assert fleet_filters(router.filters) == ["lab/local/line/device_testbox/+/tele/done"]
+
+    class _Message:
+        def __init__(self, topic: str, payload: bytes) -> None:
+            self.topic = topic
+            self.payload = payload
+
+    router.on_message(None, None, _Message(topics[42], b"ok"))
+    router.on_message(None, None, _Message(topics[42], b"again"))
+    router.on_message(None, None, _Message("lab/local/line/device_testbox/TB-999/tele/done", b"x"))
+    assert seen == [("TB-042", "done", b"ok"), ("TB-042", "done", b"again")]
+    assert router.stats.unmatched == 1
+    assert router.stats.cache_misses == 2
+
+    assert router.remove(topics[42], handler)
+    router.on_message(None, None, _Message(topics[42], b"gone"))
+    assert len(seen) == 2
+
+
+def test_fleet_filters_keep_unrelated_topics_exact() -> None:
+    topics = [
+        "lab/local/line/device_testbox/TB-001/cmd/run_diagnostic",
+        "lab/local/line/device_testbox/TB-002/cmd/run_diagnostic",
+        "lab/local/line/device_testbox/TB-001/tele/done",
+        "orchestrator/jobs",
+    ]
+    assert fleet_filters(topics) == [
+        "lab/local/line/device_testbox/+/cmd/run_diagnostic",
+        "lab/local/line/device_testbox/TB-001/tele/done",
+        "orchestrator/jobs",
+    ]
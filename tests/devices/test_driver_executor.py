@@ -0,0 +1,190 @@
+"""Tests for running blocking driver calls off the event loop."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Any, AsyncIterator, List, Mapping
+
+import pytest
+
+from apps.devices.driver_base import AsyncInstrumentDriver, DriverCapability, InstrumentDriver
+from apps.devices.driver_executor import DriverExecutor, SyncDriverAdapter, as_async_driver
+from apps.devices.testbox.apps.actor import DeviceTestBoxActor
+from apps.devices.testbox.apps.hb import HeartbeatConfig, HeartbeatPublisher
+from apps.devices.testbox.apps.queues import CommandQueue, TelemetryQueue
+from apps.devices.testbox.domain.models import DeviceTestBoxRunCommand
+from apps.devices.testbox.drivers import DeviceTestBoxRealDriver
+from apps.devices.testbox.transport import SerialTransport
+
+
+class _TimestampingClient:
+    def __init__(self) -> None:
+        self.timestamps: List[float] = []
+
+    def publish(self, topic: str, payload: str, qos: int = 0, retain: bool = False) -> None:
+        self.timestamps.append(time.monotonic())
+
+
+class _SleepyDriver(InstrumentDriver):
+    def __init__(self) -> None:
+        self.active = 0
+        self.max_active = 0
+        self.calls: list[str] = []
+        self._guard = threading.Lock()
+
+    def identify(self) -> Mapping[str, Any]:
+        return {"model": "SLEEPY"}
+
+    def start_task(self, name: str, params: Mapping[str, Any]) -> None:
+        with self._guard:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.05)
+        self.calls.append(name)
+        with self._guard:
+            self.active -= 1
+
+    def abort(self) -> None:
+        self.calls.append("abort")
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_jitter_stays_low_while_slow_serial_device_is_polled() -> None:
+    client = _TimestampingClient()
+    heartbeat = HeartbeatPublisher(
+        client=client,
+        loop=asyncio.get_running_loop(),
+        config=HeartbeatConfig(topic="lab/test/hb", interval=0.1),
+    )
+    # loop:// 无仪器应答：每次 _poll() 都会在 readline() 上阻塞满 timeout
+    driver = DeviceTestBoxRealDriver(transport=SerialTransport(timeout=0.25))
+    executor = DriverExecutor(max_workers=2)
+    actor = DeviceTestBoxActor(
+        device_id="TB-SLOW",
+        driver=driver,
+        command_queue=CommandQueue(),
+        telemetry_queue=TelemetryQueue(),
+        executor=executor,
+    )
+
+    heartbeat.start()
+    worker = asyncio.create_task(actor.run())
+    started = time.monotonic()
+    await actor._command_queue.put_command(
+        DeviceTestBoxRunCommand(corr_id="slow-1", device_id="TB-SLOW", timeout_s=0.6)
+    )
+    await actor._command_queue.join()
+    blocked_for = time.monotonic() - started
+    actor.stop()
+    await worker
+    await heartbeat.stop()
+    executor.shutdown()
+    driver._transport.close()
+
+    events = [actor._telemetry_queue.get_nowait() for _ in range(actor._telemetry_queue.qsize())]
+    assert getattr(events[-1], "code", None) == "testbox.actor.timeout"
+    gaps = [later - earlier for earlier, later in zip(client.timestamps, client.timestamps[1:])]
+    assert blocked_for >= 0.5
+    assert len(gaps) >= 4
+    assert max(gaps) < 0.15
+
+
+@pytest.mark.asyncio
+async def test_driver_handle_serializes_calls_per_device() -> None:
+    executor = DriverExecutor(max_workers=4)
+    driver = _SleepyDriver()
+    handle = executor.bind(driver)
+
+    await asyncio.gather(*(handle.call(driver.start_task, f"task-{idx}", {}) for idx in range(4)))
+    executor.shutdown()
+
+    assert driver.max_active == 1
+    assert driver.calls == [f"task-{idx}" for idx in range(4)]
+
+
+@pytest.mark.asyncio
+async def test_driver_handle_abort_cancels_pending_calls() -> None:
+    executor = DriverExecutor(max_workers=2)
+    driver = _SleepyDriver()
+    handle = executor.bind(driver)
+
+    first = asyncio.create_task(handle.call(driver.start_task, "first", {}))
+    queued = [asyncio.create_task(handle.call(driver.start_task, f"queued-{idx}", {})) for idx in range(2)]
+    await asyncio.sleep(0.01)
+    await handle.abort()
+    await first
+    for task in queued:
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    # 撤销后设备锁已释放，新的调用照常执行
+    await handle.call(driver.start_task, "after", {})
+    executor.shutdown()
+
+    assert driver.calls == ["abort", "first", "after"]
+
+
+@pytest.mark.asyncio
+async def test_sync_driver_adapter_serializes_and_keeps_capabilities() -> None:
+    executor = DriverExecutor(max_workers=4)
+    driver = _SleepyDriver()
+    adapted = as_async_driver(driver, executor)
+
+    assert isinstance(adapted, SyncDriverAdapter)
+    assert adapted.wrapped is driver
+    assert adapted.capabilities == DriverCapability.PROGRESS | DriverCapability.RESULT
+    assert as_async_driver(adapted) is adapted
+
+    await asyncio.gather(*(adapted.start_task(f"task-{idx}", {}) for idx in range(3)))
+    assert await adapted.identify() == {"model": "SLEEPY"}
+    assert await adapted.fetch_result() is None
+    await adapted.abort()
+    executor.shutdown()
+
+    assert driver.max_active == 1
+    assert driver.calls == ["task-0", "task-1", "task-2", "abort"]
+
+
+class _NativeAsyncDriver(AsyncInstrumentDriver):
+    capabilities = DriverCapability.PROGRESS
+
+    def __init__(self) -> None:
+        self.started: list[str] = []
+
+    async def identify(self) -> Mapping[str, Any]:
+        return {"model": "ASYNC"}
+
+    async def start_task(self, name: str, params: Mapping[str, Any]) -> None:
+        self.started.append(name)
+
+    async def abort(self) -> None:
+        pass
+
+    async def stream_progress(self) -> AsyncIterator[dict[str, Any]]:
+        for idx in range(1, 3):
+            await asyncio.sleep(0)
+            yield {"stage": f"s{idx}", "progress": idx / 2}
+
+    async def fetch_result(self) -> dict[str, Any] | None:  # pragma: no cover - RESULT 未声明
+        raise AssertionError("fetch_result must not be called without RESULT capability")
+
+
+@pytest.mark.asyncio
+async def test_actor_drives_native_async_driver_by_declared_capabilities() -> None:
+    driver = _NativeAsyncDriver()
+    actor = DeviceTestBoxActor(
+        device_id="TB-ASYNC",
+        driver=driver,
+        command_queue=CommandQueue(),
+        telemetry_queue=TelemetryQueue(),
+    )
+    worker = asyncio.create_task(actor.run())
+    await actor._command_queue.put_command(DeviceTestBoxRunCommand(corr_id="async-1", device_id="TB-ASYNC"))
+    await actor._command_queue.join()
+    actor.stop()
+    await worker
+
+    events = [actor._telemetry_queue.get_nowait() for _ in range(actor._telemetry_queue.qsize())]
+    assert driver.started == ["run_diagnostic"]
+    assert [getattr(evt, "stage", None) for evt in events] == ["s1", "s2"]
@@ -3,18 +3,23 @@
 from __future__ import annotations
 
 import asyncio
-from typing import List
+import time
+from typing import Any, List
 
 import pytest
 
 from apps.devices.testbox.apps.actor import create_actor
+from apps.devices.testbox.apps.hb import HeartbeatConfig, HeartbeatPublisher
 from apps.devices.testbox.apps.queues import TelemetryMessage
 from apps.devices.testbox.domain.models import (
     DeviceTestBoxDoneEvent,
     DeviceTestBoxProgressEvent,
     DeviceTestBoxRunCommand,
     DeviceTestBoxRunParams,
+    DeviceTestBoxSensorSnapshot,
 )
+from core.clock import VirtualClock
+from core.domain.shared.models import ErrorEvent
 
 
 @pytest.mark.asyncio
@@ -55,3 +60,204 @@ async def test_fake_driver_generates_progress_and_done_events() -> None:
     assert progress_events, "expected progress telemetry from fake driver"
     assert done_events and done_events[0].result == "PASS"
     assert all(getattr(evt, "device_id", "") == "TB-001" for evt in events)
+
+
+@pytest.mark.asyncio
+async def test_idle_actor_wakes_only_for_commands_and_stop() -> None:
+    runtime = create_actor({"device_id": "TB-002", "driver": {"type": "fake", "seed": 1}})
+    worker = asyncio.create_task(runtime.actor.run())
+
+    await asyncio.sleep(0.25)
+    assert runtime.actor.metrics.wakeups == 0
+
+    await runtime.command_queue.put_command(DeviceTestBoxRunCommand(corr_id="run-2", device_id="TB-002"))
+    await runtime.command_queue.join()
+
+    loop = asyncio.get_running_loop()
+    stop_requested = loop.time()
+    runtime.actor.stop()
+    await asyncio.wait_for(worker, timeout=0.05)
+
+    metrics = runtime.actor.metrics
+    assert loop.time() - stop_requested < 0.05
+    assert metrics.commands == 1
+    assert metrics.wakeups - metrics.commands == 1
+    assert metrics.pickup_latency_s.count == 1
+
+
+@pytest.mark.asyncio
+async def test_progress_is_streamed_while_run_is_in_flight() -> None:
+    runtime = create_actor(
+        {
+            "device_id": "TB-003",
+            "driver": {"type": "fake", "seed": 1, "time_scale": 0.01},
+        }
+    )
+    worker = asyncio.create_task(runtime.actor.run())
+    loop = asyncio.get_running_loop()
+
+    await runtime.command_queue.put_command(
+        DeviceTestBoxRunCommand(
+            corr_id="run-3",
+            device_id="TB-003",
+            params=DeviceTestBoxRunParams(duration_s=20.0),
+        )
+    )
+
+    arrivals: list[tuple[float, TelemetryMessage]] = []
+    while True:
+        event = await asyncio.wait_for(runtime.telemetry_queue.get_telemetry(), timeout=1.0)
+        arrivals.append((loop.time(), event))
+        if isinstance(event, DeviceTestBoxDoneEvent):
+            break
+
+    runtime.actor.stop()
+    await worker
+
+    progress_times = [ts for ts, evt in arrivals if isinstance(evt, DeviceTestBoxProgressEvent)]
+    assert len(progress_times) == 5
+    # 20 s 模拟时长按 0.01 缩放约 200 ms，阶段间隔约 40 ms，而非一次性突发
+    assert progress_times[-1] - progress_times[0] > 0.1
+    assert all(later > earlier for earlier, later in zip(progress_times, progress_times[1:]))
+
+
+@pytest.mark.asyncio
+async def test_fake_driver_streams_sensor_snapshots_at_configured_rate() -> None:
+    pytest.importorskip("numpy")
+    runtime = create_actor(
+        {
+            "device_id": "TB-004",
+            "driver": {
+                "type": "fake",
+                "seed": 3,
+                "sensors": {"rate_hz": 1000, "channels": 4},
+            },
+            "clock": {"mode": "virtual"},
+        }
+    )
+    worker = asyncio.create_task(runtime.actor.run())
+    await runtime.command_queue.put_command(
+        DeviceTestBoxRunCommand(corr_id="run-4", device_id="TB-004", params=DeviceTestBoxRunParams(duration_s=2.0))
+    )
+
+    snapshots: list[DeviceTestBoxSensorSnapshot] = []
+    while True:
+        event = await asyncio.wait_for(runtime.telemetry_queue.get_telemetry(), timeout=1.0)
+        if isinstance(event, DeviceTestBoxSensorSnapshot):
+            snapshots.append(event)
+        if isinstance(event, DeviceTestBoxDoneEvent):
+            break
+    runtime.actor.stop()
+    await worker
+
+    # 传感器与阶段进度共用虚拟时钟：约 2 模拟秒的运行期内按 1 kHz 采样
+    assert 1800 <= len(snapshots) <= 2200
+    assert runtime.actor.metrics.sensor_snapshots == len(snapshots)
+    assert [reading.name for reading in snapshots[0].sensors] == ["ch0", "ch1", "ch2", "ch3"]
+    stamps = [snapshot.timestamp for snapshot in snapshots]
+    assert stamps == sorted(stamps)
+
+
+def test_sensor_signal_model_is_seeded_and_vectorized() -> None:
+    np = pytest.importorskip("numpy")
+    from apps.devices.testbox.drivers.sensors import SensorSignalModel, SensorStreamConfig
+
+    config = SensorStreamConfig(rate_hz=1000, channels=3, step_probability=0.05)
+    first = SensorSignalModel(config, seed=9).sample(500)
+    again = SensorSignalModel(config, seed=9).sample(500)
+    other = SensorSignalModel(config, seed=10).sample(500)
+
+    assert first.values.shape == (500, 3)
+    assert np.array_equal(first.values, again.values)
+    assert not np.array_equal(first.values, other.values)
+    assert first.period_s == pytest.approx(0.001)
+
+
+async def _collect_until_terminal(runtime: Any) -> list[TelemetryMessage]:
+    events: list[TelemetryMessage] = []
+    while True:
+        event = await asyncio.wait_for(runtime.telemetry_queue.get_telemetry(), timeout=1.0)
+        events.append(event)
+        if isinstance(event, (DeviceTestBoxDoneEvent, ErrorEvent)):
+            return events
+
+
+@pytest.mark.asyncio
+async def test_virtual_clock_runs_long_diagnostic_in_milliseconds_in_order() -> None:
+    runtime = create_actor({"device_id": "TB-005", "driver": {"type": "fake", "seed": 5}, "clock": {"mode": "virtual"}})
+    clock = runtime.clock
+    assert isinstance(clock, VirtualClock)
+    worker = asyncio.create_task(runtime.actor.run())
+
+    started = time.perf_counter()
+    await runtime.command_queue.put_command(
+        DeviceTestBoxRunCommand(corr_id="run-5", device_id="TB-005", params=DeviceTestBoxRunParams(duration_s=300.0))
+    )
+    events = await _collect_until_terminal(runtime)
+    real_elapsed = time.perf_counter() - started
+    runtime.actor.stop()
+    await worker
+
+    progress = [evt for evt in events if isinstance(evt, DeviceTestBoxProgressEvent)]
+    assert [evt.stage for evt in progress] == [
+        "power_on_self_test",
+        "sensor_calibration",
+        "thermal_stabilization",
+        "diagnostic_sequence",
+        "report_generation",
+    ]
+    assert isinstance(events[-1], DeviceTestBoxDoneEvent)
+    # 虚拟时间推进了完整的 300 s，真实耗时只有毫秒级
+    assert clock.monotonic() >= 300.0
+    assert real_elapsed < 0.5
+
+
+@pytest.mark.asyncio
+async def test_virtual_clock_exercises_command_timeout() -> None:
+    runtime = create_actor({"device_id": "TB-006", "driver": {"type": "fake"}, "clock": {"mode": "virtual"}})
+    worker = asyncio.create_task(runtime.actor.run())
+    await runtime.command_queue.put_command(
+        DeviceTestBoxRunCommand(
+            corr_id="run-6",
+            device_id="TB-006",
+            timeout_s=100.0,
+            params=DeviceTestBoxRunParams(duration_s=300.0),
+        )
+    )
+    events = await _collect_until_terminal(runtime)
+    runtime.actor.stop()
+    await worker
+
+    error = events[-1]
+    assert isinstance(error, ErrorEvent)
+    assert error.code == "testbox.actor.timeout"
+    assert 0 < sum(isinstance(evt, DeviceTestBoxProgressEvent) for evt in events) < 5
+    assert runtime.clock.monotonic() == pytest.approx(100.0)
+
+
+class _RecordingClient:
+    def __init__(self) -> None:
+        self.published: list[str] = []
+
+    def publish(self, topic: str, payload: str, qos: int = 0, retain: bool = False) -> None:
+        self.published.append(topic)
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_publisher_follows_virtual_clock() -> None:
+    clock = VirtualClock(auto_advance=False)
+    client = _RecordingClient()
+    publisher = HeartbeatPublisher(
+        client=client,
+        loop=asyncio.get_running_loop(),
+        config=HeartbeatConfig(topic="lab/hb", interval=30.0),
+        clock=clock,
+    )
+    publisher.start()
+    await asyncio.sleep(0)
+    for _ in range(3):
+        clock.advance(30.0)
+        await asyncio.sleep(0)
+    await publisher.stop()
+
+    assert len(client.published) == 4
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import asyncio
 import json
+import threading
 from dataclasses import dataclass
 from typing import Callable, Dict, Tuple
 
@@ -70,7 +71,7 @@ async def test_command_adapter_enqueues_valid_command() -> None:
     assert command.corr_id == "corr-123"
     assert command.device_id == "TB-001"
 
-    adapter.stop()
+    await adapter.stop()
     assert layout.run_diagnostic in client.unsubscribed
 
 
@@ -89,4 +90,138 @@ async def test_command_adapter_ignores_invalid_payload() -> None:
     with pytest.raises(asyncio.TimeoutError):
         await asyncio.wait_for(queue.get_command(), timeout=0.1)
 
-    adapter.stop()
+    await adapter.stop()
+
+
+@pytest.mark.asyncio
+async def test_command_adapter_defaults_missing_or_null_params() -> None:
+    loop = asyncio.get_running_loop()
+    queue = CommandQueue()
+    client = _DummyMQTTClient()
+    layout = CommandTopicLayout(base_topic="lab/test/device_testbox/TB-003")
+    adapter = MQTTCommandAdapter(client=client, loop=loop, command_queue=queue, topic_layout=layout)
+
+    adapter.start()
+
+    client.emit(layout.run_diagnostic, {"corr_id": "no-params", "device_id": "TB-003"})
+    client.emit(layout.run_diagnostic, {"corr_id": "null-params", "device_id": "TB-003", "params": None})
+    client._callbacks[layout.run_diagnostic](client, None, _Message(layout.run_diagnostic, b"\xff not json"))
+
+    first = await asyncio.wait_for(queue.get_command(), timeout=0.2)
+    second = await asyncio.wait_for(queue.get_command(), timeout=0.2)
+    assert [first.corr_id, second.corr_id] == ["no-params", "null-params"]
+    assert second.params == DeviceTestBoxRunParams()
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(queue.get_command(), timeout=0.05)
+
+    await adapter.stop()
+
+
+@pytest.mark.asyncio
+async def test_command_adapter_burst_from_network_thread_keeps_order_on_bounded_queue() -> None:
+    loop = asyncio.get_running_loop()
+    queue = CommandQueue(maxsize=2)
+    client = _DummyMQTTClient()
+    layout = CommandTopicLayout(base_topic="lab/test/device_testbox/TB-004")
+    adapter = MQTTCommandAdapter(client=client, loop=loop, command_queue=queue, topic_layout=layout)
+    adapter.start()
+
+    def burst() -> None:
+        for idx in range(20):
+            client.emit(layout.run_diagnostic, {"corr_id": f"c-{idx}", "device_id": "TB-004"})
+
+    producer = threading.Thread(target=burst)
+    producer.start()
+    received = [(await asyncio.wait_for(queue.get_command(), timeout=1.0)).corr_id for _ in range(20)]
+    producer.join()
+    await adapter.stop()
+
+    assert received == [f"c-{idx}" for idx in range(20)]
+    assert adapter.ingest_stats.messages == 20
+    assert adapter.ingest_stats.wakeups <= 20
+
+
+@pytest.mark.asyncio
+async def test_command_adapter_consumes_commands_from_message_bus() -> None:
+    from core.bus import InMemoryBroker, InMemoryBus
+
+    loop = asyncio.get_running_loop()
+    queue = CommandQueue()
+    broker = InMemoryBroker()
+    device_bus = InMemoryBus(broker, client_id="device")
+    controller = InMemoryBus(broker, client_id="controller")
+    layout = CommandTopicLayout(base_topic="lab/test/device_testbox/TB-001")
+    adapter = MQTTCommandAdapter(client=device_bus, loop=loop, command_queue=queue, topic_layout=layout)
+
+    adapter.start()
+    payload = DeviceTestBoxRunCommand(corr_id="corr-bus", device_id="TB-001").model_dump(mode="json")
+    await controller.publish(layout.run_diagnostic, json.dumps(payload), qos=1)
+
+    command = await asyncio.wait_for(queue.get_command(), timeout=0.2)
+    assert command.corr_id == "corr-bus"
+    assert adapter.ingest_stats.messages == 0
+
+    await adapter.stop()
+    await controller.publish(layout.run_diagnostic, json.dumps(payload), qos=1)
+    await asyncio.sleep(0)
+    assert queue.qsize() == 0
+
+
+@pytest.mark.asyncio
+async def test_command_adapter_drops_truncated_and_undecodable_frames() -> None:
+    from core.codecs import Codec, build_registry, frame
+
+    class _BrokenCodec(Codec):
+        name = "broken"
+        content_type = "application/x-broken"
+        binary = True
+
+        def encode(self, model):  # pragma: no cover - 仅用于解码
+            raise NotImplementedError
+
+        def loads(self, payload: bytes):
+            raise RuntimeError("decoder crashed")
+
+    codecs = build_registry()
+    codecs.register(_BrokenCodec())
+    loop = asyncio.get_running_loop()
+    queue = CommandQueue()
+    client = _DummyMQTTClient()
+    layout = CommandTopicLayout(base_topic="lab/test/device_testbox/TB-005")
+    adapter = MQTTCommandAdapter(client=client, loop=loop, command_queue=queue, topic_layout=layout, codecs=codecs)
+    adapter.start()
+
+    callback = client._callbacks[layout.run_diagnostic]
+    for payload in (b"\x00", b"\x00\x10short", frame("application/x-broken", b"{}")):
+        callback(client, None, _Message(layout.run_diagnostic, payload))
+    client.emit(layout.run_diagnostic, {"corr_id": "after-garbage", "device_id": "TB-005"})
+
+    command = await asyncio.wait_for(queue.get_command(), timeout=0.2)
+    assert command.corr_id == "after-garbage"
+    assert queue.qsize() == 0
+    await adapter.stop()
+
+
+@pytest.mark.asyncio
+async def test_command_adapter_stop_cancels_backlog_task() -> None:
+    loop = asyncio.get_running_loop()
+    queue = CommandQueue(maxsize=1)
+    client = _DummyMQTTClient()
+    layout = CommandTopicLayout(base_topic="lab/test/device_testbox/TB-006")
+    adapter = MQTTCommandAdapter(client=client, loop=loop, command_queue=queue, topic_layout=layout)
+    adapter.start()
+
+    for idx in range(4):
+        client.emit(layout.run_diagnostic, {"corr_id": f"c-{idx}", "device_id": "TB-006"})
+    await asyncio.sleep(0.01)
+    backlog_task = adapter._backlog_task
+    assert backlog_task is not None and not backlog_task.done()
+
+    await adapter.stop()
+    assert backlog_task.cancelled()
+    assert adapter._backlog_task is None
+
+    assert (await queue.get_command()).corr_id == "c-0"
+    queue.task_done()
+    await asyncio.sleep(0.01)
+    assert queue.qsize() == 0
@@ -0,0 +1,129 @@
+"""Tests for the Device TestBox fleet host."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
+
+import pytest
+
+from apps.devices.testbox.apps.fleet import FleetMQTTHost, create_fleet, load_fleet_devices
+from apps.devices.testbox.domain.models import DeviceTestBoxRunCommand
+from core.topics import topic_matches
+
+
+@dataclass
+class _Message:
+    topic: str
+    payload: bytes
+
+
+class _SharedMQTTClient:
+    def __init__(self) -> None:
+        self.published: List[Tuple[str, str, int, bool]] = []
+        self._callbacks: Dict[str, Callable[[object, object, _Message], None]] = {}
+
+    def subscribe(self, topic: str, qos: int = 0) -> None:
+        pass
+
+    def unsubscribe(self, topic: str) -> None:
+        pass
+
+    def message_callback_add(self, topic: str, callback: Callable[[object, object, _Message], None]) -> None:
+        self._callbacks[topic] = callback
+
+    def message_callback_remove(self, topic: str) -> None:
+        self._callbacks.pop(topic, None)
+
+    def publish(self, topic: str, payload: str, qos: int = 0, retain: bool = False) -> None:
+        self.published.append((topic, payload, qos, retain))
+
+    def emit(self, topic: str, payload: dict) -> None:
+        callback = next(cb for pattern, cb in self._callbacks.items() if topic_matches(pattern, topic))
+        callback(self, None, _Message(topic=topic, payload=json.dumps(payload).encode("utf-8")))
+
+
+def test_load_fleet_devices_expands_templates_and_merges_defaults() -> None:
+    devices = load_fleet_devices(
+        {
+            "fleet": {
+                "defaults": {"driver": {"type": "fake", "default_duration_s": 45}},
+                "devices": [
+                    {"device_id": "TB-{index:02d}", "count": 3},
+                    {"device_id": "TB-X", "driver": {"default_duration_s": 120}},
+                ],
+            }
+        }
+    )
+
+    assert [device["device_id"] for device in devices] == ["TB-01", "TB-02", "TB-03", "TB-X"]
+    assert devices[0]["mqtt"]["base_topic"] == "lab/local/line/device_testbox/TB-01"
+    assert devices[-1]["driver"] == {"type": "fake", "default_duration_s": 120}
+
+    with pytest.raises(ValueError):
+        load_fleet_devices({"devices": [{"device_id": "TB-1"}, {"device_id": "TB-1"}]})
+
+
+@pytest.mark.asyncio
+async def test_fleet_host_routes_commands_and_telemetry_per_device() -> None:
+    client = _SharedMQTTClient()
+    fleet = create_fleet(
+        {
+            "defaults": {"driver": {"type": "fake", "seed": 1}},
+            "devices": [{"device_id": "TB-{index}", "count": 3}],
+        }
+    )
+    host = FleetMQTTHost(client=client, loop=asyncio.get_running_loop(), fleet=fleet)
+    host.start()
+
+    for device in fleet.devices:
+        command = DeviceTestBoxRunCommand(corr_id=f"run-{device.device_id}", device_id=device.device_id)
+        client.emit(f"{device.base_topic}/cmd/run_diagnostic", command.model_dump(mode="json"))
+
+    async def _wait_for_done() -> set[str]:
+        while True:
+            done = {topic for topic, *_ in client.published if topic.endswith("/tele/done")}
+            if len(done) == len(fleet):
+                return done
+            await asyncio.sleep(0.01)
+
+    done_topics = await asyncio.wait_for(_wait_for_done(), timeout=1.0)
+    await host.stop()
+
+    shadow_topics = {topic for topic, *_ in client.published if topic.endswith("/state/shadow")}
+    assert done_topics == {f"{device.base_topic}/tele/done" for device in fleet.devices}
+    assert shadow_topics == {f"{device.base_topic}/state/shadow" for device in fleet.devices}
+
+
+@pytest.mark.asyncio
+async def test_fleet_simulator_reports_throughput_latency_and_depths() -> None:
+    from apps.devices.testbox.apps.simulator import run_fleet_sim_async
+    from core.bus import InMemoryBroker
+
+    broker = InMemoryBroker()
+    report = await run_fleet_sim_async(
+        {
+            "simulator": {
+                "devices": 4,
+                "rate_hz": 100,
+                "duration_s": 0.3,
+                "clock_speed": 10000,
+                "report_interval_s": 0.1,
+                "drivers": {"duration_s": [45, 300], "failure_rate": 1.0},
+            }
+        },
+        broker=broker,
+    )
+
+    assert report.sent == 30
+    assert report.completed == report.sent
+    # failure_rate=1.0：每次诊断都判定 FAIL
+    assert report.failed == report.sent and report.passed == 0
+    assert report.latency(0.5) > 0 and report.latency(0.99) >= report.latency(0.5)
+    assert report.max_command_depth >= 1
+    assert report.rss_bytes > 0
+    summary = report.as_dict()
+    assert summary["commands_per_s"] > 0
+    assert report.published == broker.published > report.sent
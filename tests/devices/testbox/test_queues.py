@@ -0,0 +1,111 @@
+"""Tests for bounded TestBox queues and their overflow policies."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from apps.devices.testbox.apps.queues import CommandQueue, OverflowPolicy, TelemetryQueue
+from apps.devices.testbox.domain.models import (
+    DeviceTestBoxDoneEvent,
+    DeviceTestBoxProgressEvent,
+    DeviceTestBoxRunCommand,
+    DeviceTestBoxSensorReading,
+    DeviceTestBoxSensorSnapshot,
+)
+
+
+def _progress(corr_id: str, progress: float) -> DeviceTestBoxProgressEvent:
+    return DeviceTestBoxProgressEvent(corr_id=corr_id, device_id="TB-Q", progress=progress, stage="stage")
+
+
+def _snapshot(corr_id: str, value: float) -> DeviceTestBoxSensorSnapshot:
+    return DeviceTestBoxSensorSnapshot(
+        corr_id=corr_id,
+        device_id="TB-Q",
+        sensors=[DeviceTestBoxSensorReading(name="temp", value=value)],
+    )
+
+
+@pytest.mark.asyncio
+async def test_coalesce_latest_keeps_newest_progress_per_corr_id() -> None:
+    queue = TelemetryQueue(maxsize=4, policies={"progress": "coalesce_latest"})
+
+    for step in range(10):
+        await queue.put_telemetry(_progress("run-a", step / 10))
+        await queue.put_telemetry(_progress("run-b", step / 10))
+
+    assert queue.qsize() == 4
+    assert queue.stats.coalesced == 16
+    drained = [await queue.get_telemetry() for _ in range(4)]
+    assert [(event.corr_id, event.progress) for event in drained] == [
+        ("run-a", 0.0),
+        ("run-b", 0.0),
+        ("run-a", 0.9),
+        ("run-b", 0.9),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_coalesce_latest_keeps_every_event_while_not_full() -> None:
+    queue = TelemetryQueue(maxsize=1000, policies={"progress": "coalesce_latest"})
+
+    for step in range(5):
+        await queue.put_telemetry(_progress("run-a", step / 5))
+
+    assert queue.qsize() == 5
+    assert queue.stats.coalesced == 0
+    assert queue.stats.high_watermark == 5
+    assert [(await queue.get_telemetry()).progress for _ in range(5)] == [0.0, 0.2, 0.4, 0.6, 0.8]
+
+
+@pytest.mark.asyncio
+async def test_memory_stays_flat_during_outage_without_losing_done_events() -> None:
+    queue = TelemetryQueue(
+        maxsize=16,
+        policies={"sensor_snapshot": OverflowPolicy.DROP_OLDEST, "progress": OverflowPolicy.COALESCE_LATEST},
+    )
+    done = DeviceTestBoxDoneEvent(corr_id="run-1", device_id="TB-Q")
+    await queue.put_telemetry(done)
+
+    for index in range(10_000):
+        await queue.put_telemetry(_snapshot(f"snap-{index}", float(index)))
+        await queue.put_telemetry(_progress("run-1", (index % 100) / 100))
+
+    assert queue.qsize() == 16
+    assert queue.stats.high_watermark == 16
+    assert queue.stats.dropped_oldest > 0
+    assert await queue.get_telemetry() is done
+
+
+@pytest.mark.asyncio
+async def test_drop_newest_and_block_policies() -> None:
+    commands = CommandQueue(maxsize=1, policy="drop_newest")
+    assert await commands.offer(DeviceTestBoxRunCommand(corr_id="c-1", device_id="TB-Q"))
+    assert not await commands.offer(DeviceTestBoxRunCommand(corr_id="c-2", device_id="TB-Q"))
+    assert commands.stats.dropped_newest == 1
+
+    telemetry = TelemetryQueue(maxsize=1)
+    await telemetry.put_telemetry(DeviceTestBoxDoneEvent(corr_id="d-1", device_id="TB-Q"))
+    blocked = asyncio.create_task(
+        telemetry.put_telemetry(DeviceTestBoxDoneEvent(corr_id="d-2", device_id="TB-Q"))
+    )
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+    assert (await telemetry.get_telemetry()).corr_id == "d-1"
+    await asyncio.wait_for(blocked, timeout=0.2)
+    assert telemetry.stats.blocked == 1
+
+
+@pytest.mark.asyncio
+async def test_queue_wait_is_measured_on_injected_clock() -> None:
+    from core.clock import VirtualClock
+
+    clock = VirtualClock(auto_advance=False)
+    queue = CommandQueue(clock=clock)
+    await queue.put_command(DeviceTestBoxRunCommand(corr_id="c-1", device_id="TB-Q"))
+    clock.advance(12.5)
+
+    await queue.get_command()
+    assert queue.last_wait_s == 12.5
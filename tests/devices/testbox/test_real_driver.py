@@ -0,0 +1,89 @@
+"""Tests for the real TestBox driver's background reader mode."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from apps.devices.testbox.drivers import DeviceTestBoxRealDriver
+from apps.devices.testbox.transport import SerialTransport
+
+
+def _wait_until(predicate, timeout: float = 1.0) -> None:  # type: ignore[no-untyped-def]
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.005)
+
+
+def test_reader_thread_stamps_arrival_and_fetch_does_not_touch_serial() -> None:
+    transport = SerialTransport(timeout=0.05)
+    driver = DeviceTestBoxRealDriver(transport=transport, reader_thread=True)
+    driver.start_task("run_diagnostic", {"duration_s": 5})
+
+    time.sleep(0.1)
+    transport.write(b"PROGRESS:progress=0.5,stage=self_test\n")
+    _wait_until(lambda: any(entry.get("stage") == "self_test" for entry in driver.fetch_progress()))
+
+    started = time.monotonic()
+    time.sleep(0.1)
+    progress = [entry for entry in driver.fetch_progress() if entry.get("stage") == "self_test"]
+    assert time.monotonic() - started < 0.2
+    assert 0.08 <= progress[0]["elapsed_s"] < 0.1 + 0.1
+
+    transport.write(b"DONE:result=PASS,duration=5\n")
+    _wait_until(lambda: driver.fetch_result() is not None)
+    assert driver.fetch_result()["result"] == "PASS"
+    _wait_until(lambda: driver._reader is None or not driver._reader.is_alive())
+    driver.close()
+
+
+def test_reader_thread_accounts_for_overflow_and_stops_on_abort() -> None:
+    transport = SerialTransport(timeout=0.05)
+    driver = DeviceTestBoxRealDriver(transport=transport, reader_thread=True, buffer_size=2)
+    driver.start_task("run_diagnostic", {})
+    for idx in range(5):
+        transport.write(f"PROGRESS:progress=0.{idx},stage=s{idx}\n".encode())
+    _wait_until(lambda: driver.reader_stats.records >= 6)  # 含 loop:// 回显的 RUN 指令
+
+    assert [entry["stage"] for entry in driver.fetch_progress()] == ["s3", "s4"]
+    assert driver.reader_stats.overflowed == 4
+
+    reader = driver._reader
+    driver.abort()
+    assert reader is not None and not reader.is_alive()
+    assert not driver.is_busy()
+    driver.close()
+
+
+def test_reader_thread_exits_when_transport_closes() -> None:
+    transport = SerialTransport(timeout=0.05)
+    driver = DeviceTestBoxRealDriver(transport=transport, reader_thread=True)
+    driver.start_task("run_diagnostic", {})
+    reader = driver._reader
+    driver.close()
+    assert reader is not None and not reader.is_alive()
+    assert not transport.is_open
+
+
+@pytest.mark.asyncio
+async def test_reader_thread_streams_records_as_they_arrive() -> None:
+    transport = SerialTransport(timeout=0.05)
+    driver = DeviceTestBoxRealDriver(transport=transport, reader_thread=True)
+    driver.start_task("run_diagnostic", {})
+
+    async def instrument() -> None:
+        for idx in range(3):
+            await asyncio.sleep(0.02)
+            transport.write(f"PROGRESS:progress=0.{idx},stage=s{idx}\n".encode())
+        await asyncio.sleep(0.02)
+        transport.write(b"DONE:result=PASS\n")
+
+    feeder = asyncio.create_task(instrument())
+    stages = [record.get("stage") async for record in driver.stream_progress(poll_interval=1.0)]
+    await feeder
+    driver.close()
+
+    assert [stage for stage in stages if stage] == ["s0", "s1", "s2"]
@@ -0,0 +1,109 @@
+"""Tests for IEEE 488.2 definite-length binary blocks."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from apps.devices.testbox.parsers.scpi import build_block, parse_block_header
+from apps.devices.testbox.transport import AsyncSerialTransport, SerialTransport
+
+np = pytest.importorskip("numpy")
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view) :]
+
+
+def test_parse_block_header() -> None:
+    assert parse_block_header(b"#") is None
+    assert parse_block_header(b"#41") is None
+    assert parse_block_header(b"#3128....") == (5, 128)
+    with pytest.raises(ValueError):
+        parse_block_header(b"#0....")
+    with pytest.raises(ValueError):
+        parse_block_header(b"1.0,2.0")
+
+
+def test_transport_reads_block_into_reusable_buffer_without_copy() -> None:
+    samples = np.linspace(0.0, 1.0, 200, dtype=">f4")
+    buffer = bytearray(4096)
+    with SerialTransport(timeout=0.2) as transport:
+        transport.write(b"HDR:ok=1\n" + build_block(samples.tobytes()) + b"\nTAIL\n")
+        assert transport.readline() == b"HDR:ok=1\n"
+        array = transport.read_block_array("f4", ">", into=buffer)
+        assert np.array_equal(array, samples)
+        assert np.shares_memory(array, np.frombuffer(buffer, dtype=np.uint8))
+        assert transport.readline() == b"TAIL\n"
+
+
+def test_transport_times_out_on_truncated_block() -> None:
+    with SerialTransport(timeout=0.05) as transport:
+        transport.write(b"#210short")
+        with pytest.raises(TimeoutError):
+            transport.read_block()
+
+
+@pytest.mark.asyncio
+async def test_async_transport_reads_large_block_straight_into_buffer() -> None:
+    master, slave = os.openpty()
+    samples = np.arange(256 * 1024, dtype="<i2")
+    transport = AsyncSerialTransport(os.ttyname(slave))
+    transport.open()
+    try:
+        writer = asyncio.create_task(asyncio.to_thread(_write_all, master, build_block(samples.tobytes()) + b"\n"))
+        array = await asyncio.wait_for(transport.read_block_array("i2", "<"), timeout=5.0)
+        await writer
+    finally:
+        transport.close()
+        os.close(master)
+        os.close(slave)
+
+    assert np.array_equal(array, samples)
+    assert transport._rx.pending == 0
+
+
+def _write_later(fd: int, data: bytes, delay: float) -> None:
+    time.sleep(delay)
+    _write_all(fd, data)
+
+
+def test_transport_waits_for_late_block_terminator() -> None:
+    master, slave = os.openpty()
+    transport = SerialTransport(os.ttyname(slave), timeout=1.0)
+    transport.open()
+    try:
+        _write_all(master, build_block(b"\x01\x02\x03\x04"))
+        writer = threading.Thread(target=_write_later, args=(master, b"\nNEXT\n", 0.05))
+        writer.start()
+        assert bytes(transport.read_block()) == b"\x01\x02\x03\x04"
+        writer.join()
+        assert transport.readline() == b"NEXT\n"
+    finally:
+        transport.close()
+        os.close(master)
+        os.close(slave)
+
+
+@pytest.mark.asyncio
+async def test_async_transport_waits_for_late_block_terminator() -> None:
+    master, slave = os.openpty()
+    transport = AsyncSerialTransport(os.ttyname(slave))
+    transport.open()
+    try:
+        _write_all(master, build_block(b"\x01\x02\x03\x04"))
+        writer = asyncio.create_task(asyncio.to_thread(_write_later, master, b"\nNEXT\n", 0.05))
+        block = await asyncio.wait_for(transport.read_block(), timeout=2.0)
+        assert bytes(block) == b"\x01\x02\x03\x04"
+        await writer
+        assert await asyncio.wait_for(transport.read_line(), timeout=2.0) == b"NEXT\n"
+    finally:
+        transport.close()
+        os.close(master)
+        os.close(slave)
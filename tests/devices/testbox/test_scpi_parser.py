@@ -0,0 +1,48 @@
+"""Differential tests: ResponseParser must match parse_response exactly."""
+
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from apps.devices.testbox.parsers.scpi import ResponseParser, parse_response
+
+_FRAGMENTS = [
+    "PROGRESS", "DONE", "ERR", "kind", "progress", "stage", "elapsed_s", "result",
+    "0", "1", "-3", "0.25", "1e-3", "2E5", "e", "nan", "inf", "1_000", "0x10",
+    "true", "FALSE", "On", "off", "enabled", "PASS", "self test", "",
+    ":", "=", "==", ",", ";", ", ", " ; ", " ", "\t", "\r", "\x0b", "\x85", " ", "é",
+]
+
+
+def _corpus(count: int, seed: int = 20240501) -> list[str]:
+    rng = random.Random(seed)
+    return ["".join(rng.choice(_FRAGMENTS) for _ in range(rng.randint(0, 12))) for _ in range(count)]
+
+
+def _outcome(parse, text: str) -> str:  # type: ignore[no-untyped-def]
+    try:
+        return repr(parse(text))  # repr 使 nan 可比较，并区分 1 / 1.0 / True
+    except ValueError as exc:
+        return f"ValueError: {exc}"
+
+
+def test_parse_line_matches_parse_response_on_fuzzed_corpus() -> None:
+    parser = ResponseParser(cache_size=64)  # 小缓存顺带覆盖清空路径
+    for text in _corpus(5000) + ["PROGRESS:progress=0.5,stage=self_test", "  ", "a , b;c=  1 "]:
+        assert _outcome(parser.parse_line, text) == _outcome(parse_response, text), text
+
+
+@pytest.mark.parametrize("chunk", [1, 3, 17, 4096])
+def test_feed_matches_line_by_line_parsing_for_any_chunking(chunk: int) -> None:
+    lines = [text.replace("\n", "") for text in _corpus(500, seed=chunk)]
+    stream = "\n".join(lines).encode("utf-8") + b"\n"
+    expected = [repr(parse_response(line)) for line in lines if line.strip()]
+
+    parser = ResponseParser()
+    records = []
+    for start in range(0, len(stream), chunk):
+        records.extend(parser.feed(stream[start : start + chunk]))
+
+    assert [repr(record) for record in records] == expected
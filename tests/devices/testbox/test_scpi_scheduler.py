@@ -0,0 +1,155 @@
+"""Tests for the pipelined SCPI request scheduler."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Dict, List
+
+import pytest
+
+from apps.devices.testbox.transport import AsyncSerialTransport, ScpiScheduler
+
+
+class _PtyInstrument:
+    """Answer ``;``-joined SCPI queries on the master side of a pty."""
+
+    def __init__(self, answers: Dict[str, str], *, delay: float = 0.0) -> None:
+        self.master, self.slave = os.openpty()
+        self.answers = answers
+        self.delay = delay
+        self.lines: List[str] = []
+        self._buffer = b""
+        asyncio.get_running_loop().add_reader(self.master, self._on_readable)
+
+    @property
+    def path(self) -> str:
+        return os.ttyname(self.slave)
+
+    def _on_readable(self) -> None:
+        self._buffer += os.read(self.master, 4096)
+        while b"\n" in self._buffer:
+            raw, self._buffer = self._buffer.split(b"\n", 1)
+            line = raw.decode()
+            self.lines.append(line)
+            replies = [self.answers[unit.lstrip(":")] for unit in line.split(";") if unit.endswith("?")]
+            if replies and None not in replies:
+                reply = (";".join(replies) + "\n").encode()
+                asyncio.get_running_loop().call_later(self.delay, os.write, self.master, reply)
+
+    def close(self) -> None:
+        asyncio.get_running_loop().remove_reader(self.master)
+        os.close(self.master)
+        os.close(self.slave)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_merges_queued_queries_and_matches_fifo() -> None:
+    instrument = _PtyInstrument({"*IDN?": "TESTBOX,1", "MEAS:VOLT?": "1.5", "MEAS:CURR?": "0.25"})
+    scheduler = ScpiScheduler(AsyncSerialTransport(instrument.path), depth=2)
+    try:
+        async with scheduler:
+            futures = [scheduler.submit("*IDN?"), scheduler.submit("MEAS:VOLT?"), scheduler.submit("MEAS:CURR?")]
+            await scheduler.send("CONF:RANGE", 10)
+            assert await asyncio.wait_for(asyncio.gather(*futures), timeout=1.0) == ["TESTBOX,1", "1.5", "0.25"]
+    finally:
+        instrument.close()
+
+    assert instrument.lines[0] == "*IDN?;:MEAS:VOLT?;:MEAS:CURR?;:CONF:RANGE 10"
+    assert scheduler.stats.lines_sent == 1
+    assert scheduler.stats.merged == 3
+
+
+@pytest.mark.asyncio
+async def test_scheduler_pipelines_up_to_depth_without_merging() -> None:
+    instrument = _PtyInstrument({"MEAS:VOLT?": "1.5"}, delay=0.05)
+    scheduler = ScpiScheduler(AsyncSerialTransport(instrument.path), depth=3, merge=False)
+    try:
+        async with scheduler:
+            futures = [scheduler.submit("MEAS:VOLT?") for _ in range(5)]
+            await asyncio.sleep(0.02)
+            assert scheduler.in_flight == 3
+            assert await asyncio.wait_for(asyncio.gather(*futures), timeout=1.0) == ["1.5"] * 5
+    finally:
+        instrument.close()
+
+    assert scheduler.stats.lines_sent == 5
+
+
+@pytest.mark.asyncio
+async def test_scheduler_times_out_unanswered_request_and_keeps_going() -> None:
+    instrument = _PtyInstrument({"MEAS:VOLT?": "1.5", "SYST:ERR?": None})  # type: ignore[dict-item]
+    scheduler = ScpiScheduler(AsyncSerialTransport(instrument.path), depth=1, merge=False)
+    try:
+        async with scheduler:
+            lost = scheduler.submit("SYST:ERR?", timeout=0.05)
+            with pytest.raises(asyncio.TimeoutError):
+                await lost
+            assert await asyncio.wait_for(scheduler.query("MEAS:VOLT?"), timeout=1.0) == "1.5"
+    finally:
+        instrument.close()
+
+    assert scheduler.stats.timeouts == 1
+
+
+@pytest.mark.asyncio
+async def test_scheduler_reads_responses_without_per_line_tasks() -> None:
+    instrument = _PtyInstrument({"MEAS:VOLT?": "1.5"})
+    scheduler = ScpiScheduler(AsyncSerialTransport(instrument.path), depth=4, merge=False)
+    loop = asyncio.get_running_loop()
+    created: List[object] = []
+
+    def factory(loop: asyncio.AbstractEventLoop, coro, **kwargs):  # type: ignore[no-untyped-def]
+        created.append(coro)
+        return asyncio.Task(coro, loop=loop, **kwargs)
+
+    try:
+        async with scheduler:
+            loop.set_task_factory(factory)
+            try:
+                for _ in range(20):
+                    assert await asyncio.wait_for(scheduler.query("MEAS:VOLT?"), timeout=1.0) == "1.5"
+            finally:
+                loop.set_task_factory(None)
+    finally:
+        instrument.close()
+
+    assert created == []
+    assert scheduler.stats.timeouts == 0
+
+
+@pytest.mark.asyncio
+async def test_scheduler_restart_after_stop_with_requests_in_flight() -> None:
+    instrument = _PtyInstrument({"A?": None, "B?": None, "C?": "3"})  # type: ignore[dict-item]
+    scheduler = ScpiScheduler(AsyncSerialTransport(instrument.path), depth=2, merge=False)
+    try:
+        scheduler.start()
+        lost = [scheduler.submit("A?"), scheduler.submit("B?")]
+        await asyncio.sleep(0.02)
+        assert scheduler.in_flight == 2
+        await scheduler.stop()
+        for future in lost:
+            with pytest.raises(ConnectionError):
+                await future
+
+        async with scheduler:
+            assert await asyncio.wait_for(scheduler.query("C?"), timeout=1.0) == "3"
+    finally:
+        instrument.close()
+
+
+@pytest.mark.asyncio
+async def test_scheduler_cancels_expiry_timer_of_answered_requests() -> None:
+    instrument = _PtyInstrument({"MEAS:VOLT?": "1.5"})
+    scheduler = ScpiScheduler(AsyncSerialTransport(instrument.path), depth=4, timeout=30.0)
+    loop = asyncio.get_running_loop()
+    try:
+        async with scheduler:
+            baseline = len(loop._scheduled)  # type: ignore[attr-defined]
+            for _ in range(50):
+                assert await asyncio.wait_for(scheduler.query("MEAS:VOLT?"), timeout=1.0) == "1.5"
+            # 应答后的 30 s 截止定时器已撤销，不在事件循环堆中存活到截止时间
+            live = [handle for handle in loop._scheduled if not handle.cancelled()]  # type: ignore[attr-defined]
+            assert len(live) <= baseline
+    finally:
+        instrument.close()
@@ -2,7 +2,13 @@
 
 from __future__ import annotations
 
-from apps.devices.testbox.transport import SerialTransport
+import asyncio
+import os
+
+import pytest
+
+from apps.devices.testbox.transport import AsyncSerialTransport, SerialTransport
+from apps.devices.testbox.transport.framing import LineFramer
 
 
 def test_loop_transport_roundtrip() -> None:
@@ -27,3 +33,75 @@ def test_transport_manual_open_close() -> None:
     finally:
         transport.close()
     assert not transport.is_open
+
+
+@pytest.mark.asyncio
+async def test_async_loop_transport_reads_lines_and_iterates() -> None:
+    async with AsyncSerialTransport(poll_interval=0.001) as transport:
+        assert not transport.uses_fd
+        await transport.write_line("PROGRESS,0.5,self_test")
+        transport.write(b"DONE,PASS\n")
+        await transport.drain()
+        assert await transport.read_line() == b"PROGRESS,0.5,self_test\n"
+        lines = transport.__aiter__()
+        assert await lines.__anext__() == b"DONE,PASS\n"
+    assert not transport.is_open
+
+
+@pytest.mark.asyncio
+async def test_async_transport_uses_event_loop_reader_for_pty() -> None:
+    master, slave = os.openpty()
+    transport = AsyncSerialTransport(os.ttyname(slave))
+    transport.open()
+    try:
+        assert transport.uses_fd
+        pending = asyncio.create_task(transport.read_line())
+        await asyncio.sleep(0.01)
+        assert not pending.done()
+        os.write(master, b"RESULT,")
+        os.write(master, b"PASS\n")
+        assert await asyncio.wait_for(pending, timeout=1.0) == b"RESULT,PASS\n"
+
+        await transport.write_line("TESTBOX:ABORT")
+        assert os.read(master, 64) == b"TESTBOX:ABORT\n"
+    finally:
+        transport.close()
+        os.close(master)
+        os.close(slave)
+
+
+@pytest.mark.asyncio
+async def test_async_transport_polls_many_instruments_concurrently() -> None:
+    transports = [AsyncSerialTransport(poll_interval=0.001) for _ in range(32)]
+    for transport in transports:
+        transport.open()
+    try:
+        readers = [asyncio.create_task(transport.read_line()) for transport in transports]
+        for idx, transport in enumerate(transports):
+            transport.write(f"TB-{idx}\n".encode())
+        lines = await asyncio.wait_for(asyncio.gather(*readers), timeout=1.0)
+    finally:
+        for transport in transports:
+            transport.close()
+    assert lines == [f"TB-{idx}\n".encode() for idx in range(32)]
+
+
+def test_line_framer_splits_chunks_and_reuses_buffer() -> None:
+    framer = LineFramer(b"\r\n", capacity=16)
+    framer.feed(b"PROG,0.1\r\nPRO")
+    assert framer.lines() == [b"PROG,0.1\r\n"]
+    framer.feed(b"G,0.2\r")
+    assert framer.next_line() is None
+    framer.feed(b"\nDONE,PASS,with,a,long,tail\r\n")
+    views = framer.lines(as_view=True)
+    assert [bytes(view) for view in views] == [b"PROG,0.2\r\n", b"DONE,PASS,with,a,long,tail\r\n"]
+    assert framer.pending == 0
+
+
+def test_transport_batches_lines_and_keeps_partial_line_on_timeout() -> None:
+    with SerialTransport(timeout=0.05) as transport:
+        transport.write(b"A\nB\nC\npart")
+        assert transport.read_lines() == [b"A\n", b"B\n", b"C\n"]
+        assert transport.readline() == b""
+        transport.write(b"ial\n")
+        assert transport.readline() == b"partial\n"
@@ -0,0 +1,112 @@
+"""Tests for the Device TestBox state shadow publisher."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import List, Tuple
+
+import pytest
+
+from apps.devices.testbox.domain.models import DeviceTestBoxDoneEvent, DeviceTestBoxProgressEvent
+from apps.devices.testbox.drivers.state_adapter import (
+    ShadowPublishPolicy,
+    StateShadowPublisher,
+    StateTopicLayout,
+)
+
+
+class _DummyMQTTClient:
+    def __init__(self) -> None:
+        self.published: List[Tuple[str, bytes, int, bool]] = []
+
+    def publish(self, topic: str, payload: bytes, qos: int = 0, retain: bool = False) -> None:
+        self.published.append((topic, payload, qos, retain))
+
+
+def _progress(progress: float, stage: str = "self_test") -> DeviceTestBoxProgressEvent:
+    return DeviceTestBoxProgressEvent(corr_id="c-1", device_id="TB-001", progress=progress, stage=stage)
+
+
+@pytest.mark.asyncio
+async def test_shadow_publishes_every_event_by_default() -> None:
+    client = _DummyMQTTClient()
+    publisher = StateShadowPublisher(
+        client=client, device_id="TB-001", topic_layout=StateTopicLayout(base_topic="lab/test/TB-001")
+    )
+
+    for value in (0.1, 0.11, 0.12):
+        publisher.handle(_progress(value))
+
+    assert len(client.published) == 3
+    assert publisher.stats.suppressed == 0
+
+
+@pytest.mark.asyncio
+async def test_shadow_change_driven_mode_suppresses_small_deltas_and_flushes_final_state() -> None:
+    client = _DummyMQTTClient()
+    publisher = StateShadowPublisher(
+        client=client,
+        device_id="TB-001",
+        topic_layout=StateTopicLayout(base_topic="lab/test/TB-001"),
+        policy=ShadowPublishPolicy(on_change=True, progress_delta=0.25),
+    )
+
+    for value in (0.0, 0.05, 0.1, 0.2, 0.3):
+        publisher.handle(_progress(value))
+    publisher.handle(_progress(0.35, stage="sensor_calibration"))
+    publisher.handle(DeviceTestBoxDoneEvent(corr_id="c-1", device_id="TB-001", duration_s=3.0))
+
+    shadows = [json.loads(payload) for _, payload, _, retain in client.published if retain]
+    assert [shadow["metadata"].get("progress") for shadow in shadows] == [0.0, 0.3, 0.35, None]
+    assert shadows[-1]["state"] == "IDLE"
+    assert publisher.stats.published == 4
+    assert publisher.stats.suppressed == 3
+
+
+@pytest.mark.asyncio
+async def test_shadow_min_interval_coalesces_burst_into_one_trailing_publish() -> None:
+    client = _DummyMQTTClient()
+    publisher = StateShadowPublisher(
+        client=client,
+        device_id="TB-001",
+        topic_layout=StateTopicLayout(base_topic="lab/test/TB-001"),
+        policy=ShadowPublishPolicy(min_interval_ms=50),
+    )
+
+    for step in range(10):
+        publisher.handle(_progress(step / 10))
+    assert len(client.published) == 1
+
+    await asyncio.sleep(0.08)
+    assert len(client.published) == 2
+    assert json.loads(client.published[-1][1])["metadata"]["progress"] == 0.9
+    assert publisher.stats.suppressed == 9
+
+
+@pytest.mark.asyncio
+async def test_shadow_min_interval_follows_injected_virtual_clock() -> None:
+    from datetime import datetime, timezone
+
+    from core.clock import VirtualClock
+
+    clock = VirtualClock(start=datetime(2000, 1, 1, tzinfo=timezone.utc), auto_advance=False)
+    client = _DummyMQTTClient()
+    publisher = StateShadowPublisher(
+        client=client,
+        device_id="TB-001",
+        topic_layout=StateTopicLayout(base_topic="lab/test/TB-001"),
+        policy=ShadowPublishPolicy(min_interval_ms=5000),
+        clock=clock,
+    )
+
+    for step in range(5):
+        publisher.handle(_progress(step / 10))
+    assert len(client.published) == 1
+
+    # 墙钟几乎没有流逝，合并后的补发只由虚拟时间驱动
+    assert clock.advance(4.9) == 0
+    assert len(client.published) == 1
+    clock.advance(0.1)
+    assert len(client.published) == 2
+    assert json.loads(client.published[-1][1])["timestamp"].startswith("2000-01-01T00:00:00")
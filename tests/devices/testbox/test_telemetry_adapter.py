@@ -3,13 +3,20 @@
 from __future__ import annotations
 
 import asyncio
+import json
+from pathlib import Path
 from typing import Any, List, Tuple
 
 import pytest
 
-from apps.devices.testbox.drivers.telemetry_adapter import MQTTTelemetryAdapter, TelemetryTopicLayout
+from apps.devices.testbox.drivers.telemetry_adapter import (
+    MQTTTelemetryAdapter,
+    TelemetryBatchConfig,
+    TelemetryTopicLayout,
+)
 from apps.devices.testbox.apps.queues import TelemetryQueue
 from apps.devices.testbox.domain.models import DeviceTestBoxDoneEvent, DeviceTestBoxProgressEvent
+from core.spool import SpoolConfig
 
 
 class _DummyMQTTClient:
@@ -69,3 +76,72 @@ async def test_telemetry_adapter_publishes_progress_and_done_events() -> None:
     assert layout.for_done() in topics
     assert state_publisher.messages[0] == progress
     assert state_publisher.messages[1] == done
+
+
+@pytest.mark.asyncio
+async def test_telemetry_adapter_batches_into_single_framed_publish() -> None:
+    client = _DummyMQTTClient()
+    queue = TelemetryQueue()
+    layout = TelemetryTopicLayout(base_topic="lab/test/device_testbox/TB-004")
+    adapter = MQTTTelemetryAdapter(
+        client=client,
+        telemetry_queue=queue,
+        topic_layout=layout,
+        batching=TelemetryBatchConfig(size=10, interval_ms=20, topic="lab/test/batch"),
+    )
+
+    for step in range(4):
+        await queue.put_telemetry(
+            DeviceTestBoxProgressEvent(corr_id="corr-b", device_id="TB-004", progress=step / 4, stage="s")
+        )
+    adapter.start()
+    await asyncio.wait_for(queue.join(), timeout=0.5)
+    await adapter.stop()
+
+    assert len(client.published) == 1
+    topic, payload, qos, _ = client.published[0]
+    frames = json.loads(payload)
+    assert topic == "lab/test/batch" and qos == 1
+    assert [frame["topic"] for frame in frames] == [layout.for_progress()] * 4
+    assert [frame["payload"]["progress"] for frame in frames] == [0.0, 0.25, 0.5, 0.75]
+    assert adapter.stats.flushes == 1
+    assert adapter.stats.flush_size.max == 4
+    assert adapter.stats.flush_latency_s.count == 1
+
+
+class _OfflineMQTTClient(_DummyMQTTClient):
+    connected = False
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+
+@pytest.mark.asyncio
+async def test_telemetry_adapter_spools_while_disconnected(tmp_path: Path) -> None:
+    client = _OfflineMQTTClient()
+    queue = TelemetryQueue()
+    layout = TelemetryTopicLayout(base_topic="lab/test/device_testbox/TB-005")
+    adapter = MQTTTelemetryAdapter(
+        client=client,
+        telemetry_queue=queue,
+        topic_layout=layout,
+        spool=SpoolConfig(directory=str(tmp_path), replay_rate=1000),
+    )
+    adapter.start()
+    for step in range(3):
+        await queue.put_telemetry(
+            DeviceTestBoxProgressEvent(corr_id="corr-s", device_id="TB-005", progress=step / 4, stage="s")
+        )
+    await asyncio.wait_for(queue.join(), timeout=0.5)
+    assert client.published == []
+    assert adapter.spool is not None and adapter.spool.stats.spooled == 3
+
+    client.connected = True
+    for _ in range(50):
+        if not adapter.spool.has_backlog:
+            break
+        await asyncio.sleep(0.02)
+    await adapter.stop()
+
+    assert [json.loads(payload)["progress"] for _, payload, *_ in client.published] == [0.0, 0.25, 0.5]
+    assert list(tmp_path.glob("seg-*.log")) == []